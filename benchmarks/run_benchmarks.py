@@ -0,0 +1,137 @@
+"""Benchmark the execution backends against each other.
+
+Every program runs on a fresh BrainFuck per backend: the first run
+measures compilation (Numba's on-disk cache or llvmlite codegen) plus
+execution, the best of the following --repeat runs the steady state.
+Outputs of all backends are compared so a wrong kernel fails loudly.
+A second table reports the time and peak memory (tracemalloc) of
+compiling each program from source, with the program cache cleared.
+
+Usage:
+
+    python benchmarks/run_benchmarks.py [--repeat N] [--backend NAME ...]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from brainfuck import BrainFuck, core  # noqa: E402
+
+HELLO = (
+    "++++++++[>++++[>++>+++>+++>+<<<<-]>+>+>->>+[<]<-]>>.>---.+++++++..+++."
+    ">>.<-.<.+++.------.--------.>>+.>++."
+)
+
+PROGRAMS = {
+    "hello": (HELLO, None),
+    # three nested counting loops around a closed-form clear
+    "nested_loops": ("-[>-[>-[>-[-]<-]<-]<-]", None),
+    # multiply the input bytes in a loop the linear pass cannot fold
+    "multiply": (",>,<[>[>+>+<<-]>>[<<+>>-]<<<-]>>.", "\xff\xff"),
+    # scan right for the first zero cell, 255 times
+    "scan": (">" + "+" * 200 + "[>+]" + "<[<]>" * 5 + "-[>[>]<[<]>-]", None),
+    # long straight-line bodies in a loop the linear pass cannot fold
+    "unrolled": (
+        ",[>,[" + ">+>++>+++" * 20 + "[-]" + "<" * 60 + "-]<-]",
+        "\xff\xff",
+    ),
+    "echo": (",+[-.,+]", "benchmark " * 10_000),
+    # a two-megabyte source, dominated by lexing and the peephole passes
+    "large": (HELLO * 20_000, None),
+}
+
+BACKENDS = {
+    "numba": dict(backend="numba"),
+    "llvm": dict(backend="llvm"),
+    "traced": dict(tracing=True),
+}
+
+
+def run(program, input_data, options):
+    bf = BrainFuck(**options)
+    out = io.StringIO()
+    start = time.perf_counter()
+    bf.execute(program, 10**10, output_file=out, input_data=input_data)
+    return time.perf_counter() - start, out.getvalue(), bf.stats
+
+
+def compile_cost(program):
+    """Return seconds and peak bytes allocated compiling program from source.
+
+    The two are measured on separate compiles since tracing every
+    allocation slows the passes down severalfold.
+    """
+    bf = BrainFuck()
+    core._program_cache.clear()
+    start = time.perf_counter()
+    bf._compile(program, True)
+    elapsed = time.perf_counter() - start
+    core._program_cache.clear()
+    tracemalloc.start()
+    bf._compile(program, True)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main(args=None):
+    arg_parser = argparse.ArgumentParser(prog="run_benchmarks")
+    arg_parser.add_argument("--repeat", type=int, default=3, metavar="N")
+    arg_parser.add_argument(
+        "--backend",
+        action="append",
+        choices=sorted(BACKENDS),
+        help="backends to run (default: numba and llvm)",
+    )
+    arg_parser.add_argument(
+        "--program",
+        action="append",
+        choices=sorted(PROGRAMS),
+        help="programs to run (default: all)",
+    )
+    arguments = arg_parser.parse_args(args)
+    backends = arguments.backend or ["numba", "llvm"]
+    programs = arguments.program or list(PROGRAMS)
+
+    print(
+        "{:<14} {:<8} {:>10} {:>10} {:>8}".format(
+            "program", "backend", "first", "best", "vs " + backends[0]
+        )
+    )
+    failures = 0
+    for name in programs:
+        program, input_data = PROGRAMS[name]
+        baseline = expected = None
+        for backend in backends:
+            first, output, _ = run(program, input_data, BACKENDS[backend])
+            best = min(
+                run(program, input_data, BACKENDS[backend])[0]
+                for _ in range(arguments.repeat)
+            )
+            if expected is None:
+                baseline, expected = best, output
+            elif output != expected:
+                failures += 1
+                print("{}: {} output differs".format(name, backend), file=sys.stderr)
+            print(
+                "{:<14} {:<8} {:>9.4f}s {:>9.4f}s {:>7.2f}x".format(
+                    name, backend, first, best, baseline / best
+                )
+            )
+
+    print()
+    print("{:<14} {:>10} {:>10}".format("program", "compile", "peak MiB"))
+    for name in programs:
+        elapsed, peak = compile_cost(PROGRAMS[name][0])
+        print("{:<14} {:>9.4f}s {:>10.2f}".format(name, elapsed, peak / 2**20))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,29 +1,71 @@
-from brainfuck.core import (
-    OP_ADD,
-    OP_INPUT,
-    OP_JUMP_NZ,
-    OP_JUMP_ZERO,
-    OP_MOVE,
-    OP_OUTPUT,
-    OP_PRINT_CELLS,
-    OP_PRINT_HISTORY,
-    OUTPUT_BUF_SIZE,
-    STATUS_COMPLETE,
-    STATUS_NEED_INPUT,
-    STATUS_OUTPUT_OVERFLOW,
-    STATUS_PRINT_CELLS,
-    STATUS_PRINT_HISTORY,
-    BrainFuck,
-    Cells,
-    convert_ir_to_numeric,
-    main,
-)
+"""advanced-brainfuck: BrainFuck interpreter with JIT acceleration.
+
+The public API lives in `brainfuck.core` and is loaded on first attribute
+access, so that `brainfuck --remote` can start without importing NumPy
+and Numba.
+"""
+
+import sys
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from brainfuck.core import (
+        IR_DTYPE,
+        OP_ADD,
+        OP_INPUT,
+        OP_JUMP_NZ,
+        OP_JUMP_ZERO,
+        OP_MOVE,
+        OP_OUTPUT,
+        OP_PRINT_CELLS,
+        OP_PRINT_HISTORY,
+        OUTPUT_BUF_SIZE,
+        STATUS_BREAKPOINT,
+        STATUS_CANCELLED,
+        STATUS_COMPLETE,
+        STATUS_INFINITE_LOOP,
+        STATUS_MAX_ITERATIONS,
+        STATUS_NEED_INPUT,
+        STATUS_OUTPUT_OVERFLOW,
+        STATUS_PRINT_CELLS,
+        STATUS_PRINT_HISTORY,
+        STATUS_TIMEOUT,
+        STATUS_WATCHPOINT,
+        BrainFuck,
+        Cells,
+        CommandHistory,
+        Heatmap,
+        JitWarmUp,
+        MappedCells,
+        PagedCells,
+        Pipeline,
+        ResultCache,
+        SourceMap,
+        analyze_pointer_range,
+        convert_ir_to_numeric,
+        ir_tuples,
+        lex_ir,
+        start_warm_up,
+    )
 
 __all__ = [
     "BrainFuck",
     "Cells",
+    "CommandHistory",
+    "Heatmap",
+    "JitWarmUp",
+    "MappedCells",
+    "PagedCells",
+    "Pipeline",
+    "ResultCache",
+    "SourceMap",
     "main",
     "convert_ir_to_numeric",
+    "lex_ir",
+    "ir_tuples",
+    "IR_DTYPE",
+    "analyze_pointer_range",
+    "start_warm_up",
     "OP_ADD",
     "OP_MOVE",
     "OP_OUTPUT",
@@ -37,5 +79,37 @@ __all__ = [
     "STATUS_PRINT_CELLS",
     "STATUS_PRINT_HISTORY",
     "STATUS_OUTPUT_OVERFLOW",
+    "STATUS_TIMEOUT",
+    "STATUS_CANCELLED",
+    "STATUS_MAX_ITERATIONS",
+    "STATUS_INFINITE_LOOP",
+    "STATUS_BREAKPOINT",
+    "STATUS_WATCHPOINT",
     "OUTPUT_BUF_SIZE",
 ]
+
+
+def main(args=None):
+    """CLI entry point; `--remote` runs without loading the JIT."""
+    if args is None:
+        args = sys.argv[1:]
+    if any(a == "--remote" or a.startswith("--remote=") for a in args):
+        from brainfuck.client import main as remote_main
+
+        return remote_main(args)
+
+    from brainfuck.core import main as core_main
+
+    return core_main(args)
+
+
+def __getattr__(name):
+    if name in __all__:
+        from brainfuck import core
+
+        return getattr(core, name)
+    raise AttributeError("module 'brainfuck' has no attribute {!r}".format(name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
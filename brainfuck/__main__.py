@@ -1,6 +1,6 @@
 import sys
 
-from brainfuck.core import main
+from brainfuck import main
 
 if __name__ == "__main__":
-    main(sys.argv[1:])
+    sys.exit(main(sys.argv[1:]))
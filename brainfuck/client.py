@@ -0,0 +1,202 @@
+"""Thin client for the local BrainFuck execution server.
+
+This module only depends on the standard library so that
+`brainfuck --remote ADDRESS ...` starts without importing NumPy or Numba;
+the program runs on a warm worker of `brainfuck serve` instead.
+
+Protocol: newline-delimited JSON over a Unix socket or a localhost TCP
+connection. The client sends one request per line::
+
+    {"program": "...", "input": "...", "max_recursion": 100000,
+     "timeout": 1.5}
+
+and the server streams back ``{"output": "..."}`` lines followed by a
+final ``{"status": "complete", "pointer": 0}`` (or ``{"error": "..."}``);
+a run that stops early also reports ``"stopped_at"``, the source
+location of the instruction it stopped at.
+Several requests may be sent over the same connection.
+
+    Examples:
+
+        >>> parse_address('/tmp/bf.sock')
+        (<AddressFamily.AF_UNIX: 1>, '/tmp/bf.sock')
+        >>> parse_address('127.0.0.1:7373')
+        (<AddressFamily.AF_INET: 2>, ('127.0.0.1', 7373))
+
+"""
+
+import argparse
+import json
+import socket
+import sys
+
+DEFAULT_ADDRESS = "127.0.0.1:7373"
+
+
+def parse_address(address):
+    """Split an address into a socket family and a socket address.
+
+    Args:
+        address: Unix socket path, or HOST:PORT for TCP.
+
+    Returns:
+        (family, sock_addr) suitable for socket.socket() and connect().
+    """
+    if ":" in address and "/" not in address:
+        host, port = address.rsplit(":", 1)
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    return socket.AF_UNIX, address
+
+
+def connect(address):
+    """Open a connection to a `brainfuck serve` instance."""
+    family, sock_addr = parse_address(address)
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.connect(sock_addr)
+    return sock
+
+
+def run_remote(
+    address,
+    program,
+    input_data=None,
+    max_recursion=None,
+    timeout=None,
+    output_file=None,
+):
+    """Execute a program on the server, streaming its output.
+
+    Args:
+        address: Server address (see parse_address).
+        program: BrainFuck commands, optionally with {LIB} imports.
+        input_data: Input text for `,`, or None for no input.
+        max_recursion: Operation budget; the server caps it.
+        timeout: Wall-clock budget in seconds; the server caps it.
+        output_file: File object receiving the output (default: stdout).
+
+    Returns:
+        dict: The final status message from the server.
+
+    Raises:
+        Exception: If the server reports an error or closes early.
+    """
+    if output_file is None:
+        output_file = sys.stdout
+
+    request = {"program": program}
+    if input_data is not None:
+        request["input"] = input_data
+    if max_recursion is not None:
+        request["max_recursion"] = max_recursion
+    if timeout is not None:
+        request["timeout"] = timeout
+
+    with connect(address) as sock, sock.makefile("rw", encoding="utf-8") as f:
+        f.write(json.dumps(request) + "\n")
+        f.flush()
+        for line in f:
+            message = json.loads(line)
+            if "output" in message:
+                output_file.write(message["output"])
+                output_file.flush()
+            elif "error" in message:
+                raise Exception(message["error"])
+            else:
+                return message
+
+    raise Exception("connection closed by server")
+
+
+def main(args=None):
+    """Command line options for `brainfuck --remote`."""
+    arg_parser = argparse.ArgumentParser(prog="brainfuck --remote")
+    arg_parser.add_argument(
+        "cmd",
+        nargs="?",
+        default="",
+        type=str,
+        help="brainFuck commands",
+    )
+    arg_parser.add_argument(
+        "--remote",
+        default=DEFAULT_ADDRESS,
+        metavar="ADDRESS",
+        help="server address: Unix socket path or HOST:PORT",
+    )
+    arg_parser.add_argument(
+        "-r",
+        "--recursion",
+        type=int,
+        metavar="MAX_RECURSION",
+        help="set MAX_RECURSION value",
+    )
+    arg_parser.add_argument(
+        "-c",
+        "--command-line",
+        action="store_true",
+        help="accepted for compatibility; remote runs never start a shell",
+    )
+    arg_parser.add_argument(
+        "-f",
+        "--file",
+        type=str,
+        metavar="FILE",
+        help="load brainfuck commands from a file",
+    )
+    arg_parser.add_argument(
+        "--input",
+        type=str,
+        metavar="TEXT",
+        help="feed TEXT to `,` instead of prompting",
+    )
+    arg_parser.add_argument(
+        "--output",
+        type=str,
+        metavar="FILE",
+        help="redirect output to file instead of stdout",
+    )
+    arg_parser.add_argument(
+        "--timeout",
+        type=float,
+        metavar="SECONDS",
+        help="stop execution after SECONDS of wall-clock time",
+    )
+    arguments = arg_parser.parse_args(args)
+
+    cmd = arguments.cmd
+    if arguments.file:
+        with open(arguments.file) as f:
+            cmd = f.read()
+
+    output_fh = None
+    if arguments.output:
+        output_fh = open(arguments.output, "w")
+
+    try:
+        result = run_remote(
+            arguments.remote,
+            cmd,
+            input_data=arguments.input,
+            max_recursion=arguments.recursion,
+            timeout=arguments.timeout,
+            output_file=output_fh,
+        )
+    except Exception as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        if output_fh:
+            output_fh.close()
+
+    if result.get("status") == "timeout":
+        print("Execution timed out!", file=sys.stderr)
+    elif result.get("status") == "infinite_loop":
+        print(
+            "Infinite loop detected at {}!".format(result.get("stopped_at", "?")),
+            file=sys.stderr,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -22,13 +22,32 @@
 """
 
 import argparse
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
 import os
 import re
+import struct
 import sys
-from collections import defaultdict
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict, deque
 
 import numpy as np
-from numba import jit
+
+try:
+    from numba import jit
+
+    HAVE_NUMBA = True
+except ImportError:  # pragma: no cover - Numba is a regular dependency
+    HAVE_NUMBA = False
+
+    def jit(*args, **kwargs):
+        """Stand-in for numba.jit that leaves functions as plain Python."""
+        return lambda function: function
+
 
 # Operation codes for JIT compilation
 OP_ADD = 0
@@ -40,6 +59,32 @@ OP_JUMP_NZ = 5
 OP_PRINT_CELLS = 6
 OP_PRINT_HISTORY = 7
 
+# Superinstructions emitted by the peephole passes; the third program
+# column holds their second operand
+OP_ADD_MOVE = 8
+OP_MOVE_ADD = 9
+OP_OUTPUT_RUN = 10
+
+# Closed-form loop (see fold_linear_loops): a header row
+# (OP_LINEAR_LOOP, step, body_length) followed by one
+# (OP_LOOP_TERM, offset, delta) row per other cell the loop changes and
+# by the loop itself, which runs instead when a term leaves the tape
+OP_LINEAR_LOOP = 11
+OP_LOOP_TERM = 12
+
+# Straight-line block (see summarize_delta_blocks): a header row
+# (OP_DELTA_BLOCK, cost, net_move), one (OP_BLOCK_DELTA, offset, delta)
+# row per cell of its window in offset order, and an
+# (OP_BLOCK_END, length) row followed by the `length` original
+# instructions, which run instead when the block cannot be applied whole
+OP_DELTA_BLOCK = 13
+OP_BLOCK_DELTA = 14
+OP_BLOCK_END = 15
+
+# Breakpoint patched over an instruction (see set_breakpoints); the
+# kernels stop before it with STATUS_BREAKPOINT
+OP_BREAK = 16
+
 # Execution status codes
 STATUS_COMPLETE = 0
 STATUS_NEED_INPUT = 1
@@ -47,8 +92,88 @@ STATUS_PRINT_CELLS = 2
 STATUS_PRINT_HISTORY = 3
 STATUS_OUTPUT_OVERFLOW = 4
 
+# Run status codes returned by BrainFuck.execute for suspended runs
+STATUS_TIMEOUT = 5
+STATUS_CANCELLED = 6
+STATUS_MAX_ITERATIONS = 7
+STATUS_INFINITE_LOOP = 9
+# A run reached a breakpoint (OP_BREAK) or changed a watched cell (see
+# execute_watch_jit); it is suspended there and resume() continues it
+STATUS_BREAKPOINT = 10
+STATUS_WATCHPOINT = 11
+
+# Internal status of execute_paged_jit: the page pool is full
+STATUS_PAGE_FAULT = 8
+
+TAPE_SIZE = 65536
 OUTPUT_BUF_SIZE = 1_000_000
 
+# Iterations per JIT slice between deadline and cancellation checks
+SLICE_ITERATIONS = 1_000_000
+
+# Output buffer of every Pipeline stage but the last: a stage stops once
+# it is full so the next stage can read it
+PIPE_BUFFER_SIZE = 65_536
+
+# Longest bar of a text Heatmap, drawn for the most accessed cell
+HEATMAP_WIDTH = 40
+
+# Compiled programs kept by _prepare, keyed by import-resolved source
+PROGRAM_CACHE_SIZE = 128
+
+# Longest `.>.>.` run fused into one OP_OUTPUT_RUN; must stay below the
+# smallest output buffer (ASYNC_OUTPUT_BUF_SIZE, BATCH_OUTPUT_BUF_SIZE)
+OUTPUT_RUN_MAX = 64
+
+# Shortest add/move run summarized as a delta block
+DELTA_BLOCK_MIN = 4
+
+# Step bound of the evaluation of input-free prefixes (see evaluate_prefix)
+PREFIX_EVAL_STEPS = 1_000_000
+
+# Memoized results of completed runs (see ResultCache)
+RESULT_CACHE_SIZE = 256
+RESULT_MAGIC = b'BFRESULT'
+RESULT_VERSION = 1
+
+# Entries of a loop header before TraceCompiler compiles the loop
+TRACE_THRESHOLD = 64
+
+# Commands kept in memory by CommandHistory for `&`
+HISTORY_SIZE = 10_000
+
+# Binary tape snapshots: magic, version and array alignment of the
+# container written by _write_container
+SNAPSHOT_MAGIC = b'BFTAPE\x00\x00'
+SNAPSHOT_VERSION = 1
+CONTAINER_ALIGN = 64
+
+# Precompiled `.bfc` bytecode (see BrainFuck.save_bytecode); a file with
+# another version is recompiled from the source kept in its header
+BYTECODE_MAGIC = b'BFCODE\x00\x00'
+BYTECODE_VERSION = 5
+
+# Cells in a new memory-mapped tape (see BrainFuck.open_tape); the file is
+# created sparse, so only pages that are written take disk space
+MAPPED_TAPE_SIZE = 2**30
+
+# Paged sparse tape (see PagedCells): cells are grouped in pages of
+# PAGE_SIZE that are allocated on first write; the page table covers
+# PAGE_TABLE_SIZE pages centred on cell 0
+PAGE_SHIFT = 12
+PAGE_SIZE = 1 << PAGE_SHIFT
+PAGE_MASK = PAGE_SIZE - 1
+PAGE_TABLE_SIZE = 2**18
+PAGED_INITIAL_PAGES = 16
+
+# Per-session output buffer for execute_async; a full buffer is written
+# out and drained before the next slice runs
+ASYNC_OUTPUT_BUF_SIZE = 4096
+
+# Lockstep batch execution (one program, many tapes)
+BATCH_TAPE_SIZE = 30000
+BATCH_OUTPUT_BUF_SIZE = 4096
+
 help_text = """
 BrainFuck Commands
 
@@ -68,45 +193,774 @@ Additional Commands
     &             output command history.
     help          show this help message.
     quit          exit the interpreter.
-    save [FILE]   save tape state to JSON (default: tape.json)."""
+    save [FILE]   save tape state (default: tape.json); FILE ending in
+                  .json is written as JSON, any other name as a binary
+                  snapshot.
+
+Debugging
+
+    break [LOC]   stop before the instruction at LOC (LINE:COLUMN of the
+                  command, or FILE:LINE:COLUMN); list breakpoints.
+    unbreak LOC   remove a breakpoint.
+    watch [CELL]  stop after cell CELL changes; list watched cells.
+    unwatch CELL  remove a watchpoint.
+    step [N]      run N instructions (default: 1) of the stopped command.
+    continue      run the stopped command until it ends or stops again."""
+
+
+# REPL commands handled by BrainFuck._debug_command, with their usage
+_DEBUG_COMMANDS = {
+    'break': 'break [LOC]',
+    'unbreak': 'unbreak LOC',
+    'watch': 'watch [CELL]',
+    'unwatch': 'unwatch CELL',
+    'step': 'step [N]',
+    'continue': 'continue',
+}
+
+# JitWarmUp started by start_warm_up(), if any
+_jit_warm_up = None
+_program_cache = OrderedDict()
+_program_cache_lock = threading.Lock()
+_library_cache = {}
+_BFLIB_DIR = os.path.join(os.path.dirname(__file__), 'bflib')
+_LIBRARY_HEADER = re.compile(r'([A-Za-z][A-Za-z ]*):(.*)$')
+_LIBRARY_IMPORT = re.compile(r'\{([a-zA-Z0-9_\.\-\/]+)\}')
+
+
+def _cache_program(cache_key, compiled):
+    with _program_cache_lock:
+        _program_cache[cache_key] = compiled
+        _program_cache.move_to_end(cache_key)
+        if len(_program_cache) > PROGRAM_CACHE_SIZE:
+            _program_cache.popitem(last=False)
+
+
+def _align(size):
+    return -(-size // CONTAINER_ALIGN) * CONTAINER_ALIGN
+
+
+def _container_header(magic, version, meta, specs):
+    """Build a container header for arrays given as {name: (dtype, shape)}.
+
+    Returns:
+        (prefix, layout, data_start, size): the header bytes, the array
+        layout, the offset of the first array and the total file size.
+    """
+    layout = {}
+    offset = 0
+    for name, (dtype, shape) in specs.items():
+        dtype = np.dtype(dtype)
+        layout[name] = {
+            'dtype': dtype.str,
+            'shape': list(shape),
+            'offset': offset,
+        }
+        offset += _align(int(np.prod(shape)) * dtype.itemsize)
+
+    header = json.dumps({'meta': meta, 'arrays': layout}).encode()
+    prefix = magic + struct.pack('<II', version, len(header)) + header
+    data_start = _align(len(prefix))
+    return prefix, layout, data_start, data_start + offset
+
+
+def _write_container(path, magic, version, meta, arrays):
+    """Write metadata and NumPy arrays to a binary container file.
+
+    Layout: 8-byte magic, uint32 version, uint32 header length, a JSON
+    header ({"meta": ..., "arrays": {name: {dtype, shape, offset}}}), then
+    every array's raw bytes at CONTAINER_ALIGN-aligned offsets. The whole
+    file is assembled in memory and written with a single write.
+
+    Args:
+        path: Destination file path.
+        magic: 8-byte file signature.
+        version: Format version stored in the header.
+        meta: JSON-serialisable metadata.
+        arrays: Mapping of name to NumPy array.
+    """
+    specs = {name: (arr.dtype, arr.shape) for name, arr in arrays.items()}
+    prefix, layout, data_start, size = _container_header(
+        magic, version, meta, specs
+    )
+
+    buf = bytearray(size)
+    buf[:len(prefix)] = prefix
+    for name, arr in arrays.items():
+        start = data_start + layout[name]['offset']
+        buf[start:start + arr.nbytes] = np.ascontiguousarray(arr).tobytes()
+
+    with open(path, 'wb') as f:
+        f.write(buf)
+
+
+def _allocate_container(path, magic, version, meta, specs):
+    """Create a zero-filled container without writing its arrays.
+
+    Only the header is written; the file is then extended with truncate(),
+    which leaves the array area as a sparse hole on most file systems.
+
+    Args:
+        specs: Mapping of name to (dtype, shape).
+    """
+    prefix, _, _, size = _container_header(magic, version, meta, specs)
+    with open(path, 'wb') as f:
+        f.write(prefix)
+        f.truncate(size)
+
+
+def _read_container(path, magic, mode='r'):
+    """Open a file written by _write_container without copying arrays.
+
+    Args:
+        path: Container file path.
+        magic: Expected 8-byte file signature.
+        mode: np.memmap mode for the arrays ('r', 'r+' or 'c').
+
+    Returns:
+        (version, meta, arrays) where arrays maps names to np.memmap views
+        of the file (empty arrays are returned as regular arrays).
+
+    Raises:
+        Exception: If the file does not start with magic.
+    """
+    with open(path, 'rb') as f:
+        head = f.read(16)
+        if len(head) < 16 or head[:8] != magic:
+            raise Exception('{} is not a {!r} file'.format(path, magic))
+        version, header_len = struct.unpack('<II', head[8:])
+        header = json.loads(f.read(header_len))
+
+    data_start = _align(16 + header_len)
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        shape = tuple(spec['shape'])
+        if not np.prod(shape):
+            arrays[name] = np.zeros(shape, dtype=spec['dtype'])
+            continue
+        arrays[name] = np.memmap(
+            path,
+            dtype=spec['dtype'],
+            mode=mode,
+            offset=data_start + spec['offset'],
+            shape=shape,
+        )
+    return version, header['meta'], arrays
+
+
+def _is_container(path, magic):
+    with open(path, 'rb') as f:
+        return f.read(8) == magic
+
+
+@jit(nopython=True, cache=True)
+def loop_trip_count(value, step):
+    """Return how many trips a loop adding step to its control cell runs.
+
+    Solves value + n * step == 0 (mod 256) for the smallest n >= 0.
+    With step = 2**k * odd, a solution exists iff value is a multiple of
+    2**k, and n then follows from the inverse of the odd part.
+
+    Returns:
+        The trip count, or -1 if the loop never terminates.
+    """
+    value &= 0xFF
+    step &= 0xFF
+    if value == 0:
+        return 0
+    if step == 0:
+        return -1
+    g = step & -step
+    if value % g:
+        return -1
+    m = 256 // g
+    odd = step // g
+    # Newton iteration for the inverse of an odd number mod 2**8
+    inverse = odd
+    for _ in range(3):
+        inverse = inverse * (2 - odd * inverse) & 0xFF
+    return (((256 - value) // g) * inverse) % m
+
+
+def _make_execute_jit(bounds_check):
+    """Build an execute_jit kernel, with or without move bounds checks.
+
+    bounds_check is a compile-time constant of the closure, so the
+    unchecked variant contains no range test at all. It is only safe when
+    analyze_pointer_range() proves every move stays on the tape.
+    """
+
+    @jit(nopython=True, cache=True)
+    def execute_jit(program, tape, state, output_buf, max_iterations):
+        """JIT-compiled BrainFuck execution engine with checkpoint/resume.
+
+        Runs until: program ends, max_iterations reached, an I/O op is hit,
+        or the output buffer overflows.
+
+        Superinstructions count as the number of instructions they
+        replace and only run when the budget covers all of them (the run
+        otherwise stops in front of them), so MAX_RECURSION budgets do
+        not depend on the peephole passes.
+
+        Args:
+            program: NumPy array of shape (N, 3) with (op_code, arg, arg2)
+            tape: NumPy array — memory tape, modified in-place
+            state: NumPy array of shape (3,) — [pointer, pc, output_count]
+                   Modified in-place to track execution state across segments.
+            output_buf: Pre-allocated buffer for output cell values
+            max_iterations: Maximum iterations to run in this segment
+
+        Returns:
+            (status, iterations) where status is one of STATUS_*
+        """
+        pointer = int(state[0])
+        pc = int(state[1])
+        out_idx = int(state[2])
+        iterations = 0
+
+        while pc < len(program) and iterations < max_iterations:
+            op_code = program[pc, 0]
+            arg = program[pc, 1]
+
+            if op_code == OP_ADD:
+                tape[pointer] = (tape[pointer] + arg) & 0xFF
+            elif op_code == OP_MOVE:
+                new_pointer = pointer + arg
+                if not bounds_check or 0 <= new_pointer < len(tape):
+                    pointer = new_pointer
+            elif op_code == OP_ADD_MOVE:
+                if iterations + 2 > max_iterations:
+                    iterations = max_iterations
+                    continue
+                tape[pointer] = (tape[pointer] + arg) & 0xFF
+                new_pointer = pointer + program[pc, 2]
+                if not bounds_check or 0 <= new_pointer < len(tape):
+                    pointer = new_pointer
+                iterations += 1
+            elif op_code == OP_MOVE_ADD:
+                if iterations + 2 > max_iterations:
+                    iterations = max_iterations
+                    continue
+                new_pointer = pointer + arg
+                if not bounds_check or 0 <= new_pointer < len(tape):
+                    pointer = new_pointer
+                tape[pointer] = (tape[pointer] + program[pc, 2]) & 0xFF
+                iterations += 1
+            elif op_code == OP_LINEAR_LOOP:
+                # end is the jump_zero of the loop kept after the terms
+                end = pc + 1
+                while program[end, 0] == OP_LOOP_TERM:
+                    end += 1
+                if bounds_check and end > pc + 1 and not (
+                    0 <= pointer + program[pc + 1, 1]
+                    and pointer + program[end - 1, 1] < len(tape)
+                ):
+                    # a term leaves the tape: run the loop itself
+                    pc = end
+                    continue
+                trips = loop_trip_count(tape[pointer], arg)
+                if trips == 0:
+                    pc = program[end, 1]
+                    iterations += 1
+                    continue
+                if trips < 0:
+                    state[0] = pointer
+                    state[1] = pc
+                    state[2] = out_idx
+                    return (STATUS_INFINITE_LOOP, iterations)
+                cost = program[pc, 2] + 2
+                affordable = (max_iterations - iterations) // cost
+                if affordable == 0:
+                    iterations = max_iterations
+                    continue
+                following = program[end, 1]
+                if affordable < trips:
+                    # run what the budget allows and stay on the loop
+                    trips = affordable
+                    following = pc
+                for term in range(pc + 1, end):
+                    target = pointer + program[term, 1]
+                    tape[target] = (tape[target] + trips * program[term, 2]) & 0xFF
+                tape[pointer] = (tape[pointer] + trips * arg) & 0xFF
+                iterations += trips * cost
+                pc = following
+                continue
+            elif op_code == OP_DELTA_BLOCK:
+                end = pc + 1
+                while program[end, 0] == OP_BLOCK_DELTA:
+                    end += 1
+                if iterations + arg > max_iterations or (
+                    bounds_check
+                    and not (
+                        0 <= pointer + program[pc + 1, 1]
+                        and pointer + program[end - 1, 1] < len(tape)
+                    )
+                ):
+                    # run the original instructions one by one
+                    pc = end + 1
+                    continue
+                for row in range(pc + 1, end):
+                    if program[row, 2]:
+                        target = pointer + program[row, 1]
+                        tape[target] = (tape[target] + program[row, 2]) & 0xFF
+                pointer += program[pc, 2]
+                iterations += arg
+                pc = end + 1 + program[end, 1]
+                continue
+            elif op_code == OP_OUTPUT_RUN:
+                if iterations + 2 * arg - 1 > max_iterations:
+                    iterations = max_iterations
+                    continue
+                if out_idx + arg > len(output_buf):
+                    state[0] = pointer
+                    state[1] = pc
+                    state[2] = out_idx
+                    return (STATUS_OUTPUT_OVERFLOW, iterations)
+                step = program[pc, 2]
+                for k in range(arg):
+                    if k:
+                        new_pointer = pointer + step
+                        if not bounds_check or 0 <= new_pointer < len(tape):
+                            pointer = new_pointer
+                    output_buf[out_idx] = tape[pointer]
+                    out_idx += 1
+                iterations += 2 * arg - 2
+                if out_idx >= len(output_buf):
+                    state[0] = pointer
+                    state[1] = pc + 1
+                    state[2] = out_idx
+                    return (STATUS_OUTPUT_OVERFLOW, iterations)
+            elif op_code == OP_OUTPUT:
+                if out_idx < len(output_buf):
+                    output_buf[out_idx] = tape[pointer]
+                out_idx += 1
+                if out_idx >= len(output_buf):
+                    state[0] = pointer
+                    state[1] = pc + 1
+                    state[2] = out_idx
+                    return (STATUS_OUTPUT_OVERFLOW, iterations)
+            elif op_code == OP_INPUT:
+                state[0] = pointer
+                state[1] = pc
+                state[2] = out_idx
+                return (STATUS_NEED_INPUT, iterations)
+            elif op_code == OP_JUMP_ZERO:
+                if tape[pointer] == 0:
+                    pc = arg
+                    iterations += 1
+                    continue
+            elif op_code == OP_JUMP_NZ:
+                if tape[pointer] != 0:
+                    pc = arg
+                    iterations += 1
+                    continue
+            elif op_code == OP_PRINT_CELLS:
+                state[0] = pointer
+                state[1] = pc
+                state[2] = out_idx
+                return (STATUS_PRINT_CELLS, iterations)
+            elif op_code == OP_PRINT_HISTORY:
+                state[0] = pointer
+                state[1] = pc
+                state[2] = out_idx
+                return (STATUS_PRINT_HISTORY, iterations)
+            elif op_code == OP_BREAK:
+                state[0] = pointer
+                state[1] = pc
+                state[2] = out_idx
+                return (STATUS_BREAKPOINT, iterations)
+
+            pc += 1
+            iterations += 1
+
+        state[0] = pointer
+        state[1] = pc
+        state[2] = out_idx
+        return (STATUS_COMPLETE, iterations)
+
+    return execute_jit
+
+
+execute_jit = _make_execute_jit(True)
+execute_unchecked_jit = _make_execute_jit(False)
+
+
+@jit(nopython=True, cache=True)
+def instruction_cost(program, pc, value):
+    """Return the iterations instruction pc takes with value in its cell.
+
+    A budget of that many runs exactly this instruction: closed-form
+    loops, delta blocks and superinstructions do nothing on a smaller
+    one.
+    """
+    op_code = program[pc, 0]
+    if op_code == OP_LINEAR_LOOP:
+        trips = loop_trip_count(value, program[pc, 1])
+        if trips > 0:
+            return trips * (program[pc, 2] + 2)
+    elif op_code == OP_DELTA_BLOCK:
+        return program[pc, 1]
+    elif op_code == OP_ADD_MOVE or op_code == OP_MOVE_ADD:
+        return 2
+    elif op_code == OP_OUTPUT_RUN:
+        return 2 * program[pc, 1] - 1
+    return 1
+
+
+def _make_execute_watch_jit(kernel):
+    """Build a watchpoint variant of an execute_jit kernel.
+
+    The variant takes two more arguments: watched, the tape indices of
+    the watched cells, and values, their values when the run started. It
+    runs kernel one instruction at a time (see instruction_cost) and
+    stops with
+    STATUS_WATCHPOINT before the next instruction once a watched cell
+    differs from values, which the caller refreshes before resuming.
+    Only runs with watchpoints pay for the per-instruction check.
+    """
+
+    @jit(nopython=True, cache=True)
+    def execute_watch_jit(
+        program, tape, state, output_buf, max_iterations, watched, values
+    ):
+        iterations = 0
+        while True:
+            for k in range(len(watched)):
+                if tape[watched[k]] != values[k]:
+                    return (STATUS_WATCHPOINT, iterations)
+            pc = state[1]
+            if iterations >= max_iterations or pc >= len(program):
+                return (STATUS_COMPLETE, iterations)
+            budget = min(
+                instruction_cost(program, pc, tape[state[0]]),
+                max_iterations - iterations,
+            )
+            status, steps = kernel(program, tape, state, output_buf, budget)
+            iterations += steps
+            if status != STATUS_COMPLETE:
+                return (status, iterations)
+
+    return execute_watch_jit
+
+
+execute_watch_jit = _make_execute_watch_jit(execute_jit)
+execute_unchecked_watch_jit = _make_execute_watch_jit(execute_unchecked_jit)
+_WATCH_KERNELS = {
+    execute_jit: execute_watch_jit,
+    execute_unchecked_jit: execute_unchecked_watch_jit,
+}
+
+
+@jit(nopython=True, cache=True)
+def execute_profile_jit(
+    program, tape, state, output_buf, max_iterations, reads, writes, extent
+):
+    """execute_jit for unoptimized programs, counting every cell access.
+
+    Follows the execute_jit protocol on programs of the basic operations
+    (optimize_ir() without passes, where every instruction is one source
+    command or run of `+`/`-`/`<`/`>`), with three more arrays updated in
+    place: reads and writes count the accesses of each tape index, and
+    extent holds [lowest pointer, highest pointer, largest value seen].
+    `+`/`-` runs read and write their cell, `.`, `[` and `]` read it and
+    `,` writes it (the caller stores the value). Being a kernel of its
+    own, it costs runs that are not profiled nothing.
+    """
+    pointer = int(state[0])
+    pc = int(state[1])
+    out_idx = int(state[2])
+    iterations = 0
+
+    while pc < len(program) and iterations < max_iterations:
+        op_code = program[pc, 0]
+        arg = program[pc, 1]
+
+        if op_code == OP_MOVE:
+            new_pointer = pointer + arg
+            if 0 <= new_pointer < len(tape):
+                pointer = new_pointer
+            extent[0] = min(extent[0], pointer)
+            extent[1] = max(extent[1], pointer)
+        elif op_code == OP_INPUT:
+            writes[pointer] += 1
+            state[0] = pointer
+            state[1] = pc
+            state[2] = out_idx
+            return (STATUS_NEED_INPUT, iterations)
+        elif op_code == OP_PRINT_CELLS or op_code == OP_PRINT_HISTORY:
+            state[0] = pointer
+            state[1] = pc
+            state[2] = out_idx
+            if op_code == OP_PRINT_CELLS:
+                return (STATUS_PRINT_CELLS, iterations)
+            return (STATUS_PRINT_HISTORY, iterations)
+        elif op_code == OP_BREAK:
+            state[0] = pointer
+            state[1] = pc
+            state[2] = out_idx
+            return (STATUS_BREAKPOINT, iterations)
+        else:
+            value = tape[pointer]
+            reads[pointer] += 1
+            extent[2] = max(extent[2], value)
+            if op_code == OP_ADD:
+                value = (value + arg) & 0xFF
+                tape[pointer] = value
+                writes[pointer] += 1
+                extent[2] = max(extent[2], value)
+            elif op_code == OP_OUTPUT:
+                if out_idx < len(output_buf):
+                    output_buf[out_idx] = value
+                out_idx += 1
+                if out_idx >= len(output_buf):
+                    state[0] = pointer
+                    state[1] = pc + 1
+                    state[2] = out_idx
+                    return (STATUS_OUTPUT_OVERFLOW, iterations)
+            elif op_code == OP_JUMP_ZERO:
+                if value == 0:
+                    pc = arg
+                    iterations += 1
+                    continue
+            elif op_code == OP_JUMP_NZ:
+                if value != 0:
+                    pc = arg
+                    iterations += 1
+                    continue
+
+        pc += 1
+        iterations += 1
+
+    state[0] = pointer
+    state[1] = pc
+    state[2] = out_idx
+    return (STATUS_COMPLETE, iterations)
+
 
+def set_breakpoints(numeric_program, pcs):
+    """Return a copy of numeric_program stopping before instructions pcs.
 
-@jit(nopython=True)
-def execute_jit(program, tape, state, output_buf, max_iterations):
-    """JIT-compiled BrainFuck execution engine with checkpoint/resume.
+    Each breakpoint replaces its row with OP_BREAK. Rows that are not
+    run on their own move to the instruction that runs them: the rows of
+    a closed-form loop or delta block to its header, and the loop or
+    instructions they summarize to the summary, which the kernels apply
+    instead.
+
+    Examples:
 
-    Runs until: program ends, max_iterations reached, an I/O op is hit,
-    or the output buffer overflows.
+        >>> program = convert_ir_to_numeric(
+        ...     [('add', 1), ('linear_loop', -1, 4), ('loop_term', 1, 1),
+        ...      ('jump_zero', 9), ('add', -1), ('move', 1), ('add', 1),
+        ...      ('move', -1), ('jump_nz', 3)]
+        ... )
+        >>> set_breakpoints(program, [6])[:, 0].tolist()
+        [0, 16, 12, 4, 0, 1, 0, 1, 5]
+    """
+    ops = numeric_program[:, 0]
+    owner = np.arange(len(ops))
+    for header in np.flatnonzero(ops == OP_DELTA_BLOCK).tolist():
+        end = header + 1
+        while ops[end] == OP_BLOCK_DELTA:
+            end += 1
+        owner[header:end + 1 + numeric_program[end, 1]] = header
+    for header in np.flatnonzero(ops == OP_LINEAR_LOOP).tolist():
+        end = header + 1
+        while ops[end] == OP_LOOP_TERM:
+            end += 1
+        owner[header:numeric_program[end, 1]] = header
+
+    patched = numeric_program.copy()
+    pcs = np.asarray(list(pcs), dtype=np.int64)
+    patched[owner[pcs[(pcs >= 0) & (pcs < len(ops))]]] = (OP_BREAK, 0, 0)
+    return patched
+
+
+@jit(nopython=True, cache=True)
+def execute_paged_jit(
+    program, pages, page_table, page_count, state, output_buf, max_iterations
+):
+    """JIT-compiled execution on a paged sparse tape.
+
+    Same protocol as execute_jit, but the pointer indexes a virtual tape
+    of len(page_table) * PAGE_SIZE cells. page_table maps a page number
+    to its row in `pages` (-1 if the page was never written); reading an
+    unallocated page yields 0 and the first write takes the next free row.
+    The current page and row are cached, so the table is only consulted
+    when the pointer crosses a page boundary.
 
     Args:
-        program: NumPy array of shape (N, 2) with (op_code, arg) pairs
-        tape: NumPy array — memory tape, modified in-place
+        program: NumPy array of shape (N, 3) with (op_code, arg, arg2)
+        pages: NumPy array of shape (capacity, PAGE_SIZE) — page pool
+        page_table: NumPy int32 array — row of each page, or -1
+        page_count: NumPy array of shape (1,) — rows in use
         state: NumPy array of shape (3,) — [pointer, pc, output_count]
-               Modified in-place to track execution state across segments.
         output_buf: Pre-allocated buffer for output cell values
         max_iterations: Maximum iterations to run in this segment
 
     Returns:
-        (status, iterations) where status is one of STATUS_*
+        (status, iterations); STATUS_PAGE_FAULT means the pool is full and
+        state[1] points at the write that needs a new page.
     """
     pointer = int(state[0])
     pc = int(state[1])
     out_idx = int(state[2])
     iterations = 0
+    limit = len(page_table) << PAGE_SHIFT
+
+    page = pointer >> PAGE_SHIFT
+    row = page_table[page]
+    offset = pointer & PAGE_MASK
 
     while pc < len(program) and iterations < max_iterations:
         op_code = program[pc, 0]
         arg = program[pc, 1]
 
         if op_code == OP_ADD:
-            tape[pointer] = (tape[pointer] + arg) & 0xFF
+            if row < 0:
+                if page_count[0] >= len(pages):
+                    state[0] = pointer
+                    state[1] = pc
+                    state[2] = out_idx
+                    return (STATUS_PAGE_FAULT, iterations)
+                row = page_count[0]
+                page_table[page] = row
+                page_count[0] += 1
+            pages[row, offset] = (pages[row, offset] + arg) & 0xFF
         elif op_code == OP_MOVE:
             new_pointer = pointer + arg
-            if 0 <= new_pointer < len(tape):
+            if 0 <= new_pointer < limit:
                 pointer = new_pointer
+                offset = pointer & PAGE_MASK
+                if pointer >> PAGE_SHIFT != page:
+                    page = pointer >> PAGE_SHIFT
+                    row = page_table[page]
+        elif op_code == OP_ADD_MOVE or op_code == OP_MOVE_ADD:
+            if iterations + 2 > max_iterations:
+                iterations = max_iterations
+                continue
+            if op_code == OP_ADD_MOVE:
+                delta, move = arg, program[pc, 2]
+            else:
+                delta, move = program[pc, 2], arg
+            new_pointer = pointer + move
+            if not 0 <= new_pointer < limit:
+                new_pointer = pointer
+            # the written page must exist before anything is changed, so
+            # a page fault can restart the whole instruction
+            target = pointer if op_code == OP_ADD_MOVE else new_pointer
+            target_row = page_table[target >> PAGE_SHIFT]
+            if target_row < 0:
+                if page_count[0] >= len(pages):
+                    state[0] = pointer
+                    state[1] = pc
+                    state[2] = out_idx
+                    return (STATUS_PAGE_FAULT, iterations)
+                target_row = page_count[0]
+                page_table[target >> PAGE_SHIFT] = target_row
+                page_count[0] += 1
+            target_offset = target & PAGE_MASK
+            pages[target_row, target_offset] = (
+                pages[target_row, target_offset] + delta
+            ) & 0xFF
+            pointer = new_pointer
+            offset = pointer & PAGE_MASK
+            page = pointer >> PAGE_SHIFT
+            row = page_table[page]
+            iterations += 1
+        elif op_code == OP_LINEAR_LOOP:
+            end = pc + 1
+            missing = 0
+            while program[end, 0] == OP_LOOP_TERM:
+                target = pointer + program[end, 1]
+                if 0 <= target < limit and page_table[target >> PAGE_SHIFT] < 0:
+                    missing += 1
+                end += 1
+            if end > pc + 1 and not (
+                0 <= pointer + program[pc + 1, 1]
+                and pointer + program[end - 1, 1] < limit
+            ):
+                # a term leaves the tape: run the loop itself
+                pc = end
+                continue
+            trips = loop_trip_count(pages[row, offset] if row >= 0 else 0, arg)
+            if trips == 0:
+                pc = program[end, 1]
+                iterations += 1
+                continue
+            if trips < 0:
+                state[0] = pointer
+                state[1] = pc
+                state[2] = out_idx
+                return (STATUS_INFINITE_LOOP, iterations)
+            if page_count[0] + missing > len(pages):
+                state[0] = pointer
+                state[1] = pc
+                state[2] = out_idx
+                return (STATUS_PAGE_FAULT, iterations)
+            cost = program[pc, 2] + 2
+            affordable = (max_iterations - iterations) // cost
+            if affordable == 0:
+                iterations = max_iterations
+                continue
+            following = program[end, 1]
+            if affordable < trips:
+                trips = affordable
+                following = pc
+            for term in range(pc + 1, end):
+                target = pointer + program[term, 1]
+                target_row = page_table[target >> PAGE_SHIFT]
+                if target_row < 0:
+                    target_row = page_count[0]
+                    page_table[target >> PAGE_SHIFT] = target_row
+                    page_count[0] += 1
+                target_offset = target & PAGE_MASK
+                pages[target_row, target_offset] = (
+                    pages[target_row, target_offset] + trips * program[term, 2]
+                ) & 0xFF
+            pages[row, offset] = (pages[row, offset] + trips * arg) & 0xFF
+            iterations += trips * cost
+            pc = following
+            continue
+        elif op_code == OP_DELTA_BLOCK:
+            # pages are allocated one write at a time, so paged tapes
+            # always run the original instructions
+            pc += 1
+            while program[pc, 0] == OP_BLOCK_DELTA:
+                pc += 1
+            pc += 1
+            continue
+        elif op_code == OP_OUTPUT_RUN:
+            if iterations + 2 * arg - 1 > max_iterations:
+                iterations = max_iterations
+                continue
+            if out_idx + arg > len(output_buf):
+                state[0] = pointer
+                state[1] = pc
+                state[2] = out_idx
+                return (STATUS_OUTPUT_OVERFLOW, iterations)
+            step = program[pc, 2]
+            for k in range(arg):
+                if k:
+                    new_pointer = pointer + step
+                    if 0 <= new_pointer < limit:
+                        pointer = new_pointer
+                row = page_table[pointer >> PAGE_SHIFT]
+                value = pages[row, pointer & PAGE_MASK] if row >= 0 else 0
+                output_buf[out_idx] = value
+                out_idx += 1
+            offset = pointer & PAGE_MASK
+            page = pointer >> PAGE_SHIFT
+            row = page_table[page]
+            iterations += 2 * arg - 2
+            if out_idx >= len(output_buf):
+                state[0] = pointer
+                state[1] = pc + 1
+                state[2] = out_idx
+                return (STATUS_OUTPUT_OVERFLOW, iterations)
         elif op_code == OP_OUTPUT:
+            value = pages[row, offset] if row >= 0 else 0
             if out_idx < len(output_buf):
-                output_buf[out_idx] = tape[pointer]
+                output_buf[out_idx] = value
             out_idx += 1
             if out_idx >= len(output_buf):
                 state[0] = pointer
@@ -119,12 +973,12 @@ def execute_jit(program, tape, state, output_buf, max_iterations):
             state[2] = out_idx
             return (STATUS_NEED_INPUT, iterations)
         elif op_code == OP_JUMP_ZERO:
-            if tape[pointer] == 0:
+            if row < 0 or pages[row, offset] == 0:
                 pc = arg
                 iterations += 1
                 continue
         elif op_code == OP_JUMP_NZ:
-            if tape[pointer] != 0:
+            if row >= 0 and pages[row, offset] != 0:
                 pc = arg
                 iterations += 1
                 continue
@@ -138,6 +992,11 @@ def execute_jit(program, tape, state, output_buf, max_iterations):
             state[1] = pc
             state[2] = out_idx
             return (STATUS_PRINT_HISTORY, iterations)
+        elif op_code == OP_BREAK:
+            state[0] = pointer
+            state[1] = pc
+            state[2] = out_idx
+            return (STATUS_BREAKPOINT, iterations)
 
         pc += 1
         iterations += 1
@@ -148,124 +1007,1134 @@ def execute_jit(program, tape, state, output_buf, max_iterations):
     return (STATUS_COMPLETE, iterations)
 
 
-@jit(nopython=True)
-def convert_ir_to_numeric_jit(op_codes, args):
+def _execute_segment(
+    program, tape, state, output_buf, max_iterations, kernel=execute_jit
+):
+    """Run one JIT segment on a NumPy tape or a PagedCells tape."""
+    if isinstance(tape, PagedCells):
+        return tape.execute(program, state, output_buf, max_iterations)
+    return kernel(program, tape, state, output_buf, max_iterations)
+
+
+@jit(nopython=True, cache=True)
+def cell_dump_extent(tape, pointer):
+    """Return the first and last tape index a `*` dump shows.
+
+    The dump spans every non-zero cell and the pointer, so the scan
+    stops at the first non-zero cell from each end (or at the pointer).
+
+    Args:
+        tape: NumPy array — memory tape
+        pointer: Tape index of the pointer
+
+    Returns:
+        (first, last) tape indices, inclusive.
+    """
+    first = 0
+    while first < pointer and tape[first] == 0:
+        first += 1
+    last = len(tape) - 1
+    while last > pointer and tape[last] == 0:
+        last -= 1
+    return first, last
+
+
+def format_cells(origin, values, pos):
+    """Render cells the way `*` prints them.
+
+    Args:
+        origin: Cell index of values[0].
+        values: Cell values, spanning every non-zero cell and pos.
+        pos: Cell index of the pointer, shown as |value|.
+
+    Returns:
+        str: The values separated by spaces.
+
+    Examples:
+
+        >>> format_cells(-1, np.array([0, 5, 0]), 0)
+        '0 |5| 0'
+
+    """
+    parts = [str(value) for value in np.asarray(values).tolist()]
+    parts[pos - origin] = '|{}|'.format(parts[pos - origin])
+    return ' '.join(parts)
+
+
+@jit(nopython=True, cache=True)
+def execute_batch_jit(
+    program,
+    tapes,
+    pointers,
+    pcs,
+    inputs,
+    input_lens,
+    input_pos,
+    output_buf,
+    output_counts,
+    iterations,
+    max_iterations,
+):
+    """JIT-compiled lockstep execution of one program over many tapes.
+
+    Every lane shares the same program. At each step the lowest pending
+    program counter is selected and its instruction is applied to all
+    lanes sitting at that counter; the others are masked out until they
+    reconverge. Lanes that diverged at a `jump_zero`/`jump_nz` therefore
+    wait for each other instead of running independently.
+
+    Input is read from the per-lane `inputs` rows (-1 once a lane's input
+    is exhausted). `*` and `&` have no per-lane meaning and are skipped.
+
+    Args:
+        program: NumPy array of shape (N, 3) with (op_code, arg, arg2)
+        tapes: NumPy array of shape (batch, tape_len) — modified in-place
+        pointers: NumPy array of shape (batch,) — tape index per lane
+        pcs: NumPy array of shape (batch,) — program counter per lane
+        inputs: NumPy array of shape (batch, max_input) — input values
+        input_lens: NumPy array of shape (batch,) — valid inputs per lane
+        input_pos: NumPy array of shape (batch,) — next input per lane
+        output_buf: NumPy array of shape (batch, buf_size) — output values
+        output_counts: NumPy array of shape (batch,) — outputs per lane
+        iterations: NumPy array of shape (batch,) — iterations per lane
+        max_iterations: Maximum iterations per lane
+
+    Returns:
+        STATUS_COMPLETE when every lane finished or ran out of iterations,
+        STATUS_OUTPUT_OVERFLOW when a lane's output buffer is full.
+    """
+    n_lanes = tapes.shape[0]
+    tape_len = tapes.shape[1]
+    n_ops = len(program)
+    buf_size = output_buf.shape[1]
+
+    while True:
+        pc = n_ops
+        for lane in range(n_lanes):
+            if pcs[lane] < pc and iterations[lane] < max_iterations:
+                pc = pcs[lane]
+        if pc >= n_ops:
+            return STATUS_COMPLETE
+
+        op_code = program[pc, 0]
+        arg = program[pc, 1]
+
+        for lane in range(n_lanes):
+            if pcs[lane] != pc or iterations[lane] >= max_iterations:
+                continue
+            pointer = pointers[lane]
+            next_pc = pc + 1
+
+            if op_code == OP_ADD:
+                tapes[lane, pointer] = (tapes[lane, pointer] + arg) & 0xFF
+            elif op_code == OP_MOVE:
+                new_pointer = pointer + arg
+                if 0 <= new_pointer < tape_len:
+                    pointers[lane] = new_pointer
+            elif op_code == OP_OUTPUT:
+                if output_counts[lane] >= buf_size:
+                    return STATUS_OUTPUT_OVERFLOW
+                output_buf[lane, output_counts[lane]] = tapes[lane, pointer]
+                output_counts[lane] += 1
+            elif op_code == OP_INPUT:
+                if input_pos[lane] < input_lens[lane]:
+                    tapes[lane, pointer] = inputs[lane, input_pos[lane]]
+                    input_pos[lane] += 1
+                else:
+                    tapes[lane, pointer] = -1
+            elif op_code == OP_JUMP_ZERO:
+                if tapes[lane, pointer] == 0:
+                    next_pc = arg
+            elif op_code == OP_JUMP_NZ:
+                if tapes[lane, pointer] != 0:
+                    next_pc = arg
+
+            pcs[lane] = next_pc
+            iterations[lane] += 1
+
+
+@jit(nopython=True, cache=True)
+def convert_ir_to_numeric_jit(op_codes, args, args2):
     """Convert parallel arrays to numeric format for JIT compilation."""
-    program = np.empty((len(op_codes), 2), dtype=np.int32)
+    program = np.empty((len(op_codes), 3), dtype=np.int32)
 
     for i in range(len(op_codes)):
         program[i, 0] = op_codes[i]
         program[i, 1] = args[i]
+        program[i, 2] = args2[i]
 
     return program
 
 
-def convert_ir_to_numeric(ir_list):
-    """Convert IR tuples to numeric format for JIT compilation."""
-    if not ir_list:
-        return np.empty((0, 2), dtype=np.int32)
+_IR_OP_CODES = {
+    'add': OP_ADD,
+    'move': OP_MOVE,
+    'output': OP_OUTPUT,
+    'input': OP_INPUT,
+    'jump_zero': OP_JUMP_ZERO,
+    'jump_nz': OP_JUMP_NZ,
+    'print_cells': OP_PRINT_CELLS,
+    'print_history': OP_PRINT_HISTORY,
+    'add_move': OP_ADD_MOVE,
+    'move_add': OP_MOVE_ADD,
+    'output_run': OP_OUTPUT_RUN,
+    'linear_loop': OP_LINEAR_LOOP,
+    'loop_term': OP_LOOP_TERM,
+    'delta_block': OP_DELTA_BLOCK,
+    'block_delta': OP_BLOCK_DELTA,
+    'block_end': OP_BLOCK_END,
+    'break': OP_BREAK,
+}
+_IR_OP_NAMES = {code: name for name, code in _IR_OP_CODES.items()}
+_IR_OP_ARITY = dict.fromkeys(_IR_OP_CODES, 1)
+_IR_OP_ARITY.update(dict.fromkeys(
+    ('output', 'input', 'print_cells', 'print_history', 'break'), 0
+))
+_IR_OP_ARITY.update(dict.fromkeys(
+    ('add_move', 'move_add', 'output_run', 'linear_loop', 'loop_term',
+     'delta_block', 'block_delta'),
+    2,
+))
+
+# Compiler IR: one row per instruction with its op code, operands (as in
+# the numeric program) and the source position of its first command.
+# Passes rewrite these arrays in place; ir_tuples() gives the readable
+# ('add', 3) form on demand
+IR_DTYPE = np.dtype([
+    ('op', np.int32),
+    ('arg', np.int32),
+    ('arg2', np.int32),
+    ('pos', np.int32),
+])
+
+# Op code and operand of every command character (-1: not a command);
+# the operands of `[` and `]` stay -1 until their jumps are linked
+_LEX_OPS = np.full(128, -1, dtype=np.int32)
+_LEX_ARGS = np.zeros(128, dtype=np.int32)
+for _char, _op, _arg in (
+    ('+', OP_ADD, 1),
+    ('-', OP_ADD, -1),
+    ('>', OP_MOVE, 1),
+    ('<', OP_MOVE, -1),
+    ('.', OP_OUTPUT, 0),
+    (',', OP_INPUT, 0),
+    ('[', OP_JUMP_ZERO, -1),
+    (']', OP_JUMP_NZ, -1),
+    ('*', OP_PRINT_CELLS, 0),
+    ('&', OP_PRINT_HISTORY, 0),
+):
+    _LEX_OPS[ord(_char)] = _op
+    _LEX_ARGS[ord(_char)] = _arg
+del _char, _op, _arg
+
+
+def lex_ir(cmd_line):
+    """Compile BrainFuck commands to an IR array.
+
+    Runs of the same `+`, `-`, `>` or `<` become one add or move, other
+    characters than commands are dropped and matching jumps are linked.
+    Everything is done with array operations except the jump linking,
+    which visits the brackets only.
 
-    op_codes = np.empty(len(ir_list), dtype=np.int32)
-    args = np.empty(len(ir_list), dtype=np.int32)
+    Args:
+        cmd_line: BrainFuck commands (imports should already be resolved).
 
-    op_map = {
-        'add': OP_ADD,
-        'move': OP_MOVE,
-        'output': OP_OUTPUT,
-        'input': OP_INPUT,
-        'jump_zero': OP_JUMP_ZERO,
-        'jump_nz': OP_JUMP_NZ,
-        'print_cells': OP_PRINT_CELLS,
-        'print_history': OP_PRINT_HISTORY,
-    }
+    Returns:
+        An IR_DTYPE array whose 'pos' is the index in cmd_line of the
+        first command of every instruction.
 
-    for i, ir_op in enumerate(ir_list):
-        op_name = ir_op[0]
-        arg = ir_op[1] if len(ir_op) > 1 else 0
+    Examples:
 
-        op_codes[i] = op_map.get(op_name, 0)
-        args[i] = arg
+        >>> ir_tuples(lex_ir('++[-]>'))
+        [('add', 2), ('jump_zero', 4), ('add', -1), ('jump_nz', 1), ('move', 1)]
+        >>> lex_ir('a+ b+-')['pos'].tolist()
+        [1, 5]
 
-    return convert_ir_to_numeric_jit(op_codes, args)
+    """
+    chars = np.frombuffer(cmd_line.encode('utf-32-le'), dtype=np.uint32)
+    codes = _LEX_OPS[np.minimum(chars, 127)]
+    indices = np.flatnonzero(codes >= 0)
+    chars, codes = chars[indices], codes[indices]
 
+    starts = np.ones(len(codes), dtype=bool)
+    starts[1:] = (chars[1:] != chars[:-1]) | (codes[1:] > OP_MOVE)
+    starts = np.flatnonzero(starts)
 
-class BrainFuck:
-    """BrainFuck language specification.
+    ir = np.zeros(len(starts), dtype=IR_DTYPE)
+    ir['op'] = codes[starts]
+    if len(starts):
+        ir['arg'] = np.add.reduceat(_LEX_ARGS[chars], starts)
+    ir['pos'] = indices[starts]
+    return _link_jumps(ir)
 
-    This class implements all commands of the BrainFuck language and
-    some advanced functions.
 
-    This class also implements a full featured interpreter.
+def ir_array(ir_list, positions=None):
+    """Convert IR tuples to an IR array.
 
-    You can run from python code or shell.
+    Args:
+        ir_list: List of IR tuples.
+        positions: Source position of every op, or None for its index.
+    """
+    ir = np.zeros(len(ir_list), dtype=IR_DTYPE)
+    if ir_list:
+        ir['op'] = [_IR_OP_CODES.get(op[0], 0) for op in ir_list]
+        ir['arg'] = [op[1] if len(op) > 1 else 0 for op in ir_list]
+        ir['arg2'] = [op[2] if len(op) > 2 else 0 for op in ir_list]
+    ir['pos'] = np.arange(len(ir_list)) if positions is None else positions
+    return ir
 
-    Attributes:
-        cells (Cells): Advanced structure to handle the language registers.
-        pointer (int): Pointer to current cell position.
-        _cmd_parts (list): List of command strings executed so far.
-        _pc (int): Program counter for the compiled instruction pointer.
 
-    """
+def ir_tuples(ir):
+    """Return the IR tuples of an IR array, for reading and debugging.
 
-    def __init__(self):
-        self.cells = Cells()
-        self.pointer = 0
-        self._cmd_parts = []
-        self._pc = 0
+    Examples:
 
-    def _print_value(self, output_file=None):
-        value = self.cells[self.pointer]
-        if not value:
-            print(file=output_file)
-        elif value > 0 and value < 256:
-            print(chr(value), end="", file=output_file)
-        else:
-            print(value, end="", file=output_file)
+        >>> ir_tuples(ir_array([('add', 2), ('output',), ('add_move', 1, -1)]))
+        [('add', 2), ('output',), ('add_move', 1, -1)]
 
-    def _read_value(self):
-        try:
-            while True:
-                ui = input('<< ')
-                if not ui:
-                    break
-                try:
-                    self.cells[self.pointer] = int(ui)
-                    break
-                except (ValueError, TypeError):
-                    pass
-                try:
-                    self.cells[self.pointer] = ord(ui[0])
-                    break
-                except (ValueError, TypeError):
-                    print("Invalid value! Please try again:")
-        except EOFError:
-            self.cells[self.pointer] = -1
+    """
+    return convert_numeric_to_ir(
+        zip(ir['op'].tolist(), ir['arg'].tolist(), ir['arg2'].tolist())
+    )
 
-    @staticmethod
-    def _read_input_direct():
-        try:
-            while True:
-                ui = input('<< ')
-                if not ui:
-                    return None
-                try:
-                    return int(ui)
-                except (ValueError, TypeError):
-                    pass
-                try:
-                    return ord(ui[0])
-                except (ValueError, TypeError):
-                    print("Invalid value! Please try again:")
-        except EOFError:
-            return -1
 
-    def print_cells(self):
-        """Print all cells."""
-        print(self.cells.print_pos(self.pointer))
+def convert_ir_to_numeric(ir):
+    """Convert IR to the numeric program run by the JIT kernels.
+
+    Args:
+        ir: An IR array, or a list of IR tuples.
+
+    Returns:
+        int32 array of shape (N, 3) with (op_code, arg, arg2) rows.
+    """
+    if not isinstance(ir, np.ndarray):
+        ir = ir_array(ir)
+    return convert_ir_to_numeric_jit(ir['op'], ir['arg'], ir['arg2'])
+
+
+def convert_numeric_to_ir(numeric_program):
+    """Convert a numeric program back to IR tuples.
+
+    Examples:
+
+        >>> convert_numeric_to_ir(convert_ir_to_numeric(
+        ...     [('add', 2), ('output',), ('add_move', 1, -1)]))
+        [('add', 2), ('output',), ('add_move', 1, -1)]
+
+    """
+    if isinstance(numeric_program, np.ndarray):
+        numeric_program = numeric_program.tolist()
+    ir = []
+    for op, arg, arg2 in numeric_program:
+        name = _IR_OP_NAMES[op]
+        ir.append((name, arg, arg2)[:_IR_OP_ARITY[name] + 1])
+    return ir
+
+
+def _accepts_tuples(run_pass):
+    """Let a pass over IR arrays also take and return lists of IR tuples.
+
+    A list is converted with ir_array() and the tuples of the result are
+    returned; `origins`, if given, then receives for every returned op
+    the index of the input op it was made from (see optimize_ir).
+    """
+
+    @functools.wraps(run_pass)
+    def wrapper(ir, *args, origins=None, **kwargs):
+        if isinstance(ir, np.ndarray):
+            return run_pass(ir, *args, **kwargs)
+        result = run_pass(ir_array(ir), *args, **kwargs)
+        if origins is not None:
+            origins.extend(result['pos'].tolist())
+        return ir_tuples(result)
+
+    return wrapper
+
+
+def _compact(ir, keep):
+    """Move the rows of ir selected by keep to its front, in place.
+
+    Returns:
+        The view of ir holding the kept rows.
+    """
+    rows = np.flatnonzero(keep)
+    ir[:len(rows)] = ir[rows]
+    return ir[:len(rows)]
+
+
+def _link_jumps(ir):
+    """Point every jump_zero/jump_nz pair at each other, in place."""
+    brackets = np.flatnonzero((ir['op'] == OP_JUMP_ZERO) | (ir['op'] == OP_JUMP_NZ))
+    args = ir['arg']
+    stack = []
+    for i, op in zip(brackets.tolist(), ir['op'][brackets].tolist()):
+        if op == OP_JUMP_ZERO:
+            stack.append(i)
+        elif stack:
+            start = stack.pop()
+            args[start] = i + 1
+            args[i] = start
+    return ir
+
+
+def _insert_rows(ir, inserted, rows):
+    """Return a new IR array with summary rows inserted into ir.
+
+    Args:
+        ir: IR array.
+        inserted: Number of rows to insert in front of each row of ir.
+        rows: The (op, arg, arg2) rows to insert, in order; they
+            originate from the row they are inserted in front of.
+    """
+    if not rows:
+        return ir
+    # every row moves down by the rows inserted up to it, and the
+    # inserted rows fill the gaps this leaves
+    shift = np.cumsum(inserted)
+    result = np.empty(len(ir) + len(rows), dtype=IR_DTYPE)
+    moved = np.arange(len(ir)) + shift
+    result[moved] = ir
+    gaps = np.ones(len(result), dtype=bool)
+    gaps[moved] = False
+    summary = np.array(rows, dtype=np.int32).reshape(-1, 3)
+    result['op'][gaps] = summary[:, 0]
+    result['arg'][gaps] = summary[:, 1]
+    result['arg2'][gaps] = summary[:, 2]
+    starts = np.flatnonzero(inserted)
+    result['pos'][gaps] = np.repeat(ir['pos'][starts], inserted[starts])
+    return result
+
+
+def _fuse_pairs(ir, first, second, fused):
+    """Replace every `first` op directly followed by `second` by one op."""
+    ops = ir['op']
+    # first != second, so pairs never overlap
+    pairs = np.flatnonzero((ops[:-1] == first) & (ops[1:] == second))
+    ir['arg2'][pairs] = ir['arg'][pairs + 1]
+    ops[pairs] = fused
+    keep = np.ones(len(ir), dtype=bool)
+    keep[pairs + 1] = False
+    return _compact(ir, keep)
+
+
+@_accepts_tuples
+def fuse_output_runs(ir):
+    """Fuse `.>.>.` style runs into ('output_run', count, step).
+
+    A run is an output followed by up to OUTPUT_RUN_MAX - 1 pairs of the
+    same move and another output.
+    """
+    ops = ir['op'].tolist()
+    args = ir['arg'].tolist()
+    keep = np.ones(len(ops), dtype=bool)
+    i = 0
+    while i < len(ops):
+        if (
+            ops[i] == OP_OUTPUT
+            and i + 2 < len(ops)
+            and ops[i + 1] == OP_MOVE
+            and ops[i + 2] == OP_OUTPUT
+        ):
+            step = args[i + 1]
+            count, end = 2, i + 3
+            while (
+                count < OUTPUT_RUN_MAX
+                and end + 1 < len(ops)
+                and ops[end] == OP_MOVE
+                and args[end] == step
+                and ops[end + 1] == OP_OUTPUT
+            ):
+                count, end = count + 1, end + 2
+            ir[i] = (OP_OUTPUT_RUN, count, step, ir['pos'][i])
+            keep[i + 1:end] = False
+            i = end
+        else:
+            i += 1
+    return _compact(ir, keep)
+
+
+@_accepts_tuples
+def eliminate_dead_loops(ir, entry_zero=False):
+    """Remove loops that start on a cell known to be zero.
+
+    A forward pass tracks the values of cells relative to the pointer
+    while they are known: the cell under the pointer is zero right after
+    any `]`, adds and moves keep the bookkeeping exact, and `,` or the
+    body of a live loop make cells unknown again. A loop entered on a
+    known-zero cell never runs, so it is dropped together with its body,
+    e.g. a `[...]` right after `[-]` or another loop, or with entry_zero
+    a leading `[comment]` loop. The dropped loop no longer costs its one
+    skipped instruction.
+
+    Args:
+        ir: IR array, or list of IR tuples (see _accepts_tuples).
+        entry_zero: Whether every cell is known to be zero at the start.
+
+    Returns:
+        The IR without dead loops; jump targets are left stale.
+
+    Examples:
+
+        >>> eliminate_dead_loops([('jump_zero', 2), ('output',),
+        ...                       ('jump_nz', 0), ('add', 1)], entry_zero=True)
+        [('add', 1)]
+        >>> eliminate_dead_loops([('jump_zero', 3), ('add', -1),
+        ...                       ('jump_nz', 0), ('jump_zero', 5),
+        ...                       ('input',), ('jump_nz', 3)])
+        [('jump_zero', 3), ('add', -1), ('jump_nz', 0)]
+
+    """
+    ops = ir['op'].tolist()
+    args = ir['arg'].tolist()
+    keep = np.zeros(len(ops), dtype=bool)
+    known = {}
+    default = 0 if entry_zero else None
+    position = 0
+    i = 0
+    while i < len(ops):
+        op = ops[i]
+        if op == OP_JUMP_ZERO and known.get(position, default) == 0:
+            depth = 1
+            while depth:
+                i += 1
+                if ops[i] == OP_JUMP_ZERO:
+                    depth += 1
+                elif ops[i] == OP_JUMP_NZ:
+                    depth -= 1
+            i += 1
+            continue
+
+        keep[i] = True
+        if op == OP_ADD:
+            value = known.get(position, default)
+            if value is not None:
+                known[position] = (value + args[i]) % 256
+        elif op == OP_MOVE:
+            position += args[i]
+        elif op == OP_INPUT:
+            known[position] = None
+        elif op == OP_JUMP_ZERO:
+            known, default, position = {}, None, 0
+        elif op == OP_JUMP_NZ:
+            known, default, position = {0: 0}, None, 0
+        i += 1
+    return _compact(ir, keep)
+
+
+@_accepts_tuples
+def fold_linear_loops(ir):
+    """Summarize innermost add/move loops with a net move of zero.
+
+    Such a loop adds a constant step to its control cell and constant
+    deltas to cells at fixed offsets on every trip, so it is preceded by
+    ('linear_loop', step, body_length) and one ('loop_term', offset,
+    delta) per other changed cell in offset order; the kernels solve the
+    trip count with loop_trip_count(), apply the scaled deltas at once
+    and jump over the loop. They only run the loop itself, which is
+    kept, when a term would leave the tape. This covers clear loops
+    (`[-]`), copy and multiply loops (`[->+<]`) and loops with any step
+    (`[--]`, `[---->+<]`). The summary rows originate from the loop's
+    jump_zero and jump targets are left stale. As the IR grows, this
+    pass returns a new array.
+
+    Examples:
+
+        >>> fold_linear_loops([('jump_zero', 5), ('add', -1), ('move', 2),
+        ...                    ('add', 3), ('move', -2), ('jump_nz', 0)])
+        ... # doctest: +NORMALIZE_WHITESPACE
+        [('linear_loop', -1, 4), ('loop_term', 2, 3), ('jump_zero', 5),
+         ('add', -1), ('move', 2), ('add', 3), ('move', -2), ('jump_nz', 0)]
+
+    """
+    ops = ir['op'].tolist()
+    args = ir['arg'].tolist()
+    inserted = np.zeros(len(ops), dtype=np.int64)
+    rows = []
+    for i, op in enumerate(ops):
+        if op != OP_JUMP_NZ:
+            continue
+
+        # any nested loop stops this scan
+        start = i - 1
+        while start >= 0 and ops[start] in (OP_ADD, OP_MOVE):
+            start -= 1
+        if start < 0 or ops[start] != OP_JUMP_ZERO:
+            continue
+
+        offset = 0
+        deltas = {}
+        for body_op in range(start + 1, i):
+            if ops[body_op] == OP_ADD:
+                deltas[offset] = deltas.get(offset, 0) + args[body_op]
+            else:
+                offset += args[body_op]
+        if offset:
+            continue
+
+        step = deltas.pop(0, 0)
+        terms = [(key, delta) for key, delta in sorted(deltas.items()) if delta % 256]
+        inserted[start] = 1 + len(terms)
+        rows += [(OP_LINEAR_LOOP, step, i - start - 1)]
+        rows += [(OP_LOOP_TERM, key, delta) for key, delta in terms]
+    return _insert_rows(ir, inserted, rows)
+
+
+@_accepts_tuples
+def fuse_add_move(ir):
+    """Fuse `+>` into ('add_move', delta, offset)."""
+    return _fuse_pairs(ir, OP_ADD, OP_MOVE, OP_ADD_MOVE)
+
+
+@_accepts_tuples
+def fuse_move_add(ir):
+    """Fuse `>+` into ('move_add', offset, delta)."""
+    return _fuse_pairs(ir, OP_MOVE, OP_ADD, OP_MOVE_ADD)
+
+
+def _fused_cost(op):
+    """Return how many instructions a fused op tuple stands for."""
+    if op[0] == 'output_run':
+        return 2 * op[1] - 1
+    return 2
+
+
+# Instructions each op of a straight-line block stands for, by op code
+# (0: the op ends a block)
+_BLOCK_COSTS = np.zeros(len(_IR_OP_CODES), dtype=np.int64)
+_BLOCK_COSTS[[OP_ADD, OP_MOVE, OP_ADD_MOVE, OP_MOVE_ADD]] = [1, 1, 2, 2]
+
+
+def _delta_block(ops, args, args2, cost):
+    """Return the summary rows (op, arg, arg2) of a straight-line run."""
+    offset = low = high = 0
+    deltas = {}
+    for op, arg, arg2 in zip(ops, args, args2):
+        if op == OP_MOVE or op == OP_MOVE_ADD:
+            offset += arg
+        if op != OP_MOVE:
+            delta = arg2 if op == OP_MOVE_ADD else arg
+            deltas[offset] = deltas.get(offset, 0) + delta
+        if op == OP_ADD_MOVE:
+            offset += arg2
+        low, high = min(low, offset), max(high, offset)
+
+    # an add wraps its cell even when the deltas cancel out (a -1 left by
+    # `,` at EOF becomes 255), so such cells get a delta of 256; 0 marks
+    # the window ends no add touches
+    rows = {key: delta or 256 for key, delta in deltas.items()}
+    rows.setdefault(low, 0)
+    rows.setdefault(high, 0)
+    return (
+        [(OP_DELTA_BLOCK, cost, offset)]
+        + [(OP_BLOCK_DELTA, key, rows[key]) for key in sorted(rows)]
+        + [(OP_BLOCK_END, len(ops), 0)]
+    )
+
+
+@_accepts_tuples
+def summarize_delta_blocks(ir):
+    """Summarize straight-line add/move runs as delta vectors.
+
+    A run of at least DELTA_BLOCK_MIN add, move, add_move and move_add
+    ops adds fixed deltas to a fixed window of cells around the pointer
+    and then shifts it by a net move. The run is kept but preceded by
+    ('delta_block', cost, net_move), one ('block_delta', offset, delta)
+    per cell the run adds to in offset order, with zero-delta rows
+    marking the window ends when needed, and ('block_end', length).
+    Kernels apply the nonzero deltas in one loop, wrapping their cells
+    exactly as the adds would, and jump over the run; they only fall
+    back to its `length` instructions when the window leaves the tape or
+    the budget ends inside the block. cost is the instruction count of the
+    run, so MAX_RECURSION budgets are unchanged. The summary rows
+    originate from the run's first op. As the IR grows, this pass
+    returns a new array.
+
+    Examples:
+
+        >>> summarize_delta_blocks([('add', 3), ('move', 2), ('add', -1),
+        ...                         ('move', -1), ('output',)])
+        ... # doctest: +NORMALIZE_WHITESPACE
+        [('delta_block', 4, 1), ('block_delta', 0, 3), ('block_delta', 2, -1),
+         ('block_end', 4), ('add', 3), ('move', 2), ('add', -1), ('move', -1),
+         ('output',)]
+
+    """
+    costs = _BLOCK_COSTS[ir['op']]
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], costs > 0, [0]))))
+    runs = [
+        (start, end)
+        for start, end in zip(edges[0::2].tolist(), edges[1::2].tolist())
+        if end - start >= DELTA_BLOCK_MIN
+    ]
+    if not runs:
+        return ir
+
+    ops, args, args2 = (ir[field].tolist() for field in ('op', 'arg', 'arg2'))
+    rows = []
+    inserted = np.zeros(len(ir), dtype=np.int64)
+    for start, end in runs:
+        block = _delta_block(
+            ops[start:end],
+            args[start:end],
+            args2[start:end],
+            int(costs[start:end].sum()),
+        )
+        inserted[start] = len(block)
+        rows += block
+    return _insert_rows(ir, inserted, rows)
+
+
+def block_window(ir_list, pc):
+    """Return the delta vector of the delta_block at pc.
+
+    Returns:
+        (end, low, deltas): the pc of its block_end row, the offset of
+        the first window cell and an int64 array with the delta of every
+        window cell.
+    """
+    end = pc + 1
+    while ir_list[end][0] == 'block_delta':
+        end += 1
+    low = ir_list[pc + 1][1]
+    deltas = np.zeros(ir_list[end - 1][1] - low + 1, dtype=np.int64)
+    for row in ir_list[pc + 1:end]:
+        deltas[row[1] - low] = row[2]
+    return end, low, deltas
+
+
+# Peephole passes run by optimize_ir, in order; each maps an IR array to
+# the optimized one, reusing its rows where the IR does not grow, and may
+# leave jump targets stale. Every output row keeps the 'pos' of the input
+# row it was made from (the first one of a fused group)
+PEEPHOLE_PASSES = (
+    ('dead_loop', eliminate_dead_loops),
+    ('linear_loop', fold_linear_loops),
+    ('output_run', fuse_output_runs),
+    ('add_move', fuse_add_move),
+    ('move_add', fuse_move_add),
+    ('delta_block', summarize_delta_blocks),
+)
+
+
+def optimize_ir(ir, passes=None, entry_zero=False, positions=None):
+    """Run the enabled PEEPHOLE_PASSES over an IR.
+
+    Args:
+        ir: IR array, optimized in place, or a list of IR tuples (not
+            modified).
+        passes: Names of the passes to run, or None for all of them.
+        entry_zero: Whether every cell is zero when the program starts
+            (see eliminate_dead_loops).
+        positions: With a list of tuples, an optional list with the
+            source position of every op; it is updated in place to
+            follow the optimized IR, each op taking the position of the
+            first op it was made from. IR arrays carry them in 'pos'.
+
+    Returns:
+        (ir, removed): the optimized IR with its jumps linked, in the
+        form it was given, and a dict with the number of instructions
+        each pass that ran removed (for linear_loop and delta_block,
+        which keep the code they summarize, the number of instructions
+        the summaries skip).
+
+    Examples:
+
+        >>> ir, removed = optimize_ir([('add', 2), ('move', 1), ('output',),
+        ...                            ('move', 1), ('output',)])
+        >>> ir
+        [('add_move', 2, 1), ('output_run', 2, 1)]
+        >>> removed['output_run'], removed['add_move'], removed['move_add']
+        (2, 1, 0)
+        >>> optimize_ir([('jump_zero', 4), ('add', -4), ('move', 1),
+        ...              ('add', 1), ('move', -1), ('jump_nz', 0)])[0]
+        ... # doctest: +NORMALIZE_WHITESPACE
+        [('linear_loop', -4, 4), ('loop_term', 1, 1), ('jump_zero', 6),
+         ('add_move', -4, 1), ('add_move', 1, -1), ('jump_nz', 2)]
+
+    """
+    tuples = not isinstance(ir, np.ndarray)
+    if tuples:
+        ir = ir_array(ir, positions)
+    removed = {}
+    for name, run_pass in PEEPHOLE_PASSES:
+        if passes is not None and name not in passes:
+            continue
+        before = len(ir)
+        if run_pass is eliminate_dead_loops:
+            ir = run_pass(ir, entry_zero)
+        else:
+            ir = run_pass(ir)
+        if run_pass is summarize_delta_blocks:
+            lengths = ir['arg'][ir['op'] == OP_BLOCK_END]
+            removed[name] = int((lengths - 1).sum())
+        elif run_pass is fold_linear_loops:
+            # each kept loop of body_length + 2 rows is skipped in favour
+            # of its header and terms
+            lengths = ir['arg2'][ir['op'] == OP_LINEAR_LOOP]
+            terms = ir['op'] == OP_LOOP_TERM
+            removed[name] = int((lengths + 1).sum() - terms.sum())
+        else:
+            removed[name] = before - len(ir)
+    ir = _link_jumps(ir)
+    if not tuples:
+        return ir, removed
+    if positions is not None:
+        positions[:] = ir['pos'].tolist()
+    return ir_tuples(ir), removed
+
+
+def analyze_pointer_range(ir):
+    """Compute the pointer offsets a program can reach.
+
+    Offsets are relative to the pointer at the start of the program. A
+    loop whose body moves the pointer by a net zero starts every
+    iteration at the same offset, so one pass over its body covers all
+    iterations; a loop with any other net movement can drift arbitrarily
+    far and makes the range unbounded.
+
+    Args:
+        ir: IR array or list of IR tuples.
+
+    Returns:
+        (min_offset, max_offset), or None if the range is unbounded.
+
+    Examples:
+
+        >>> analyze_pointer_range([('move', 2), ('jump_zero', 5),
+        ...                        ('move', -3), ('add', 1), ('move', 3),
+        ...                        ('jump_nz', 1)])
+        (-1, 2)
+        >>> analyze_pointer_range([('jump_zero', 2), ('move', 1),
+        ...                        ('jump_nz', 0)]) is None
+        True
+
+    """
+    if not isinstance(ir, np.ndarray):
+        ir = ir_array(ir)
+    offset = low = high = 0
+    loop_starts = []
+    for op, arg, arg2 in zip(
+        ir['op'].tolist(), ir['arg'].tolist(), ir['arg2'].tolist()
+    ):
+        if op in (OP_MOVE, OP_MOVE_ADD, OP_ADD_MOVE, OP_OUTPUT_RUN):
+            if op == OP_MOVE or op == OP_MOVE_ADD:
+                offset += arg
+            elif op == OP_ADD_MOVE:
+                offset += arg2
+            else:
+                offset += (arg - 1) * arg2
+            low = min(low, offset)
+            high = max(high, offset)
+        elif op == OP_LOOP_TERM:
+            low = min(low, offset + arg)
+            high = max(high, offset + arg)
+        elif op == OP_JUMP_ZERO:
+            loop_starts.append(offset)
+        elif op == OP_JUMP_NZ:
+            if loop_starts.pop() != offset:
+                return None
+    return low, high
+
+
+def evaluate_prefix(
+    numeric_program, max_steps=PREFIX_EVAL_STEPS, deadline=None, cancel=None
+):
+    """Partially evaluate a program from an all-zero tape.
+
+    The program runs on a scratch tape until its first `,`, `*` or `&`,
+    its end or max_steps, exactly as execute_jit would run it from a
+    fresh tape with the pointer at cell 0. With a deadline or
+    cancellation token, it runs in slices of SLICE_ITERATIONS and gives
+    up once either fires.
+
+    Args:
+        numeric_program: NumPy array of (op_code, arg, arg2) rows.
+        max_steps: Maximum number of steps to evaluate.
+        deadline: time.monotonic() value after which to give up, or None.
+        cancel: Object whose is_set() returns True to give up, or None.
+
+    Returns:
+        dict with the 'pc' to continue from, the 'pointer', the 'steps'
+        taken, the rendered 'output' and the resulting cells as 'origin'
+        and 'tape' (see Cells.to_array), or None if no step could be
+        evaluated or the evaluation gave up.
+    """
+    tape_center = TAPE_SIZE // 2
+    tape = np.zeros(TAPE_SIZE, dtype=np.int32)
+    state = np.array([tape_center, 0, 0], dtype=np.int64)
+    output_buf = np.empty(OUTPUT_BUF_SIZE, dtype=np.int32)
+
+    outputs = []
+    steps = 0
+    sliced = deadline is not None or cancel is not None
+    while steps < max_steps:
+        if cancel is not None and cancel.is_set():
+            return None
+        if deadline is not None and time.monotonic() >= deadline:
+            return None
+        budget = max_steps - steps
+        if sliced:
+            budget = min(budget, SLICE_ITERATIONS)
+        status, iters = execute_jit(numeric_program, tape, state, output_buf, budget)
+        steps += iters
+        outputs.append(BrainFuck._render_outputs(output_buf[:state[2]]))
+        state[2] = 0
+        # a slice used up its budget when it stops short of the end
+        sliced_out = status == STATUS_COMPLETE and state[1] < len(numeric_program)
+        if status != STATUS_OUTPUT_OVERFLOW and not sliced_out:
+            break
+
+    if not state[1]:
+        return None
+
+    nonzero = np.flatnonzero(tape)
+    if len(nonzero):
+        lo, hi = int(nonzero[0]), int(nonzero[-1]) + 1
+        origin, values = lo - tape_center, tape[lo:hi].copy()
+    else:
+        origin, values = 0, np.zeros(0, dtype=np.int32)
+
+    return {
+        'pc': int(state[1]),
+        'pointer': int(state[0]) - tape_center,
+        'steps': steps,
+        'output': ''.join(outputs),
+        'origin': origin,
+        'tape': values,
+    }
+
+
+class JitWarmUp:
+    """Compile the JIT kernels on a background thread.
+
+    Numba compiles a kernel, or loads it from its on-disk cache, on its
+    first call, and the first call of all also sets up Numba itself,
+    which makes the first command of a session wait for a fraction of a
+    second (several seconds without a cache). The warm-up makes these
+    first calls on a small program while the REPL shows its prompt or
+    the CLI reads and compiles its source file, and BrainFuck runs wait
+    for it before they need the kernels. The kernels of breakpoints,
+    watchpoints and profiling are left to compile on first use.
+
+    Attributes:
+        thread (threading.Thread): The thread compiling the kernels.
+        seconds (float): Time the warm-up took, or None while it runs.
+        blocked (float): Time the first run waited for it, or None until
+            a run waited.
+    """
+
+    def __init__(self):
+        self.seconds = None
+        self.blocked = None
+        self.thread = threading.Thread(target=self._compile, name='jit-warm-up')
+
+    def _compile(self):
+        start = time.perf_counter()
+        try:
+            ir, _ = optimize_ir(lex_ir('+[->+<]>.*'))
+            program = convert_ir_to_numeric(ir)
+            output_buf = np.zeros(1, dtype=np.int32)
+            for kernel in (execute_jit, execute_unchecked_jit):
+                tape = np.zeros(4, dtype=np.int32)
+                state = np.array([1, 0, 0], dtype=np.int64)
+                kernel(program, tape, state, output_buf, 100)
+                cell_dump_extent(tape, 1)
+                instruction_cost(program, 1, 1)
+            PagedCells().execute(
+                program, np.zeros(3, dtype=np.int64), output_buf, 100
+            )
+        except Exception:
+            # runs fall back to the interpreter on the same error
+            pass
+        finally:
+            self.seconds = time.perf_counter() - start
+
+    def start(self):
+        """Start compiling and return self."""
+        self.thread.start()
+        return self
+
+    def wait(self):
+        """Block until the kernels are compiled.
+
+        Returns:
+            For the first call, stats of the warm-up: the time it took
+            ('warm_up') and the part of it the run did not wait for
+            ('warm_up_saved'); None for later calls.
+        """
+        start = time.perf_counter()
+        self.thread.join()
+        if self.blocked is not None:
+            return None
+        self.blocked = time.perf_counter() - start
+        return {
+            'warm_up': '{:.3f}s'.format(self.seconds),
+            'warm_up_saved': '{:.3f}s'.format(max(self.seconds - self.blocked, 0)),
+        }
+
+
+def start_warm_up():
+    """Start the JitWarmUp of this process unless it already started.
+
+    Returns:
+        The JitWarmUp, or None without Numba (nothing to compile).
+    """
+    global _jit_warm_up
+    if _jit_warm_up is None and HAVE_NUMBA:
+        _jit_warm_up = JitWarmUp().start()
+    return _jit_warm_up
+
+
+class BrainFuck:
+    """BrainFuck language specification.
+
+    This class implements all commands of the BrainFuck language and
+    some advanced functions.
+
+    This class also implements a full featured interpreter.
+
+    You can run from python code or shell.
+
+    Attributes:
+        cells (Cells): Advanced structure to handle the language registers.
+        pointer (int): Pointer to current cell position.
+        history (CommandHistory): Commands executed so far, printed by
+            `&`.
+        _pc (int): Program counter for the compiled instruction pointer.
+        _suspended (tuple): (numeric_program, ir_program, pc, read_input)
+            of a run stopped by a timeout, cancellation or MAX_RECURSION,
+            or None.
+        _step_over (bool): Whether resume() first runs the instruction the
+            run stopped at whole, ignoring a breakpoint there; set when a
+            run stops at a breakpoint.
+        _cells_class (type): Cells or PagedCells, used for new tapes.
+        stats (dict): Facts about the last execute() run, such as the
+            pointer range and kernel variant (shown by `--stats`).
+        result_cache (ResultCache): Memoizes completed runs, or None.
+        passes (set): Names of the PEEPHOLE_PASSES to run, or None for
+            all of them; an unknown name raises ValueError.
+        source_name (str): Name of executed programs in source maps and
+            messages, such as the path of the file they come from.
+        source_map (SourceMap): Source map of the last compiled program,
+            or None.
+        tracing (bool): Run programs in the interpreter with hot loops
+            compiled by TraceCompiler instead of the JIT kernels; always
+            on when Numba is not installed.
+        backend (str): 'numba' for the execute_jit kernels or 'llvm' for
+            the experimental per-program kernels of brainfuck.llvm_backend
+            (used on regular tapes only; runs warn and use the Numba
+            kernels when it cannot compile a program).
+        breakpoints (set): Source locations ('LINE:COLUMN' or
+            'FILE:LINE:COLUMN', see SourceMap.find) where runs stop with
+            STATUS_BREAKPOINT before executing the instruction there.
+        watchpoints (set): Cells whose change stops a run with
+            STATUS_WATCHPOINT after the instruction that changed them
+            (not on paged tapes). Runs with breakpoints or watchpoints
+            use the Numba kernels and skip the result cache and the
+            input-free prefix; other runs are unaffected.
+        profile (bool): Run programs without peephole passes on
+            execute_profile_jit, which counts the accesses of every cell
+            (see Heatmap). Profiled runs skip the result cache and the
+            input-free prefix, and watchpoints do not apply to them.
+        heatmap (Heatmap): Cell accesses of the last profiled run, or
+            None.
+
+    """
+
+    def __init__(
+        self,
+        paged=False,
+        result_cache=None,
+        passes=None,
+        history=None,
+        tracing=False,
+        backend='numba',
+        profile=False,
+    ):
+        self.result_cache = result_cache
+        self.backend = backend
+        self.tracing = tracing or not HAVE_NUMBA
+        self.history = CommandHistory() if history is None else history
+        names = [name for name, _ in PEEPHOLE_PASSES]
+        unknown = sorted(set(passes or ()) - set(names))
+        if unknown:
+            raise ValueError(
+                'unknown peephole passes: {} (valid: {})'.format(
+                    ', '.join(unknown), ', '.join(names)
+                )
+            )
+        self.passes = passes
+        self._cells_class = PagedCells if paged else Cells
+        self.cells = self._cells_class()
+        self.pointer = 0
+        self._untaped = None
+        self._pc = 0
+        self._suspended = None
+        self._step_over = False
+        self.breakpoints = set()
+        self.watchpoints = set()
+        self.profile = profile
+        self.heatmap = None
+        self.stats = {}
+        self.source_name = '<input>'
+        self.source_map = None
+
+    def _print_value(self, output_file=None):
+        self._write_value(self.cells[self.pointer], output_file)
+
+    @staticmethod
+    def _write_value(value, output_file=None):
+        if not value:
+            print(file=output_file)
+        elif value > 0 and value < 256:
+            print(chr(value), end="", file=output_file)
+        else:
+            print(value, end="", file=output_file)
+
+    def _read_value(self):
+        try:
+            while True:
+                ui = input('<< ')
+                if not ui:
+                    break
+                try:
+                    self.cells[self.pointer] = int(ui)
+                    break
+                except (ValueError, TypeError):
+                    pass
+                try:
+                    self.cells[self.pointer] = ord(ui[0])
+                    break
+                except (ValueError, TypeError):
+                    print("Invalid value! Please try again:")
+        except EOFError:
+            self.cells[self.pointer] = -1
+
+    @staticmethod
+    def _read_input_direct():
+        try:
+            while True:
+                ui = input('<< ')
+                if not ui:
+                    return None
+                try:
+                    return int(ui)
+                except (ValueError, TypeError):
+                    pass
+                try:
+                    return ord(ui[0])
+                except (ValueError, TypeError):
+                    print("Invalid value! Please try again:")
+        except EOFError:
+            return -1
+
+    def print_cells(self):
+        """Print all cells."""
+        print(self.cells.print_pos(self.pointer))
 
     def print_cmd_history(self):
         """Print all the commands executed so far."""
-        cmd_history = ''.join(self._cmd_parts)
+        cmd_history = self.history.text()
         print(len(cmd_history), cmd_history)
 
     @staticmethod
@@ -301,42 +2170,192 @@ class BrainFuck:
         Returns:
             Fully resolved command string with all imports inlined.
 
+        Raises:
+            Exception: If could not import some library.
+        """
+        offsets = np.arange(len(cmd_line), dtype=np.int32)
+        return BrainFuck._expand_imports(cmd_line, offsets, visited, {})[0]
+
+    @staticmethod
+    def _expand_imports(cmd_line, offsets, visited, texts):
+        """Resolve imports like _resolve_imports, tracking every character.
+
+        Every character of the result belongs to a frame: frame 0 is
+        cmd_line itself and every inlined `{LIB}` gets a frame of its own
+        (nested imports included), so one library imported at two places
+        has two frames.
+
+        Args:
+            cmd_line: Command line with potential {LIB} imports.
+            offsets: int32 array, the offset in its file of each
+                character of cmd_line.
+            visited: Set of already visited libraries, or None.
+            texts: Dict receiving {name: file text} of every library.
+
+        Returns:
+            (text, char_frame, char_offset, frames): the resolved text,
+            int32 arrays with the frame and file offset of each of its
+            characters, and the frames as [name, parent, site] lists where
+            site is the offset of the `{LIB}` in the parent's file; frame
+            0 has parent -1 and no name.
+
         Raises:
             Exception: If could not import some library.
         """
         if visited is None:
             visited = set()
 
-        BASE_DIR = os.path.join(os.path.dirname(__file__), 'bflib')
-        EXT = ['.bf', '']
+        char_frame = np.zeros(len(cmd_line), dtype=np.int32)
+        char_offset = offsets
+        frames = [[None, -1, 0]]
 
-        import_list = re.findall(r'\{([a-zA-Z0-9_\.\-\/]+)\}', cmd_line)
-        path_ext = [(BASE_DIR, ext) for ext in EXT]
+        import_list = _LIBRARY_IMPORT.findall(cmd_line)
 
         for lib in import_list:
             if lib in visited:
                 continue
             visited.add(lib)
 
-            lib_path = ''
-            for base, ext in path_ext:
-                vpath = os.path.join(base, '{}{}'.format(lib, ext))
-                if os.path.isfile(vpath):
-                    lib_path = vpath
-                    break
-
+            lib_path = BrainFuck._find_library(lib)
             if not lib_path:
                 raise Exception('Could not import: {}'.format(lib))
 
-            with open(lib_path) as flib:
-                print('importing: bflib/{}{}'.format(lib, ext if ext else ''))
-                lib_content = ''.join(flib.readlines())
-                valid_cmds = set('><+-.,[]')
-                lib_content = ''.join(c for c in lib_content if c in valid_cmds)
-                lib_content = BrainFuck._resolve_imports(lib_content, visited)
-                cmd_line = cmd_line.replace('{{{}}}'.format(lib), lib_content)
+            name = 'bflib/{}'.format(os.path.relpath(lib_path, _BFLIB_DIR))
+            print('importing: {}'.format(name))
+            lib_content, lib_offsets, texts[name] = BrainFuck._load_library(
+                lib_path
+            )
+            lib_content, lib_frame, lib_offsets, lib_frames = (
+                BrainFuck._expand_imports(lib_content, lib_offsets, visited, texts)
+            )
+            lib_frames[0][0] = name
+
+            token = '{{{}}}'.format(lib)
+            parts, frame_parts, offset_parts = [], [], []
+            start = 0
+            pos = cmd_line.find(token)
+            while pos != -1:
+                parts.append(cmd_line[start:pos])
+                frame_parts.append(char_frame[start:pos])
+                offset_parts.append(char_offset[start:pos])
+
+                base = len(frames)
+                for frame_name, parent, site in lib_frames:
+                    if parent < 0:
+                        parent, site = int(char_frame[pos]), int(char_offset[pos])
+                    else:
+                        parent += base
+                    frames.append([frame_name, parent, site])
+                parts.append(lib_content)
+                frame_parts.append(lib_frame + base)
+                offset_parts.append(lib_offsets)
+
+                start = pos + len(token)
+                pos = cmd_line.find(token, start)
+
+            parts.append(cmd_line[start:])
+            frame_parts.append(char_frame[start:])
+            offset_parts.append(char_offset[start:])
+            cmd_line = ''.join(parts)
+            char_frame = np.concatenate(frame_parts)
+            char_offset = np.concatenate(offset_parts)
+
+        return cmd_line, char_frame, char_offset, frames
+
+    @staticmethod
+    def _find_library(lib):
+        """Return the path of library lib, or '' if it does not exist.
 
-        return cmd_line
+        Only files inside bflib are libraries: names leaving it through
+        `..`, an absolute path or a symbolic link are not found.
+        """
+        bflib = os.path.realpath(_BFLIB_DIR)
+        for ext in ('.bf', ''):
+            vpath = os.path.join(_BFLIB_DIR, '{}{}'.format(lib, ext))
+            inside = os.path.commonpath([bflib, os.path.realpath(vpath)]) == bflib
+            if inside and os.path.isfile(vpath):
+                return vpath
+        return ''
+
+    @staticmethod
+    def _library_hashes(libs):
+        """Return {lib: sha256 hex digest of its file} for library names."""
+        hashes = {}
+        for lib in sorted(libs):
+            with open(BrainFuck._find_library(lib), 'rb') as flib:
+                hashes[lib] = hashlib.sha256(flib.read()).hexdigest()
+        return hashes
+
+    @staticmethod
+    def _read_library(lib_path):
+        """Return the instructions of a library file."""
+        return BrainFuck._load_library(lib_path)[0]
+
+    @staticmethod
+    def _load_library(lib_path):
+        """Return (code, offsets, text) of a library file.
+
+        offsets holds the offset in text of every character of code.
+        Contents are cached per path and re-read when the file's
+        modification time changes.
+        """
+        mtime = os.stat(lib_path).st_mtime_ns
+        cached = _library_cache.get(lib_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1:]
+
+        with open(lib_path) as flib:
+            text = flib.read()
+        _, code, offsets = BrainFuck._split_library(text)
+        _library_cache[lib_path] = (mtime, code, offsets, text)
+        return code, offsets, text
+
+    @staticmethod
+    def parse_library(text):
+        """Split the text of a library file into its header and code.
+
+        A library starts with `Name: value` lines (Description:,
+        Assumptions:, Begin:, End:) documenting it. They are metadata,
+        not code, even where they contain `,` or `.`, so only the
+        command characters of the lines after them are instructions.
+
+        Args:
+            text: Contents of a bflib file.
+
+        Returns:
+            (header, code): dict of the header fields and the string of
+            instructions.
+
+        Examples:
+
+            >>> BrainFuck.parse_library(
+            ...     'Description: A,B\\nBegin: |A| B\\n\\n[->+<] move\\n')
+            ({'Description': 'A,B', 'Begin': '|A| B'}, '[->+<]')
+
+        """
+        return BrainFuck._split_library(text)[:2]
+
+    @staticmethod
+    def _split_library(text):
+        """parse_library() that also returns the text offset of the code."""
+        header = {}
+        body_start = 0
+        for line in text.splitlines(keepends=True):
+            match = _LIBRARY_HEADER.match(line.rstrip('\r\n'))
+            if match:
+                header[match.group(1)] = match.group(2).strip()
+            elif line.strip():
+                break
+            body_start += len(line)
+
+        valid_cmds = set('><+-.,[]')
+        offsets = [
+            body_start + i
+            for i, c in enumerate(text[body_start:])
+            if c in valid_cmds
+        ]
+        code = ''.join(text[i] for i in offsets)
+        return header, code, np.array(offsets, dtype=np.int32)
 
     @staticmethod
     def import_lib(cmds):
@@ -360,97 +2379,83 @@ class BrainFuck:
             import_dict[lib] = resolved
         return import_dict
 
-    def _compile_to_ir(self, cmd_line):
-        """Compile BrainFuck commands to intermediate representation.
+    def _compile_to_ir(self, cmd_line, positions=None):
+        """Compile BrainFuck commands to IR tuples, for reading and tests.
+
+        The compiler itself works on the IR array of lex_ir().
 
         Args:
             cmd_line: String of BrainFuck commands (imports should already be resolved).
+            positions: Optional list receiving, for every IR operation, the
+                index in cmd_line of its first command.
 
         Returns:
-            List of IR operations: [('add', count), ('move', offset), ('jump_zero', target), ...]
-        """
-        valid_cmds = set('><+-.,[]&*')
-        filtered_cmds = [c for c in cmd_line if c in valid_cmds]
-
-        ir = []
-        i = 0
-        while i < len(filtered_cmds):
-            cmd = filtered_cmds[i]
-
-            if cmd == '+':
-                count = 1
-                while i + count < len(filtered_cmds) and filtered_cmds[i + count] == '+':
-                    count += 1
-                ir.append(('add', count))
-                i += count
-            elif cmd == '-':
-                count = 1
-                while i + count < len(filtered_cmds) and filtered_cmds[i + count] == '-':
-                    count += 1
-                ir.append(('add', -count))
-                i += count
-            elif cmd == '>':
-                count = 1
-                while i + count < len(filtered_cmds) and filtered_cmds[i + count] == '>':
-                    count += 1
-                ir.append(('move', count))
-                i += count
-            elif cmd == '<':
-                count = 1
-                while i + count < len(filtered_cmds) and filtered_cmds[i + count] == '<':
-                    count += 1
-                ir.append(('move', -count))
-                i += count
-            elif cmd == '.':
-                ir.append(('output',))
-                i += 1
-            elif cmd == ',':
-                ir.append(('input',))
-                i += 1
-            elif cmd == '[':
-                ir.append(('jump_zero', -1))
-                i += 1
-            elif cmd == ']':
-                ir.append(('jump_nz', -1))
-                i += 1
-            elif cmd == '*':
-                ir.append(('print_cells',))
-                i += 1
-            elif cmd == '&':
-                ir.append(('print_history',))
-                i += 1
-            else:
-                i += 1
-
-        stack = []
-        for i, op in enumerate(ir):
-            if op[0] == 'jump_zero':
-                stack.append(i)
-            elif op[0] == 'jump_nz':
-                if stack:
-                    match_pos = stack.pop()
-                    ir[match_pos] = ('jump_zero', i + 1)
-                    ir[i] = ('jump_nz', match_pos)
-
-        return ir
+            List of IR operations: [('add', count), ('move', offset), ...]
+        """
+        ir = lex_ir(cmd_line)
+        if positions is not None:
+            positions.extend(ir['pos'].tolist())
+        return ir_tuples(ir)
 
     def _sync_cells_from_tape(self, tape, tape_center):
         """Sync tape array state back to Cells object."""
-        self.cells = Cells()
-        for i in range(len(tape)):
-            if tape[i] != 0:
-                self.cells[i - tape_center] = int(tape[i])
+        if tape is self.cells or tape is getattr(self.cells, 'array', None):
+            return
+        self.cells.update_array(-tape_center, tape)
+
+    def _sync_state(self, tape, tape_center, state):
+        """Sync cells and pointer back from a JIT tape and state array."""
+        self._sync_cells_from_tape(tape, tape_center)
+        self.pointer = int(state[0]) - tape_center
+        if isinstance(self.cells, MappedCells):
+            self.cells.state[0] = self.pointer
+
+    def _store_input(self, tape, tape_center, state, value):
+        """Store a `,` value at the JIT pointer."""
+        if tape is self.cells:
+            self.cells[int(state[0]) - tape_center] = value
+        else:
+            tape[int(state[0])] = value
 
     @staticmethod
-    def _flush_outputs(output_buf, count, output_file=None):
-        for i in range(count):
-            value = int(output_buf[i])
+    def _render_outputs(values):
+        """Render output cell values the same way `.` prints them."""
+        parts = []
+        for value in values:
+            value = int(value)
             if not value:
-                print(file=output_file)
+                parts.append('\n')
             elif 0 < value < 256:
-                print(chr(value), end="", file=output_file)
+                parts.append(chr(value))
             else:
-                print(value, end="", file=output_file)
+                parts.append(str(value))
+        return ''.join(parts)
+
+    @staticmethod
+    def _input_values(data):
+        """Convert input text or bytes to the values `,` stores."""
+        if data is None:
+            return np.empty(0, dtype=np.int32)
+        if isinstance(data, str):
+            return np.array([ord(c) for c in data], dtype=np.int32)
+        return np.frombuffer(bytes(data), dtype=np.uint8).astype(np.int32)
+
+    @staticmethod
+    def _input_reader(data):
+        """Return a callable feeding `,` from data, or None for stdin.
+
+        Each call returns the next value, or -1 once data is exhausted.
+        """
+        if data is None:
+            return None
+        values = iter(BrainFuck._input_values(data).tolist())
+        return lambda: next(values, -1)
+
+    @staticmethod
+    def _flush_outputs(output_buf, count, output_file=None):
+        if count:
+            text = BrainFuck._render_outputs(output_buf[:count])
+            print(text, end="", file=output_file)
 
     def _execute_segmented_jit(
         self,
@@ -461,28 +2466,64 @@ class BrainFuck:
         output_buf,
         max_iterations,
         output_file=None,
+        deadline=None,
+        cancel=None,
+        read_input=None,
+        kernel=execute_jit,
+        step_over=None,
     ):
         """Execute program using segmented JIT with Python I/O checkpoints.
 
         Runs JIT for computation segments, pausing at I/O operations
-        for Python to handle them, then resuming JIT execution.
+        for Python to handle them, then resuming JIT execution. When a
+        deadline or cancellation token is given, segments are limited to
+        SLICE_ITERATIONS so both are checked between slices.
 
         Args:
-            numeric_program: NumPy array of (op_code, arg) pairs
+            numeric_program: NumPy array of (op_code, arg, arg2) rows
             tape: NumPy array — memory tape (modified in-place)
             tape_center: Offset of cell 0 in tape array
             state: NumPy array [pointer, pc, output_count] — execution state
             output_buf: NumPy array — pre-allocated output buffer
             max_iterations: Maximum total iterations
+            deadline: time.monotonic() value after which to stop, or None
+            cancel: Object whose is_set() returns True to stop, or None
+            read_input: Callable returning the value for `,` (None leaves
+                the cell unchanged); defaults to prompting on stdin
+            kernel: execute_jit or execute_unchecked_jit
+            step_over: Program without breakpoints to run the instruction
+                at state[1] from first, whole, so a run suspended at a
+                breakpoint continues past it
 
         Returns:
-            True if program completed, False if max_iterations reached
+            STATUS_COMPLETE if the program completed, otherwise the
+            STATUS_MAX_ITERATIONS, STATUS_TIMEOUT, STATUS_CANCELLED,
+            STATUS_INFINITE_LOOP, STATUS_BREAKPOINT or STATUS_WATCHPOINT
+            code that stopped it at state[1].
         """
         remaining = max_iterations
+        sliced = deadline is not None or cancel is not None
+        if read_input is None:
+            read_input = self._read_input_direct
 
         while remaining > 0 and state[1] < len(numeric_program):
-            status, iters = execute_jit(
-                numeric_program, tape, state, output_buf, remaining
+            if cancel is not None and cancel.is_set():
+                return STATUS_CANCELLED
+            if deadline is not None and time.monotonic() >= deadline:
+                return STATUS_TIMEOUT
+
+            budget = min(remaining, SLICE_ITERATIONS) if sliced else remaining
+            program = numeric_program
+            if step_over is not None:
+                if isinstance(tape, PagedCells):
+                    value = tape[int(state[0]) - tape_center]
+                else:
+                    value = tape[state[0]]
+                # the whole instruction, even if it costs more than budget
+                budget = instruction_cost(step_over, state[1], value)
+                program, step_over = step_over, None
+            status, iters = _execute_segment(
+                program, tape, state, output_buf, budget, kernel
             )
             remaining -= iters
 
@@ -490,15 +2531,13 @@ class BrainFuck:
             state[2] = 0
 
             if status == STATUS_NEED_INPUT:
-                value = self._read_input_direct()
+                value = read_input()
                 if value is not None:
-                    tape[int(state[0])] = value
+                    self._store_input(tape, tape_center, state, value)
                 state[1] += 1
 
             elif status == STATUS_PRINT_CELLS:
-                self._sync_cells_from_tape(tape, tape_center)
-                self.pointer = int(state[0]) - tape_center
-                self.print_cells()
+                print(self._dump_cells(tape, tape_center, state))
                 state[1] += 1
 
             elif status == STATUS_PRINT_HISTORY:
@@ -508,223 +2547,2893 @@ class BrainFuck:
             elif status == STATUS_OUTPUT_OVERFLOW:
                 pass
 
-            elif status == STATUS_COMPLETE:
-                return state[1] >= len(numeric_program)
+            elif status in (
+                STATUS_INFINITE_LOOP, STATUS_BREAKPOINT, STATUS_WATCHPOINT
+            ):
+                return status
+
+        if state[1] >= len(numeric_program):
+            return STATUS_COMPLETE
+        return STATUS_MAX_ITERATIONS
+
+    def _execute_interpreted(
+        self,
+        ir_program,
+        max_iterations,
+        output_file=None,
+        pc=0,
+        deadline=None,
+        cancel=None,
+        read_input=None,
+        tracer=None,
+    ):
+        """Fallback interpreted execution for when JIT is unavailable.
+
+        With a TraceCompiler as tracer, hot loops run as compiled traces
+        on the dense list of a Cells tape. An IR array is interpreted in
+        its tuple form.
+
+        Returns:
+            (status, pc) with the same status codes as
+            _execute_segmented_jit.
+        """
+        if isinstance(ir_program, np.ndarray):
+            ir_program = ir_tuples(ir_program)
+        backup_cells = self.cells.backup()
+        backup_pointer = self.pointer
+        sliced = deadline is not None or cancel is not None
+        emit = lambda value: self._write_value(value, output_file)  # noqa: E731
+        blocks = {}
+        exec_count = 0
+
+        try:
+            while pc < len(ir_program) and exec_count < max_iterations:
+                if sliced and not exec_count % 4096:
+                    if cancel is not None and cancel.is_set():
+                        return STATUS_CANCELLED, pc
+                    if deadline is not None and time.monotonic() >= deadline:
+                        return STATUS_TIMEOUT, pc
+
+                op = ir_program[pc]
+                tag = op[0]
+
+                if tag == 'add':
+                    self.cells[self.pointer] = (
+                        self.cells[self.pointer] + op[1]
+                    ) & 0xFF
+                elif tag == 'move':
+                    self.pointer += op[1]
+                elif tag in ('add_move', 'move_add', 'output_run') and (
+                    exec_count + _fused_cost(op) > max_iterations
+                ):
+                    # stop in front of it, like the kernels
+                    exec_count = max_iterations
+                    continue
+                elif tag == 'add_move':
+                    self.cells[self.pointer] = (
+                        self.cells[self.pointer] + op[1]
+                    ) & 0xFF
+                    self.pointer += op[2]
+                    exec_count += 1
+                elif tag == 'move_add':
+                    self.pointer += op[1]
+                    self.cells[self.pointer] = (
+                        self.cells[self.pointer] + op[2]
+                    ) & 0xFF
+                    exec_count += 1
+                elif tag == 'linear_loop':
+                    # the tape is unbounded, so the loop kept after the
+                    # terms never runs
+                    end = pc + 1
+                    while ir_program[end][0] == 'loop_term':
+                        end += 1
+                    following = ir_program[end][1]
+                    trips = int(loop_trip_count(self.cells[self.pointer], op[1]))
+                    if trips < 0:
+                        return STATUS_INFINITE_LOOP, pc
+                    if trips:
+                        cost = op[2] + 2
+                        affordable = (max_iterations - exec_count) // cost
+                        if affordable == 0:
+                            exec_count = max_iterations
+                            continue
+                        if affordable < trips:
+                            trips, following = affordable, pc
+                        for term in range(pc + 1, end):
+                            key = self.pointer + ir_program[term][1]
+                            self.cells[key] = (
+                                self.cells[key] + trips * ir_program[term][2]
+                            ) & 0xFF
+                        self.cells[self.pointer] = (
+                            self.cells[self.pointer] + trips * op[1]
+                        ) & 0xFF
+                        exec_count += trips * cost
+                    else:
+                        exec_count += 1
+                    pc = following
+                    continue
+                elif tag == 'delta_block':
+                    if pc not in blocks:
+                        blocks[pc] = block_window(ir_program, pc)
+                    end, low, deltas = blocks[pc]
+                    if exec_count + op[1] > max_iterations:
+                        pc = end + 1
+                        continue
+                    self.cells.add_block(self.pointer + low, deltas)
+                    self.pointer += op[2]
+                    exec_count += op[1]
+                    pc = end + 1 + ir_program[end][1]
+                    continue
+                elif tag == 'output_run':
+                    for k in range(op[1]):
+                        if k:
+                            self.pointer += op[2]
+                        self._print_value(output_file)
+                    exec_count += 2 * op[1] - 2
+                elif tag == 'output':
+                    self._print_value(output_file)
+                elif tag == 'input':
+                    if read_input is None:
+                        self._read_value()
+                    else:
+                        value = read_input()
+                        if value is not None:
+                            self.cells[self.pointer] = value
+                elif tag == 'jump_zero':
+                    if not self.cells[self.pointer]:
+                        pc = op[1]
+                        continue
+                    trace = None if tracer is None else tracer.enter(ir_program, pc)
+                    if trace is not None:
+                        budget = max_iterations - exec_count
+                        if sliced:
+                            budget = min(budget, 4096 - exec_count % 4096)
+                        self.pointer, iters, exit_pc = tracer.run(
+                            pc, trace, self.cells._tape, self.pointer, budget, emit
+                        )
+                        if iters:
+                            exec_count += iters
+                            pc = exit_pc
+                            continue
+                elif tag == 'jump_nz':
+                    if self.cells[self.pointer]:
+                        pc = op[1]
+                        continue
+                elif tag == 'print_cells':
+                    self.print_cells()
+                elif tag == 'print_history':
+                    self.print_cmd_history()
+
+                pc += 1
+                exec_count += 1
+
+        except Exception:
+            print('MAX recursion reached!')
+            self.cells = backup_cells
+            self.pointer = backup_pointer
+            self.history.pop()
+            return STATUS_COMPLETE, len(ir_program)
+
+        finally:
+            if tracer is not None:
+                tracer.instructions = exec_count
+
+        if pc >= len(ir_program):
+            return STATUS_COMPLETE, pc
+        return STATUS_MAX_ITERATIONS, pc
+
+    def _build_tape(self, pointer_range=None):
+        """Copy the Cells state into a fresh JIT tape.
+
+        Memory-mapped and paged tapes are not copied: the JIT runs
+        directly on the file mapping or on the PagedCells object.
+
+        When pointer_range, the (low, high) cells the pointer can reach
+        (see analyze_pointer_range), lies inside the regular TAPE_SIZE
+        window, the tape only covers that range and the unchecked kernel
+        is selected; clamping at the tape ends can then never happen, so
+        both behave the same.
+
+        Returns:
+            (tape, tape_center, kernel) where tape_center is the index of
+            cell 0 and kernel the execute_jit variant to run on the tape.
+            Non-zero cells that do not fit on the tape are left in the
+            Cells and remembered in self._untaped as (origin, values).
+        """
+        self._untaped = None
+        if isinstance(self.cells, MappedCells):
+            tape, tape_center = self.cells.array, -self.cells.origin
+            self.stats.update(kernel='checked', tape_size=len(tape))
+            return tape, tape_center, execute_jit
+        if isinstance(self.cells, PagedCells):
+            self.stats.update(kernel='paged', tape_size=None)
+            return self.cells, -self.cells.origin, execute_jit
+
+        tape_center = TAPE_SIZE // 2
+        kernel = execute_jit
+        if pointer_range is not None:
+            low, high = pointer_range
+            if -tape_center <= low and high < TAPE_SIZE - tape_center:
+                tape_center = -low
+                kernel = execute_unchecked_jit
+
+        size = TAPE_SIZE if kernel is execute_jit else high - low + 1
+        tape = np.zeros(size, dtype=np.int32)
+        self.stats.update(
+            kernel='checked' if kernel is execute_jit else 'unchecked',
+            tape_size=size,
+        )
+
+        origin, values = self.cells.to_array()
+        lo = max(origin, -tape_center)
+        hi = min(origin + len(values), size - tape_center)
+        if lo < hi:
+            tape[lo + tape_center:hi + tape_center] = values[lo - origin:hi - origin]
+        if lo > origin or hi < origin + len(values):
+            self._untaped = (origin, values)
+
+        return tape, tape_center, kernel
+
+    def _dump_cells(self, tape, tape_center, state):
+        """Render the `*` dump of a JIT tape without syncing the cells.
+
+        Only the span found by cell_dump_extent is read from the tape;
+        cells that did not fit on it (see _build_tape) are merged in.
+        """
+        pointer = int(state[0])
+        if isinstance(tape, PagedCells):
+            return tape.print_pos(pointer - tape_center)
+
+        first, last = cell_dump_extent(tape, pointer)
+        origin, values = first - tape_center, tape[first:last + 1]
+        if self._untaped is not None:
+            outer_origin, outer_values = self._untaped
+            start = min(origin, outer_origin)
+            end = max(origin + len(values), outer_origin + len(outer_values))
+            merged = np.zeros(end - start, dtype=np.int64)
+            merged[outer_origin - start:][:len(outer_values)] = outer_values
+            merged[origin - start:][:len(values)] = values
+            origin, values = start, merged
+        return format_cells(origin, values, pointer - tape_center)
+
+    def _run(
+        self,
+        numeric_program,
+        ir_program,
+        pc,
+        max_iterations,
+        output_file=None,
+        timeout=None,
+        cancel=None,
+        read_input=None,
+        pointer_range=None,
+        step_over=False,
+    ):
+        """Run a compiled program from pc and record where it stopped.
+
+        pointer_range bounds the cells the pointer reaches from pc on.
+        step_over runs the instruction at pc even if it has a breakpoint.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        debugging = bool(self.breakpoints or self.watchpoints)
+        self._step_over = False
+        self.stats.pop('watchpoint', None)
+        self.heatmap = None
+
+        if self.tracing and not (debugging or self.profile):
+            status, pc = self._execute_traced(
+                ir_program,
+                max_iterations,
+                output_file,
+                pc,
+                deadline,
+                cancel,
+                read_input,
+            )
+            if status == STATUS_COMPLETE:
+                return None
+            self._suspend(numeric_program, ir_program, pc, read_input)
+            return status
+
+        self._wait_for_warm_up()
+        use_llvm = (
+            self.backend == 'llvm'
+            and type(self.cells) is Cells
+            and not self.profile
+            and not debugging
+        )
+        llvm_kernel = self._llvm_kernel(numeric_program) if use_llvm else None
+        try:
+            tape, tape_center, kernel = self._build_tape(pointer_range)
+            state = np.array(
+                [tape_center + self.pointer, np.int64(pc), np.int64(0)],
+                dtype=np.int64,
+            )
+            program, watch, counts = numeric_program, None, None
+            if self.profile and not isinstance(tape, PagedCells):
+                kernel, counts = self._profile_kernel(tape, tape_center, state)
+            if debugging:
+                program, kernel, watch = self._debug_kernel(
+                    numeric_program, tape, tape_center, kernel
+                )
+            elif llvm_kernel is not None:
+                kernel = llvm_kernel
+                self.stats['kernel'] = 'llvm'
+            elif use_llvm:
+                self.stats['kernel'] += ' (llvm failed)'
+            output_buf = np.empty(OUTPUT_BUF_SIZE, dtype=np.int32)
+
+            status = self._execute_segmented_jit(
+                program,
+                tape,
+                tape_center,
+                state,
+                output_buf,
+                max_iterations,
+                output_file,
+                deadline,
+                cancel,
+                read_input,
+                kernel,
+                numeric_program if step_over else None,
+            )
+
+            if status == STATUS_WATCHPOINT:
+                cells, indices, values = watch
+                k = int(np.flatnonzero(tape[indices] != values)[0])
+                self.stats['watchpoint'] = (
+                    int(cells[k]), int(values[k]), int(tape[indices[k]])
+                )
+            if counts is not None:
+                self.heatmap = Heatmap.from_counts(tape, tape_center, *counts)
+            self._step_over = status == STATUS_BREAKPOINT
+            self._sync_state(tape, tape_center, state)
+            pc = int(state[1])
+
+        except Exception:
+            status, pc = self._execute_interpreted(
+                ir_program,
+                max_iterations,
+                output_file,
+                pc,
+                deadline,
+                cancel,
+                read_input,
+            )
+
+        if status == STATUS_COMPLETE:
+            return None
+        self._suspend(numeric_program, ir_program, pc, read_input)
+        return status
+
+    def _llvm_kernel(self, numeric_program):
+        """Compile numeric_program with brainfuck.llvm_backend.
+
+        Returns:
+            The kernel, or None after a warning on stderr when llvmlite
+            is missing or fails, in which case the run uses the Numba
+            kernels.
+        """
+        try:
+            from brainfuck.llvm_backend import compile_kernel
+
+            return compile_kernel(numeric_program)
+        except Exception as e:
+            print('llvm backend failed, using Numba: {!r}'.format(e), file=sys.stderr)
+            return None
+
+    def _wait_for_warm_up(self):
+        """Wait for the JitWarmUp, if one was started (see start_warm_up).
+
+        The first run to wait gets its stats.
+        """
+        if _jit_warm_up is not None:
+            self.stats.update(_jit_warm_up.wait() or {})
+
+    def _debug_kernel(self, numeric_program, tape, tape_center, kernel):
+        """Patch in the breakpoints and pick the watchpoint kernel.
+
+        Returns:
+            (program, kernel, watch): the numeric program with OP_BREAK
+            rows, the kernel to run it with and, if watchpoints apply,
+            (cells, indices, values) of the watched cells on the tape,
+            their tape indices and their values at the start.
+        """
+        program = numeric_program
+        if self.breakpoints and self.source_map is not None:
+            program = set_breakpoints(numeric_program, [
+                pc
+                for location in self.breakpoints
+                for pc in self.source_map.find(location)
+            ])
+        if not self.watchpoints or isinstance(tape, PagedCells):
+            return program, kernel, None
+
+        cells = np.array(
+            sorted(
+                cell for cell in self.watchpoints
+                if 0 <= cell + tape_center < len(tape)
+            ),
+            dtype=np.int64,
+        )
+        indices = cells + tape_center
+        values = tape[indices].copy()
+        watch_kernel = _WATCH_KERNELS.get(kernel)
+        if watch_kernel is None:
+            return program, kernel, None
+
+        def watching(program, tape, state, output_buf, max_iterations):
+            return watch_kernel(
+                program, tape, state, output_buf, max_iterations, indices, values
+            )
+
+        return program, watching, (cells, indices, values)
+
+    def _profile_kernel(self, tape, tape_center, state):
+        """Return (kernel, counts) to run a profiled program on tape.
+
+        kernel calls execute_profile_jit with the count arrays; counts is
+        (reads, writes, extent), updated in place (see Heatmap).
+        """
+        reads = np.zeros(len(tape), dtype=np.int64)
+        writes = np.zeros(len(tape), dtype=np.int64)
+        extent = np.array([state[0], state[0], 0], dtype=np.int64)
+        self.stats['kernel'] = 'profile'
+
+        def profiling(program, tape, state, output_buf, max_iterations):
+            return execute_profile_jit(
+                program, tape, state, output_buf, max_iterations,
+                reads, writes, extent,
+            )
+
+        return profiling, (reads, writes, extent)
+
+    def _execute_traced(self, ir_program, max_iterations, *args):
+        """_execute_interpreted() with the hot-loop trace compiler.
+
+        Traces run on the dense list of Cells tapes only; other tapes
+        are interpreted. stats gets the loops that were compiled with
+        the instructions their traces ran ('compiled_loops') and how
+        much faster traces ran than the interpreter ('trace_speedup').
+        """
+        tracer = TraceCompiler() if type(self.cells) is Cells else None
+        self.stats['kernel'] = 'traced' if tracer else 'interpreted'
+        start = time.perf_counter()
+        status, pc = self._execute_interpreted(
+            ir_program, max_iterations, *args, tracer=tracer
+        )
+        if tracer is None or not tracer.iterations:
+            return status, pc
+
+        describe = str if self.source_map is None else self.source_map.describe
+        self.stats['compiled_loops'] = {
+            describe(header): count
+            for header, count in sorted(tracer.iterations.items())
+        }
+        speedup = tracer.speedup(time.perf_counter() - start)
+        if speedup is not None:
+            self.stats['trace_speedup'] = '{:.1f}x'.format(speedup)
+        return status, pc
+
+    def _suspend(self, numeric_program, ir_program, pc, read_input):
+        """Remember a stopped run for resume() and report where it stopped."""
+        self._suspended = (numeric_program, ir_program, pc, read_input)
+        if self.source_map is not None:
+            self.stats['stopped_at'] = self.source_map.describe(pc)
+
+    def _program_key(self, expanded_cmd_line, entry_zero):
+        passes = None if self.passes is None else tuple(sorted(self.passes))
+        if self.profile:
+            passes = ()
+        return expanded_cmd_line, passes, entry_zero
+
+    def _compile(self, expanded_cmd_line, entry_zero):
+        """Compile an import-resolved program through the program cache.
+
+        Args:
+            expanded_cmd_line: BrainFuck commands without imports.
+            entry_zero: Whether the program starts on an all-zero tape.
+
+        Returns:
+            (ir_program, numeric_program, info), see _prepare().
+        """
+        cache_key = self._program_key(expanded_cmd_line, entry_zero)
+        with _program_cache_lock:
+            compiled = _program_cache.get(cache_key)
+            if compiled is not None:
+                _program_cache.move_to_end(cache_key)
+                return compiled
+
+        info = {}
+        ir_program, info['peephole'] = optimize_ir(
+            lex_ir(expanded_cmd_line), cache_key[1], entry_zero
+        )
+        info['pointer_range'] = analyze_pointer_range(ir_program)
+        info['positions'] = ir_program['pos'].copy()
+        self._wait_for_warm_up()
+        compiled = (ir_program, convert_ir_to_numeric(ir_program), info)
+        _cache_program(cache_key, compiled)
+        return compiled
+
+    def _prepare(self, cmd_line):
+        """Resolve imports, record history and compile cmd_line.
+
+        Returns:
+            (ir_program, numeric_program, info), or None if there is
+            nothing to run (including an import error, which is printed).
+            ir_program is the optimized IR array (see IR_DTYPE).
+            info is a dict of compile-time facts: 'pointer_range' holds
+            the result of analyze_pointer_range(), 'peephole' the
+            instructions removed by each pass of optimize_ir() and
+            'prefix' the result of evaluate_prefix(), filled in by
+            _apply_prefix on first use, and 'positions' the index in the
+            resolved program of every instruction (see SourceMap).
+            Programs started on an all-zero tape are compiled and cached
+            separately, as their leading loops are dead (see
+            eliminate_dead_loops). The source map of the program is
+            stored in self.source_map.
+
+        Raises:
+            Exception: If brackets are not balanced.
+        """
+        if not self.is_balanced(cmd_line):
+            raise Exception("brackets not balanced!")
+
+        texts = {}
+        try:
+            expanded_cmd_line, char_frame, char_offset, frames = (
+                self._expand_imports(
+                    cmd_line,
+                    np.arange(len(cmd_line), dtype=np.int32),
+                    None,
+                    texts,
+                )
+            )
+        except Exception as e:
+            print(e)
+            return None
+
+        self.history.append(
+            cmd_line,
+            {
+                lib: self._read_library(self._find_library(lib))
+                for lib in _LIBRARY_IMPORT.findall(cmd_line)
+            },
+        )
+
+        entry_zero = (
+            not self.pointer
+            and type(self.cells) in (Cells, PagedCells)
+            and not self.cells.items()
+        )
+        compiled = self._compile(expanded_cmd_line, entry_zero)
+
+        ir_program, numeric_program, info = compiled
+        self.source_map = info.get('source_map')
+        if self.source_map is None:
+            self.source_map = SourceMap.from_expansion(
+                self.source_name,
+                cmd_line,
+                (char_frame, char_offset, frames, texts),
+                info['positions'],
+            )
+        if len(numeric_program) == 0:
+            return None
+
+        self.stats['pointer_range'] = info['pointer_range']
+        self.stats['peephole'] = info['peephole']
+        self.stats['instructions'] = self.source_map.instructions_per_file()
+        return compiled
+
+    def execute(
+        self,
+        cmd_line,
+        MAX_RECURSION=10**5,
+        output_file=None,
+        timeout=None,
+        cancel=None,
+        input_data=None,
+    ):
+        """Compile and execute a BrainFuck program.
+
+        Args:
+            cmd_line: BrainFuck commands, optionally with {LIB} imports.
+            MAX_RECURSION: Maximum number of operations to execute.
+            output_file: File object for `.` output (default: stdout).
+            timeout: Wall-clock budget in seconds, or None for no limit.
+            cancel: Cancellation token such as threading.Event; the run
+                stops once its is_set() returns True.
+            input_data: Input as str or bytes; each `,` consumes one value
+                and reads -1 once it is exhausted. None prompts on stdin.
+
+        Returns:
+            None if the program ran to completion, otherwise the
+            STATUS_TIMEOUT, STATUS_CANCELLED or STATUS_MAX_ITERATIONS
+            code that stopped it. Cells and pointer reflect the stopped
+            state and the run can be continued with resume().
+            STATUS_INFINITE_LOOP means a closed-form loop was found to
+            never terminate; the run stops at that loop without using up
+            MAX_RECURSION. STATUS_BREAKPOINT and STATUS_WATCHPOINT stop
+            at a breakpoint or after a watched cell changed (see
+            breakpoints, watchpoints); stats['watchpoint'] then holds
+            (cell, old value, new value).
+
+        With a result_cache, a run that completes is memoized and the
+        same program with the same input, cells, pointer and
+        MAX_RECURSION is later answered from the cache without executing.
+
+        Raises:
+            Exception: If brackets are not balanced.
+        """
+        self._suspended = None
+        self.stats = {}
+        prepared = self._prepare(cmd_line)
+        if prepared is None:
+            return
+
+        ir_program, numeric_program, info = prepared
+
+        key = self._result_key(ir_program, input_data, MAX_RECURSION)
+        if key is not None:
+            entry = self.result_cache.get(key)
+            if entry is not None:
+                print(entry['output'], end="", file=output_file)
+                self.cells.load_array(entry['origin'], entry['tape'])
+                self.pointer = entry['pointer']
+                self.stats = dict(entry['stats'], result_cache='hit')
+                return
+            output_file = _TeeOutput(output_file)
+
+        pointer_range = info['pointer_range']
+        if pointer_range is not None:
+            pointer_range = (
+                self.pointer + pointer_range[0],
+                self.pointer + pointer_range[1],
+            )
+        pc = 0
+        if (
+            not self.tracing
+            and not (self.breakpoints or self.watchpoints or self.profile)
+            and (timeout is None or timeout > 0)
+            and not (cancel and cancel.is_set())
+        ):
+            deadline = None if timeout is None else time.monotonic() + timeout
+            pc, MAX_RECURSION = self._apply_prefix(
+                numeric_program, info, MAX_RECURSION, output_file, deadline, cancel
+            )
+            if deadline is not None:
+                timeout = max(deadline - time.monotonic(), 0)
+        status = self._run(
+            numeric_program,
+            ir_program,
+            pc,
+            MAX_RECURSION,
+            output_file,
+            timeout,
+            cancel,
+            self._input_reader(input_data),
+            pointer_range,
+        )
+
+        if key is not None and status is None:
+            self.stats['result_cache'] = 'miss'
+            origin, values = self.cells.to_array()
+            self.result_cache.put(key, {
+                'output': output_file.getvalue(),
+                'pointer': self.pointer,
+                'origin': origin,
+                'tape': values,
+                'stats': self.stats,
+            })
+        return status
+
+    def _result_key(self, ir_program, input_data, max_iterations):
+        """Return the result cache key of a run, or None to bypass.
+
+        The key hashes the import-resolved program, the input, the
+        starting cells and pointer and the MAX_RECURSION budget. Runs
+        without a cache, reading stdin interactively, using `*` or `&`
+        (whose output depends on more than the key), on mapped or paged
+        tapes, with breakpoints or watchpoints or profiled are not
+        memoized.
+        """
+        if (
+            self.result_cache is None
+            or self.breakpoints
+            or self.watchpoints
+            or self.profile
+            or input_data is None
+            or type(self.cells) is not Cells
+            or np.isin(ir_program['op'], (OP_PRINT_CELLS, OP_PRINT_HISTORY)).any()
+        ):
+            return None
+
+        origin, values = self.cells.to_array()
+        digest = hashlib.sha256()
+        digest.update(self.history.last().encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(self._input_values(input_data).tobytes())
+        digest.update(struct.pack('<qqq', self.pointer, origin, max_iterations))
+        digest.update(values.tobytes())
+        return digest.hexdigest()
+
+    def _apply_prefix(
+        self,
+        numeric_program,
+        info,
+        max_iterations,
+        output_file,
+        deadline=None,
+        cancel=None,
+    ):
+        """Start a run from its input-free prefix if possible.
+
+        The prefix (see evaluate_prefix) assumes an all-zero tape with the
+        pointer at cell 0, so it is only used in that state on regular
+        Cells, and only if it fits in max_iterations. Its output is
+        printed and its cells and pointer are installed. The first run
+        of a program evaluates the prefix under its deadline and
+        cancellation token; if either fires first, the run starts from
+        the unfolded program and a later run evaluates it again.
+
+        Returns:
+            (pc, max_iterations) to continue the run with.
+        """
+        if 'prefix' not in info:
+            prefix = evaluate_prefix(
+                numeric_program, deadline=deadline, cancel=cancel
+            )
+            if not (
+                (cancel is not None and cancel.is_set())
+                or (deadline is not None and time.monotonic() >= deadline)
+            ):
+                info['prefix'] = prefix
+        prefix = info.get('prefix')
+
+        if (
+            prefix is None
+            or prefix['steps'] > max_iterations
+            or self.pointer
+            or type(self.cells) is not Cells
+            or self.cells.items()
+        ):
+            return 0, max_iterations
+
+        print(prefix['output'], end="", file=output_file)
+        self.cells.load_array(prefix['origin'], prefix['tape'])
+        self.pointer = prefix['pointer']
+        self.stats['prefix_steps'] = prefix['steps']
+        return prefix['pc'], max_iterations - prefix['steps']
+
+    def resume(
+        self,
+        MAX_RECURSION=10**5,
+        output_file=None,
+        timeout=None,
+        cancel=None,
+    ):
+        """Continue the last run that execute() or resume() suspended.
+
+        The run restarts from its saved program counter on the current
+        cells and pointer, with a fresh MAX_RECURSION and time budget.
+        A run stopped at a breakpoint first executes the instruction
+        there whole, even a closed-form loop or delta block costing more
+        than MAX_RECURSION, so resume(1) steps one instruction (and the
+        instruction after it if that one was `,`, `*` or `&`, which cost
+        nothing).
+
+        Returns:
+            Same as execute().
+
+        Raises:
+            Exception: If there is no suspended run.
+        """
+        if self._suspended is None:
+            raise Exception("no suspended run to resume!")
+
+        numeric_program, ir_program, pc, read_input = self._suspended
+        self._suspended = None
+        return self._run(
+            numeric_program,
+            ir_program,
+            pc,
+            MAX_RECURSION,
+            output_file,
+            timeout,
+            cancel,
+            read_input,
+            step_over=self._step_over,
+        )
+
+    async def execute_async(
+        self,
+        cmd_line,
+        reader=None,
+        writer=None,
+        MAX_RECURSION=10**5,
+        timeout=None,
+        executor=None,
+        slice_iterations=SLICE_ITERATIONS,
+    ):
+        """Compile and execute a BrainFuck program without blocking the loop.
+
+        The JIT runs in bounded slices of `slice_iterations`; between
+        slices control returns to the event loop, so many sessions can
+        share one process. With `executor`, slices run there instead.
+        Output is written once per slice (or per full buffer) and the
+        writer is drained before execution continues.
+
+        Args:
+            cmd_line: BrainFuck commands, optionally with {LIB} imports.
+            reader: asyncio.StreamReader or async iterator of str, bytes
+                or int chunks. Each `,` consumes one value and reads -1
+                at end of input (or when no reader is given).
+            writer: asyncio.StreamWriter or any object with write(bytes)
+                and an optional async drain(). Defaults to stdout.
+            MAX_RECURSION: Maximum number of operations to execute.
+            timeout: Wall-clock budget in seconds, or None for no limit.
+            executor: Optional concurrent.futures executor for the slices.
+            slice_iterations: Iterations per JIT slice.
+
+        Returns:
+            Same as execute(). Cancelling the awaiting task also leaves a
+            resumable run behind before CancelledError propagates.
+        """
+        self._suspended = None
+        self.stats = {}
+        prepared = self._prepare(cmd_line)
+        if prepared is None:
+            return
+
+        ir_program, numeric_program, _ = prepared
+        return await self._run_async(
+            numeric_program,
+            ir_program,
+            0,
+            reader,
+            writer,
+            MAX_RECURSION,
+            timeout,
+            executor,
+            slice_iterations,
+        )
+
+    async def resume_async(
+        self,
+        reader=None,
+        writer=None,
+        MAX_RECURSION=10**5,
+        timeout=None,
+        executor=None,
+        slice_iterations=SLICE_ITERATIONS,
+    ):
+        """Asynchronous counterpart of resume(); see execute_async()."""
+        if self._suspended is None:
+            raise Exception("no suspended run to resume!")
+
+        numeric_program, ir_program, pc, _ = self._suspended
+        self._suspended = None
+        return await self._run_async(
+            numeric_program,
+            ir_program,
+            pc,
+            reader,
+            writer,
+            MAX_RECURSION,
+            timeout,
+            executor,
+            slice_iterations,
+        )
+
+    async def _run_async(
+        self,
+        numeric_program,
+        ir_program,
+        pc,
+        reader,
+        writer,
+        max_iterations,
+        timeout,
+        executor,
+        slice_iterations,
+    ):
+        """Async version of _run() built on the segmented JIT protocol."""
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        source = _AsyncInput(reader)
+
+        tape, tape_center, kernel = self._build_tape()
+        state = np.array(
+            [tape_center + self.pointer, np.int64(pc), np.int64(0)],
+            dtype=np.int64,
+        )
+        output_buf = np.empty(ASYNC_OUTPUT_BUF_SIZE, dtype=np.int32)
+        remaining = max_iterations
+        cancelled = False
+
+        try:
+            while True:
+                if state[1] >= len(numeric_program):
+                    status = STATUS_COMPLETE
+                    break
+                if remaining <= 0:
+                    status = STATUS_MAX_ITERATIONS
+                    break
+                if deadline is not None and time.monotonic() >= deadline:
+                    status = STATUS_TIMEOUT
+                    break
+
+                budget = min(remaining, slice_iterations)
+                if executor is None:
+                    jit_status, iters = _execute_segment(
+                        numeric_program, tape, state, output_buf, budget, kernel
+                    )
+                else:
+                    jit_status, iters, cancelled = await self._await_slice(
+                        loop.run_in_executor(
+                            executor,
+                            _execute_segment,
+                            numeric_program,
+                            tape,
+                            state,
+                            output_buf,
+                            budget,
+                            kernel,
+                        )
+                    )
+                remaining -= iters
+
+                if state[2]:
+                    text = self._render_outputs(output_buf[:state[2]])
+                    state[2] = 0
+                    await self._write_async(writer, text)
+                if cancelled:
+                    raise asyncio.CancelledError
+
+                if jit_status == STATUS_NEED_INPUT:
+                    value = await source.read()
+                    self._store_input(tape, tape_center, state, value)
+                    state[1] += 1
+
+                elif jit_status == STATUS_PRINT_CELLS:
+                    text = self._dump_cells(tape, tape_center, state)
+                    await self._write_async(writer, text + '\n')
+                    state[1] += 1
+
+                elif jit_status == STATUS_INFINITE_LOOP:
+                    status = STATUS_INFINITE_LOOP
+                    break
+
+                elif jit_status == STATUS_PRINT_HISTORY:
+                    cmd_history = self.history.text()
+                    text = '{} {}\n'.format(len(cmd_history), cmd_history)
+                    await self._write_async(writer, text)
+                    state[1] += 1
+
+                elif jit_status == STATUS_COMPLETE and executor is None:
+                    await asyncio.sleep(0)
+
+        except asyncio.CancelledError:
+            self._suspend(numeric_program, ir_program, int(state[1]), None)
+            raise
+
+        finally:
+            self._sync_state(tape, tape_center, state)
+
+        if status == STATUS_COMPLETE:
+            return None
+        self._suspend(numeric_program, ir_program, int(state[1]), None)
+        return status
+
+    @staticmethod
+    async def _await_slice(future):
+        """Wait for a slice running in an executor, even when cancelled.
+
+        Cancelling the task cannot stop the kernel, which keeps writing
+        the tape, state and output buffer until its slice ends, so the
+        slice is awaited to the end before the run is suspended.
+
+        Returns:
+            (status, iterations, cancelled) where cancelled tells whether
+            the task was cancelled while it waited.
+        """
+        cancelled = False
+        while True:
+            try:
+                status, iterations = await asyncio.shield(future)
+                return status, iterations, cancelled
+            except asyncio.CancelledError:
+                if future.cancelled():
+                    raise
+                cancelled = True
+
+    @staticmethod
+    async def _write_async(writer, text):
+        """Write rendered output to an async writer and wait for drain."""
+        if writer is None:
+            print(text, end='')
+            return
+        result = writer.write(text.encode('latin-1'))
+        if inspect.isawaitable(result):
+            await result
+        drain = getattr(writer, 'drain', None)
+        if drain is not None:
+            await drain()
+
+    def execute_batch(
+        self,
+        cmd_line,
+        inputs=None,
+        tapes=None,
+        MAX_RECURSION=10**5,
+        tape_len=BATCH_TAPE_SIZE,
+    ):
+        """Run one program over many inputs and tapes in lockstep.
+
+        The program is compiled once and executed by `execute_batch_jit`
+        across all lanes at the same time, which amortizes the dispatch
+        cost that running `execute` in a loop pays per lane. The instance
+        tape, pointer and history are left untouched.
+
+        Args:
+            cmd_line: BrainFuck program shared by all lanes.
+            inputs: One input (str or bytes) per lane; each `,` consumes
+                one value and reads -1 once the lane's input is exhausted.
+            tapes: Optional NumPy array of shape (batch, tape_len) with the
+                initial tapes, modified in-place. Every lane starts at
+                index 0. Zeroed tapes are allocated when omitted.
+            MAX_RECURSION: Maximum operations per lane.
+            tape_len: Tape length per lane when `tapes` is omitted.
+
+        Returns:
+            list: The output of every lane as a string.
+
+        Raises:
+            Exception: If brackets are not balanced or no lanes are given.
+        """
+        if not self.is_balanced(cmd_line):
+            raise Exception("brackets not balanced!")
+
+        if tapes is None:
+            if inputs is None:
+                raise Exception("execute_batch needs inputs or tapes")
+            tapes = np.zeros((len(inputs), tape_len), dtype=np.int32)
+        if inputs is None:
+            inputs = [None] * len(tapes)
+        if len(inputs) != len(tapes):
+            raise Exception("inputs and tapes must have the same batch size")
+
+        n_lanes = len(tapes)
+        expanded_cmd_line = self._resolve_imports(cmd_line)
+        numeric_program = convert_ir_to_numeric(
+            lex_ir(expanded_cmd_line)
+        )
+
+        lane_inputs = [self._input_values(data) for data in inputs]
+        input_lens = np.array([len(v) for v in lane_inputs], dtype=np.int64)
+        input_arr = np.zeros(
+            (n_lanes, max(1, int(input_lens.max(initial=0)))), dtype=np.int32
+        )
+        for lane, values in enumerate(lane_inputs):
+            input_arr[lane, :len(values)] = values
+
+        pointers = np.zeros(n_lanes, dtype=np.int64)
+        pcs = np.zeros(n_lanes, dtype=np.int64)
+        input_pos = np.zeros(n_lanes, dtype=np.int64)
+        output_buf = np.empty((n_lanes, BATCH_OUTPUT_BUF_SIZE), dtype=np.int32)
+        output_counts = np.zeros(n_lanes, dtype=np.int64)
+        iterations = np.zeros(n_lanes, dtype=np.int64)
+        outputs = [[] for _ in range(n_lanes)]
+
+        while True:
+            status = execute_batch_jit(
+                numeric_program,
+                tapes,
+                pointers,
+                pcs,
+                input_arr,
+                input_lens,
+                input_pos,
+                output_buf,
+                output_counts,
+                iterations,
+                MAX_RECURSION,
+            )
+            for lane in range(n_lanes):
+                count = output_counts[lane]
+                if count:
+                    outputs[lane].append(
+                        self._render_outputs(output_buf[lane, :count])
+                    )
+            output_counts[:] = 0
+            if status == STATUS_COMPLETE:
+                break
+
+        return [''.join(parts) for parts in outputs]
+
+    def save_tape(self, path='tape.json', format=None):
+        """Save the pointer and the non-zero cells to path.
+
+        The binary snapshot holds a small header, the pointer and the
+        program counter of a suspended run (0 if none) in a `state` array,
+        and the cells from the first to the last non-zero one as one raw
+        int32 array. JSON is kept as a readable export format.
+
+        Args:
+            path: Destination file.
+            format: 'json' or 'binary'; by default paths ending in .json
+                are written as JSON and anything else as a snapshot.
+        """
+        if format is None:
+            format = 'json' if path.lower().endswith('.json') else 'binary'
+
+        if format == 'binary':
+            pc = self._suspended[2] if self._suspended is not None else 0
+            state = np.array([self.pointer, pc], dtype=np.int64)
+            if isinstance(self.cells, PagedCells):
+                page_ids, pages = self.cells.allocated_pages()
+                meta = {'origin': self.cells.origin, 'page_size': PAGE_SIZE}
+                arrays = {
+                    'state': state,
+                    'tape': np.zeros(0, dtype=np.int32),
+                    'page_ids': page_ids,
+                    'pages': pages,
+                }
+            else:
+                origin, values = self.cells.to_array()
+                meta = {'origin': origin}
+                arrays = {'state': state, 'tape': values}
+            _write_container(path, SNAPSHOT_MAGIC, SNAPSHOT_VERSION, meta, arrays)
+            return
+
+        data = {'pointer': self.pointer, 'cells': {}}
+        for key, val in self.cells.items():
+            data['cells'][str(key)] = val
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+
+    def open_tape(self, path, size=MAPPED_TAPE_SIZE, dtype=np.uint8):
+        """Use a persistent memory-mapped file as the tape.
+
+        An existing snapshot (see save_tape) is mapped read-write as is,
+        restoring its pointer; otherwise a new sparse file with `size`
+        cells centred on cell 0 is created. The JIT then runs directly on
+        the mapping and every change, including the pointer, lives in the
+        file, so the tape survives across processes without a load step.
+
+        Args:
+            path: Tape file.
+            size: Number of cells of a new tape.
+            dtype: Cell type of a new tape (one byte per cell by default).
+
+        Raises:
+            Exception: If path exists but is not a tape snapshot.
+        """
+        if not os.path.exists(path):
+            _allocate_container(
+                path,
+                SNAPSHOT_MAGIC,
+                SNAPSHOT_VERSION,
+                {'origin': -(size // 2)},
+                {'state': (np.int64, (2,)), 'tape': (dtype, (size,))},
+            )
+
+        self.close_tape()
+        self.cells = MappedCells(path)
+        self.pointer = int(self.cells.state[0])
+
+    def close_tape(self):
+        """Flush and detach a tape opened with open_tape().
+
+        The instance continues with an empty in-memory tape.
+        """
+        if isinstance(self.cells, MappedCells):
+            self.cells.state[0] = self.pointer
+            self.cells.flush()
+            self.cells = self._cells_class()
+            self.pointer = 0
+
+    def load_tape(self, path):
+        """Restore the pointer and cells from a snapshot or JSON file.
+
+        Binary snapshots are memory-mapped and copied into the cells in
+        bulk; the format is detected from the file contents. Snapshots of
+        a paged tape only hold its allocated pages.
+
+        Raises:
+            Exception: If a snapshot has an unsupported format version.
+        """
+        if _is_container(path, SNAPSHOT_MAGIC):
+            version, meta, arrays = _read_container(path, SNAPSHOT_MAGIC)
+            if version != SNAPSHOT_VERSION:
+                raise Exception(
+                    'unsupported tape snapshot version: {}'.format(version)
+                )
+            self.pointer = int(arrays['state'][0])
+            self.cells = self._cells_class()
+            if 'page_ids' in arrays:
+                size = meta['page_size']
+                for page_id, page in zip(arrays['page_ids'], arrays['pages']):
+                    base = meta['origin'] + int(page_id) * size
+                    for i in np.flatnonzero(page).tolist():
+                        self.cells[base + i] = int(page[i])
+            else:
+                self.cells.load_array(meta['origin'], arrays['tape'])
+            return
+
+        with open(path) as f:
+            data = json.load(f)
+        self.pointer = data.get('pointer', 0)
+        self.cells = self._cells_class()
+        for key_str, value in data.get('cells', {}).items():
+            self.cells[int(key_str)] = value
+
+    def save_bytecode(self, cmd_line, path):
+        """Compile a program for a fresh tape and write it as bytecode.
+
+        The `.bfc` file is a container (see _write_container) holding the
+        optimized numeric program as its 'program' array, the cells of
+        its input-free prefix (see evaluate_prefix) as 'prefix_tape' and
+        its source map as the 'frames', 'pc_frame' and 'pc_offset' arrays
+        (see SourceMap). The header keeps the source, the import-resolved
+        source, the SHA-256 of every imported library, the passes, the
+        analysis results and the files of the source map.
+
+        Raises:
+            Exception: If brackets are not balanced or an import fails.
+        """
+        if not self.is_balanced(cmd_line):
+            raise Exception("brackets not balanced!")
+
+        libs = set()
+        texts = {}
+        expanded_cmd_line, char_frame, char_offset, frames = self._expand_imports(
+            cmd_line, np.arange(len(cmd_line), dtype=np.int32), libs, texts
+        )
+        _, numeric_program, info = self._compile(expanded_cmd_line, True)
+        source_map = info.get('source_map')
+        if source_map is None:
+            source_map = SourceMap.from_expansion(
+                self.source_name,
+                cmd_line,
+                (char_frame, char_offset, frames, texts),
+                info['positions'],
+            )
+        if 'prefix' not in info:
+            info['prefix'] = evaluate_prefix(numeric_program)
+
+        prefix = info['prefix']
+        prefix_tape = np.zeros(0, dtype=np.int32)
+        if prefix is not None:
+            prefix_tape = prefix['tape']
+            prefix = {k: v for k, v in prefix.items() if k != 'tape'}
+
+        meta = {
+            'source': cmd_line,
+            'expanded': expanded_cmd_line,
+            'libraries': self._library_hashes(libs),
+            'passes': self._program_key(expanded_cmd_line, True)[1],
+            'pointer_range': info['pointer_range'],
+            'peephole': info['peephole'],
+            'prefix': prefix,
+            'files': source_map.files,
+            'texts': source_map.texts,
+        }
+        _write_container(path, BYTECODE_MAGIC, BYTECODE_VERSION, meta, {
+            'program': numeric_program,
+            'prefix_tape': prefix_tape,
+            'frames': source_map.frames,
+            'pc_frame': source_map.pc_frame,
+            'pc_offset': source_map.pc_offset,
+        })
+
+    def load_bytecode(self, path):
+        """Load a `.bfc` file written by save_bytecode().
+
+        The program array is memory-mapped (copy-on-write) and installed
+        in the program cache, so executing the returned commands on a
+        fresh tape skips import resolution and compilation. A file with
+        another format version, imported libraries that changed since or
+        passes other than this instance's is recompiled from its source.
+
+        Returns:
+            The commands to pass to execute().
+
+        Raises:
+            Exception: If path is not a bytecode file, or has another
+                version and no source to recompile.
+        """
+        version, meta, arrays = _read_container(path, BYTECODE_MAGIC, mode='c')
+        if version != BYTECODE_VERSION:
+            if 'source' not in meta:
+                raise Exception('unsupported bytecode version: {}'.format(version))
+            print(
+                '{}: bytecode version {} != {}, recompiling'.format(
+                    path, version, BYTECODE_VERSION
+                ),
+                file=sys.stderr,
+            )
+            return meta['source']
+
+        libs = meta['libraries']
+        if any(
+            not self._find_library(lib) or self._library_hashes([lib]) != {lib: h}
+            for lib, h in libs.items()
+        ):
+            print('{}: libraries changed, recompiling'.format(path), file=sys.stderr)
+            return meta['source']
+
+        expanded_cmd_line = meta['expanded']
+        cache_key = self._program_key(expanded_cmd_line, True)
+        passes = meta['passes']
+        if cache_key[1] != (None if passes is None else tuple(passes)):
+            return meta['source']
+
+        numeric_program = arrays['program']
+        prefix = meta['prefix']
+        if prefix is not None:
+            prefix = dict(prefix, tape=np.asarray(arrays['prefix_tape']))
+        pointer_range = meta['pointer_range']
+        info = {
+            'pointer_range': None if pointer_range is None else tuple(pointer_range),
+            'peephole': meta['peephole'],
+            'prefix': prefix,
+            'source_map': SourceMap(
+                meta['files'],
+                meta['texts'],
+                arrays['frames'],
+                arrays['pc_frame'],
+                arrays['pc_offset'],
+            ),
+        }
+        ir_program = np.zeros(len(numeric_program), dtype=IR_DTYPE)
+        for column, field in enumerate(('op', 'arg', 'arg2')):
+            ir_program[field] = numeric_program[:, column]
+        _cache_program(cache_key, (ir_program, numeric_program, info))
+        return expanded_cmd_line
+
+    def interpreter(self, MAX_RECURSION=10**5, timeout=None, warm_up=True):
+        """Run the REPL until `quit`, `exit` or an empty line.
+
+        With warm_up, the JIT kernels compile in the background (see
+        JitWarmUp) while the first prompt is shown.
+        """
+        if warm_up and not self.tracing:
+            start_warm_up()
+        while True:
+            cmd_line = input('>> ')
+            while not self.is_balanced(cmd_line):
+                tmp = input('.. ')
+                cmd_line = cmd_line + tmp if tmp else 'skip'
+            if cmd_line == 'help':
+                print(help_text)
+            elif cmd_line in ('quit', 'exit'):
+                break
+            elif cmd_line.startswith('save'):
+                parts = cmd_line.split(maxsplit=1)
+                path = parts[1] if len(parts) > 1 else 'tape.json'
+                self.save_tape(path)
+                print(f'Tape saved to {path}')
+            elif not cmd_line:
+                break
+            elif cmd_line.partition(' ')[0] in _DEBUG_COMMANDS:
+                self._debug_command(cmd_line.split(), MAX_RECURSION, timeout)
+            else:
+                status = self.execute(cmd_line, MAX_RECURSION, timeout=timeout)
+                message = _stop_message(status, self.stats)
+                if message:
+                    print(message)
+                if status in (STATUS_BREAKPOINT, STATUS_WATCHPOINT):
+                    self.print_cells()
+
+    def _debug_command(self, words, MAX_RECURSION, timeout):
+        """Run a debugging command of the REPL (see help_text)."""
+        command, args = words[0], words[1:]
+        try:
+            if command == 'break':
+                for arg in args:
+                    SourceMap.parse_location(arg)
+            elif command in ('watch', 'unwatch'):
+                args = [int(arg) for arg in args]
+            elif args and command in ('step', 'continue'):
+                args = [int(args[0])]
+                if args[0] < 1:
+                    raise ValueError(args[0])
+        except ValueError:
+            args = None
+        if args is None:
+            print('Usage: {}'.format(_DEBUG_COMMANDS[command]))
+        elif command in ('break', 'watch'):
+            points = self.breakpoints if command == 'break' else self.watchpoints
+            points.update(args)
+            if not args:
+                print(' '.join(str(point) for point in sorted(points)))
+        elif command == 'unbreak':
+            self.breakpoints.difference_update(args)
+        elif command == 'unwatch':
+            self.watchpoints.difference_update(args)
+        elif self._suspended is None:
+            print('No stopped command to {}.'.format(command))
+        else:
+            budget = args[0] if args else 1
+            if command == 'continue':
+                budget = MAX_RECURSION
+            else:
+                # a closed-form loop costing more than budget still steps
+                self._step_over = True
+            status = self.resume(budget, timeout=timeout)
+            message = _stop_message(status, self.stats)
+            if status == STATUS_MAX_ITERATIONS and command == 'step':
+                message = 'Stopped at {}'.format(self.stats['stopped_at'])
+            if message:
+                print(message)
+            if status is not None:
+                self.print_cells()
+
+
+class _TeeOutput:
+    """File-like object copying everything written to another file."""
+
+    def __init__(self, output_file=None):
+        self._output_file = output_file
+        self._parts = []
+
+    def write(self, text):
+        self._parts.append(text)
+        output_file = self._output_file
+        return (sys.stdout if output_file is None else output_file).write(text)
+
+    def flush(self):
+        (sys.stdout if self._output_file is None else self._output_file).flush()
+
+    def getvalue(self):
+        return ''.join(self._parts)
+
+
+class _AsyncInput:
+    """Feed `,` one value at a time from an async source.
+
+    The source is an asyncio.StreamReader (anything with an async read())
+    or an async iterator of str, bytes or int chunks.
+    """
+
+    def __init__(self, reader):
+        self._reader = reader
+        self._values = []
+        self._pos = 0
+
+    async def _next_chunk(self):
+        if hasattr(self._reader, 'read'):
+            return await self._reader.read(4096)
+        try:
+            return await anext(self._reader)
+        except StopAsyncIteration:
+            return None
+
+    async def read(self):
+        """Return the next input value, or -1 at end of input."""
+        while self._pos >= len(self._values):
+            if self._reader is None:
+                return -1
+            chunk = await self._next_chunk()
+            if chunk is None or (not isinstance(chunk, int) and not chunk):
+                self._reader = None
+                return -1
+            if isinstance(chunk, int):
+                self._values = [chunk]
+            elif isinstance(chunk, str):
+                self._values = [ord(c) for c in chunk]
+            else:
+                self._values = list(chunk)
+            self._pos = 0
+
+        value = self._values[self._pos]
+        self._pos += 1
+        return value
+
+
+class Cells:
+    """Optimized cell storage using list for positive indices, dict for negative."""
+
+    def __init__(self):
+        self._tape = [0] * 30000
+        self._sparse = defaultdict(int)
+
+    def __getitem__(self, key):
+        """Return cell value at key, 0 if undefined."""
+        if 0 <= key < len(self._tape):
+            return self._tape[key]
+        return self._sparse[key]
+
+    def __setitem__(self, key, value):
+        """Set cell value at key."""
+        if 0 <= key < len(self._tape):
+            self._tape[key] = value
+        else:
+            if value == 0:
+                if key in self._sparse:
+                    del self._sparse[key]
+            else:
+                self._sparse[key] = value
+
+    def items(self):
+        """Return (index, value) pairs of all non-zero cells in order."""
+        dense = np.array(self._tape, dtype=np.int64)
+        pairs = [(int(i), int(dense[i])) for i in np.flatnonzero(dense)]
+        pairs.extend((k, v) for k, v in self._sparse.items() if v != 0)
+        return sorted(pairs)
+
+    def to_array(self):
+        """Return (origin, values) with every non-zero cell.
+
+        values is an int32 array whose element i holds cell origin + i;
+        it spans the first to the last non-zero cell (empty if none).
+        """
+        dense = np.array(self._tape, dtype=np.int32)
+        nonzero = np.flatnonzero(dense)
+        sparse = [k for k, v in self._sparse.items() if v != 0]
+        if not len(nonzero) and not sparse:
+            return 0, np.zeros(0, dtype=np.int32)
+
+        bounds = list(sparse)
+        if len(nonzero):
+            bounds += [int(nonzero[0]), int(nonzero[-1])]
+        origin, last = min(bounds), max(bounds)
+        values = np.zeros(last - origin + 1, dtype=np.int32)
+        if len(nonzero):
+            lo, hi = int(nonzero[0]), int(nonzero[-1]) + 1
+            values[lo - origin:hi - origin] = dense[lo:hi]
+        for key in sparse:
+            values[key - origin] = self._sparse[key]
+        return origin, values
+
+    def add_block(self, origin, deltas):
+        """Add deltas[i] to cell origin + i, wrapping at 256.
+
+        A window inside the dense list is updated with one NumPy add;
+        like _add_cells, cells with a zero delta are left as they are.
+        """
+        end = origin + len(deltas)
+        if 0 <= origin and end <= len(self._tape):
+            window = np.array(self._tape[origin:end])
+            touched = np.flatnonzero(deltas)
+            window[touched] = (window[touched] + deltas[touched]) & 0xFF
+            self._tape[origin:end] = window.tolist()
+        else:
+            self._add_cells(origin, deltas)
+
+    def _add_cells(self, origin, deltas):
+        """Add deltas[i] to cell origin + i, one cell at a time."""
+        for key, delta in enumerate(np.asarray(deltas).tolist(), origin):
+            if delta:
+                self[key] = (self[key] + delta) & 0xFF
+
+    def load_array(self, origin, values):
+        """Replace the cells with values, element i being cell origin + i."""
+        self._tape = [0] * len(self._tape)
+        self._sparse = defaultdict(int)
+
+        size = len(self._tape)
+        lo = min(max(origin, 0), size)
+        hi = max(min(origin + len(values), size), lo)
+        self._tape[lo:hi] = np.asarray(values[lo - origin:hi - origin]).tolist()
+
+        for i in np.flatnonzero(values).tolist():
+            key = origin + i
+            if not 0 <= key < size:
+                self._sparse[key] = int(values[i])
+
+    def update_array(self, origin, values):
+        """Overwrite cells origin .. origin + len(values) - 1 with values.
+
+        Cells outside that range are kept.
+        """
+        size = len(self._tape)
+        end = origin + len(values)
+        lo = min(max(origin, 0), size)
+        hi = max(min(end, size), lo)
+        self._tape[lo:hi] = np.asarray(values[lo - origin:hi - origin]).tolist()
+
+        for key in [k for k in self._sparse if origin <= k < end]:
+            del self._sparse[key]
+        for i in np.flatnonzero(values).tolist():
+            key = origin + i
+            if not 0 <= key < size:
+                self._sparse[key] = int(values[i])
+
+    def backup(self):
+        """Return a copy of the cells."""
+        new_cells = Cells()
+        new_cells._tape = self._tape[:]
+        new_cells._sparse = defaultdict(int)
+        for key, value in self._sparse.items():
+            new_cells._sparse[key] = value
+        return new_cells
+
+    def print_pos(self, pos):
+        """Print all the cells and the pointer."""
+        origin, values = self.to_array()
+        if not len(values):
+            origin = pos
+        first = min(origin, pos)
+        window = np.zeros(max(origin + len(values), pos + 1) - first, dtype=np.int64)
+        window[origin - first:origin - first + len(values)] = values
+        return format_cells(first, window, pos)
+
+
+class PagedCells(Cells):
+    """Sparse cells stored in fixed-size pages allocated on first write.
+
+    The tape spans PAGE_TABLE_SIZE * PAGE_SIZE cells centred on cell 0.
+    `page_table` maps each page number to a row of the `pages` pool (-1
+    while the page has never been written) and the pool doubles when it
+    is full, so memory grows with the number of touched pages rather
+    than with the distance the pointer travels. The same arrays are
+    handed to execute_paged_jit, so the JIT runs on the cells in place.
+
+    Attributes:
+        origin (int): Cell index at virtual position 0.
+        page_table (np.ndarray): Pool row of every page, or -1.
+        pages (np.ndarray): Page pool of shape (capacity, PAGE_SIZE).
+        page_count (np.ndarray): Number of pool rows in use, as a 1-element
+            array the JIT can update.
+    """
+
+    def __init__(self, capacity=PAGED_INITIAL_PAGES):
+        self.origin = -(PAGE_TABLE_SIZE << PAGE_SHIFT) // 2
+        self.page_table = np.full(PAGE_TABLE_SIZE, -1, dtype=np.int32)
+        self.pages = np.zeros((capacity, PAGE_SIZE), dtype=np.int32)
+        self.page_count = np.zeros(1, dtype=np.int64)
+
+    def _locate(self, key):
+        """Return (page, offset) of key, or (None, None) if out of range."""
+        idx = key - self.origin
+        if not 0 <= idx < PAGE_TABLE_SIZE << PAGE_SHIFT:
+            return None, None
+        return idx >> PAGE_SHIFT, idx & PAGE_MASK
+
+    def _grow(self):
+        """Double the page pool."""
+        pages = np.zeros((2 * len(self.pages), PAGE_SIZE), dtype=self.pages.dtype)
+        pages[:len(self.pages)] = self.pages
+        self.pages = pages
+
+    def __getitem__(self, key):
+        """Return cell value at key, 0 if its page was never written."""
+        page, offset = self._locate(key)
+        if page is None or self.page_table[page] < 0:
+            return 0
+        return int(self.pages[self.page_table[page], offset])
+
+    def __setitem__(self, key, value):
+        """Set cell value at key, allocating its page if needed.
+
+        Raises:
+            IndexError: If key is outside the paged tape.
+        """
+        page, offset = self._locate(key)
+        if page is None:
+            raise IndexError('cell {} is outside the paged tape'.format(key))
+        row = self.page_table[page]
+        if row < 0:
+            if value == 0:
+                return
+            if self.page_count[0] >= len(self.pages):
+                self._grow()
+            row = self.page_count[0]
+            self.page_table[page] = row
+            self.page_count[0] += 1
+        self.pages[row, offset] = value
+
+    def allocated_pages(self):
+        """Return (page_ids, pages) of the allocated pages in tape order."""
+        page_ids = np.flatnonzero(self.page_table >= 0)
+        return page_ids, self.pages[self.page_table[page_ids]]
+
+    def items(self):
+        """Return (index, value) pairs of all non-zero cells in order."""
+        page_ids, pages = self.allocated_pages()
+        rows, offsets = np.nonzero(pages)
+        keys = self.origin + (page_ids[rows] << PAGE_SHIFT) + offsets
+        return list(zip(keys.tolist(), pages[rows, offsets].tolist()))
+
+    add_block = Cells._add_cells
+
+    def to_array(self):
+        """Return (origin, values) with every non-zero cell."""
+        pairs = self.items()
+        if not pairs:
+            return 0, np.zeros(0, dtype=np.int32)
+        origin = pairs[0][0]
+        values = np.zeros(pairs[-1][0] - origin + 1, dtype=np.int32)
+        for key, value in pairs:
+            values[key - origin] = value
+        return origin, values
+
+    def load_array(self, origin, values):
+        """Replace the cells with values, element i being cell origin + i."""
+        self.page_table[:] = -1
+        self.pages[:] = 0
+        self.page_count[0] = 0
+        for i in np.flatnonzero(values).tolist():
+            self[origin + i] = int(values[i])
+
+    def update_array(self, origin, values):
+        """Overwrite cells origin .. origin + len(values) - 1 with values."""
+        for i, value in enumerate(np.asarray(values).tolist()):
+            self[origin + i] = value
+
+    def backup(self):
+        """Return a copy of the cells."""
+        new_cells = PagedCells(len(self.pages))
+        new_cells.page_table[:] = self.page_table
+        new_cells.pages[:] = self.pages
+        new_cells.page_count[:] = self.page_count
+        return new_cells
+
+    def execute(self, program, state, output_buf, max_iterations):
+        """Run execute_paged_jit on these cells, growing the pool as needed.
+
+        Returns:
+            (status, iterations) as returned by execute_jit.
+        """
+        iterations = 0
+        while True:
+            status, iters = execute_paged_jit(
+                program,
+                self.pages,
+                self.page_table,
+                self.page_count,
+                state,
+                output_buf,
+                max_iterations - iterations,
+            )
+            iterations += iters
+            if status != STATUS_PAGE_FAULT:
+                return status, iterations
+            self._grow()
+
+
+class MappedCells(Cells):
+    """Cells stored in a memory-mapped tape snapshot file.
+
+    The file is a tape snapshot (see BrainFuck.save_tape) opened
+    read-write: `array` maps its cells and `state` its [pointer, pc]
+    header, so writes go straight to the OS page cache and the file.
+
+    Attributes:
+        path (str): Snapshot file.
+        origin (int): Cell index stored at array[0].
+        array (np.memmap): Cell values.
+        state (np.memmap): Persisted [pointer, pc].
+    """
+
+    def __init__(self, path):
+        version, meta, arrays = _read_container(path, SNAPSHOT_MAGIC, 'r+')
+        if version != SNAPSHOT_VERSION:
+            raise Exception('unsupported tape snapshot version: {}'.format(version))
+        if 'page_ids' in arrays:
+            raise Exception('{} is a paged tape snapshot'.format(path))
+        self.path = path
+        self.origin = meta['origin']
+        self.array = arrays['tape']
+        self.state = arrays['state']
+
+    def __getitem__(self, key):
+        """Return cell value at key, 0 outside the mapped range."""
+        idx = key - self.origin
+        if 0 <= idx < len(self.array):
+            return int(self.array[idx])
+        return 0
+
+    def __setitem__(self, key, value):
+        """Set cell value at key.
+
+        Raises:
+            IndexError: If key is outside the mapped range.
+        """
+        idx = key - self.origin
+        if not 0 <= idx < len(self.array):
+            raise IndexError('cell {} is outside the mapped tape'.format(key))
+        # wrap like the JIT does when storing e.g. EOF (-1) in a byte cell
+        self.array[idx] = np.int64(value).astype(self.array.dtype)
+
+    def items(self):
+        """Return (index, value) pairs of all non-zero cells in order."""
+        return [
+            (int(i) + self.origin, int(self.array[i]))
+            for i in np.flatnonzero(self.array)
+        ]
+
+    add_block = Cells._add_cells
+
+    def to_array(self):
+        """Return (origin, values) with every non-zero cell."""
+        nonzero = np.flatnonzero(self.array)
+        if not len(nonzero):
+            return 0, np.zeros(0, dtype=np.int32)
+        lo, hi = int(nonzero[0]), int(nonzero[-1]) + 1
+        return lo + self.origin, self.array[lo:hi].astype(np.int32)
+
+    def load_array(self, origin, values):
+        """Replace the cells with values, element i being cell origin + i."""
+        self.array[:] = 0
+        for i in np.flatnonzero(values).tolist():
+            self[origin + i] = int(values[i])
+
+    def update_array(self, origin, values):
+        """Overwrite cells origin .. origin + len(values) - 1 with values."""
+        for i, value in enumerate(np.asarray(values).tolist()):
+            self[origin + i] = value
+
+    def backup(self):
+        """Return the cells themselves; mapped tapes are not copied."""
+        return self
+
+    def flush(self):
+        """Write dirty pages back to the file."""
+        self.array.flush()
+        self.state.flush()
+
+
+class SourceMap:
+    """Map program counters of a compiled program back to source files.
+
+    Every instruction has a frame and an offset: frames are the program
+    itself (frame 0) and every inlined `{LIB}` import, the offset is the
+    position of the instruction's first command in that frame's file.
+    Instructions made by the peephole passes point at the first command
+    they replace.
+
+    Args:
+        files: File names; files[0] is the program.
+        texts: Text of each file, used for line and column numbers.
+        frames: int32 array of (file_id, parent_frame, site) rows, site
+            being the offset of the `{LIB}` in the parent frame's file;
+            frame 0 has parent -1.
+        pc_frame: int32 array, the frame of every instruction.
+        pc_offset: int32 array, the offset of every instruction.
+
+    Examples:
+
+        >>> bf = BrainFuck()
+        >>> _ = bf._prepare('.\\n{p5}')
+        importing: bflib/p5.bf
+        >>> bf.source_map.describe(1)
+        'bflib/p5.bf:6:1 via <input>:2:1'
+
+    """
+
+    def __init__(self, files, texts, frames, pc_frame, pc_offset):
+        self.files = files
+        self.texts = texts
+        self.frames = frames
+        self.pc_frame = pc_frame
+        self.pc_offset = pc_offset
+
+    @classmethod
+    def from_expansion(cls, name, text, expansion, positions):
+        """Build a source map from _expand_imports() results.
+
+        Args:
+            name: Name of the program, such as '<input>' or its path.
+            text: The program before import resolution.
+            expansion: (char_frame, char_offset, frames, texts), where
+                texts maps library names to their file text.
+            positions: int32 array, the index in the resolved program
+                of every instruction's first command.
+        """
+        char_frame, char_offset, frame_list, lib_texts = expansion
+        files = [name]
+        texts = [text]
+        file_ids = {}
+        frames = np.empty((len(frame_list), 3), dtype=np.int32)
+        for i, (frame_name, parent, site) in enumerate(frame_list):
+            file_id = 0
+            if parent >= 0:
+                if frame_name not in file_ids:
+                    file_ids[frame_name] = len(files)
+                    files.append(frame_name)
+                    texts.append(lib_texts[frame_name])
+                file_id = file_ids[frame_name]
+            frames[i] = (file_id, parent, site)
+        return cls(
+            files, texts, frames, char_frame[positions], char_offset[positions]
+        )
+
+    def _location(self, file_id, offset):
+        text = self.texts[file_id]
+        line = text.count('\n', 0, offset) + 1
+        column = offset - text.rfind('\n', 0, offset)
+        return self.files[file_id], line, column
+
+    def locate(self, pc):
+        """Return (file, line, column) of instruction pc (1-based)."""
+        frame = self.pc_frame[pc]
+        return self._location(self.frames[frame, 0], int(self.pc_offset[pc]))
+
+    def chain(self, pc):
+        """Return the (file, line, column) of instruction pc followed by
+        the `{LIB}` imports leading to it, innermost first."""
+        locations = [self.locate(pc)]
+        frame = self.pc_frame[pc]
+        while self.frames[frame, 1] >= 0:
+            site = int(self.frames[frame, 2])
+            frame = self.frames[frame, 1]
+            locations.append(self._location(self.frames[frame, 0], site))
+        return locations
+
+    def describe(self, pc):
+        """Return 'file:line:column' of pc, with ' via ' and its imports."""
+        if not 0 <= pc < len(self.pc_frame):
+            return 'end of {}'.format(self.files[0])
+        return ' via '.join('{}:{}:{}'.format(*loc) for loc in self.chain(pc))
+
+    @staticmethod
+    def parse_location(location):
+        """Split 'LINE:COLUMN' or 'FILE:LINE:COLUMN' into its parts.
+
+        Returns:
+            (file, line, column), file being None for 'LINE:COLUMN'.
+
+        Raises:
+            ValueError: If location is not of this form.
+        """
+        parts = location.rsplit(':', 2)
+        if len(parts) < 2 or not all(p.isdigit() and int(p) for p in parts[-2:]):
+            raise ValueError('invalid location: {}'.format(location))
+        name = parts[0] if len(parts) == 3 else None
+        return name, int(parts[-2]), int(parts[-1])
+
+    def find(self, location):
+        """Return the instructions at a source location.
+
+        Args:
+            location: 'LINE:COLUMN' in the program or 'FILE:LINE:COLUMN'
+                (1-based, as describe() prints them).
+
+        Returns:
+            List of program counters, one per inlining of the file: the
+            instruction whose first command is nearest at or before the
+            location, the earliest one if several start there.
+
+        Raises:
+            ValueError: If location is not of this form.
+        """
+        name, line, column = self.parse_location(location)
+        name = self.files[0] if name is None else name
+        if name not in self.files:
+            return []
+        file_id = self.files.index(name)
+        text = self.texts[file_id]
+        start = 0
+        for _ in range(line - 1):
+            start = text.find('\n', start) + 1
+            if not start:
+                return []
+        offset = start + column - 1
+
+        pcs = []
+        for frame in np.flatnonzero(self.frames[:, 0] == file_id).tolist():
+            before = np.flatnonzero(
+                (self.pc_frame == frame) & (self.pc_offset <= offset)
+            )
+            if len(before):
+                offsets = self.pc_offset[before]
+                pcs.append(int(before[np.argmax(offsets == offsets.max())]))
+        return pcs
+
+    def instructions_per_file(self):
+        """Return {file: number of instructions compiled from it}."""
+        counts = np.bincount(
+            self.frames[self.pc_frame, 0], minlength=len(self.files)
+        )
+        return {name: int(count) for name, count in zip(self.files, counts)}
+
+
+class Heatmap:
+    """Cell accesses counted by a profiled run (see BrainFuck.profile).
+
+    `+`/`-` runs read and write their cell, `.`, `[` and `]` read it and
+    `,` writes it; moves touch no cell but extend the pointer range.
+
+    Attributes:
+        cells (np.ndarray): Every cell read or written, in order.
+        reads (np.ndarray): Number of reads of each of cells.
+        writes (np.ndarray): Number of writes of each of cells.
+        pointer_range (tuple): (lowest, highest) cell the pointer was on.
+        max_value (int): Largest value a cell held, 0 to 255 on the byte
+            tapes of the JIT.
+
+    Examples:
+
+        >>> bf = BrainFuck(profile=True)
+        >>> bf.execute('++[>+++<-]')
+        >>> print(bf.heatmap.render('csv'), end='')
+        cell,reads,writes
+        0,7,3
+        1,2,2
+
+    """
+
+    def __init__(self, cells, reads, writes, pointer_range, max_value):
+        self.cells = cells
+        self.reads = reads
+        self.writes = writes
+        self.pointer_range = pointer_range
+        self.max_value = max_value
+
+    @classmethod
+    def from_counts(cls, tape, tape_center, reads, writes, extent):
+        """Build a heatmap from the arrays of execute_profile_jit.
+
+        Args:
+            tape: The tape the run left, indexed like reads and writes.
+            tape_center: Index of cell 0 on the tape.
+            reads, writes: Access counts of every tape index.
+            extent: [lowest pointer, highest pointer, largest value], as
+                tape indices.
+        """
+        touched = np.flatnonzero(reads + writes)
+        max_value = int(extent[2])
+        if len(touched):
+            max_value = max(max_value, int(tape[touched].max()))
+        return cls(
+            touched - tape_center,
+            reads[touched],
+            writes[touched],
+            (int(extent[0]) - tape_center, int(extent[1]) - tape_center),
+            max_value,
+        )
+
+    def rows(self):
+        """Return (cell, reads, writes) tuples in cell order."""
+        return list(zip(
+            self.cells.tolist(), self.reads.tolist(), self.writes.tolist()
+        ))
+
+    def render(self, format='text', width=HEATMAP_WIDTH):
+        """Render the heatmap as 'text', 'json' or 'csv'.
+
+        Text has a summary line and one line per cell with a bar of up to
+        width `#` scaled to its accesses.
+
+        Raises:
+            ValueError: If format is unknown.
+        """
+        if format == 'json':
+            return json.dumps({
+                'pointer_range': list(self.pointer_range),
+                'max_value': self.max_value,
+                'cells': [
+                    {'cell': cell, 'reads': reads, 'writes': writes}
+                    for cell, reads, writes in self.rows()
+                ],
+            })
+        if format == 'csv':
+            lines = ['cell,reads,writes']
+            lines.extend('{},{},{}'.format(*row) for row in self.rows())
+            return '\n'.join(lines) + '\n'
+        if format != 'text':
+            raise ValueError('unknown heatmap format: {}'.format(format))
+
+        lines = ['pointer range {}..{}, max value {}, {} cells touched'.format(
+            *self.pointer_range, self.max_value, len(self.cells)
+        )]
+        total = self.reads + self.writes
+        peak = int(total.max()) if len(total) else 0
+        for (cell, reads, writes), accesses in zip(self.rows(), total.tolist()):
+            bar = '#' * max(1, accesses * width // peak)
+            lines.append('{:>6} {:>10} {:>10} {}'.format(cell, reads, writes, bar))
+        return '\n'.join(lines) + '\n'
+
+
+class TraceCompiler:
+    """Compile the hot loops of the interpreted fallback to closures.
+
+    _execute_interpreted() calls enter() whenever it is about to run
+    the body of a loop. Once a loop has been entered `threshold` times
+    its body is recorded and, when it is straight-line code (no nested
+    `[...]`, `,`, `*` or `&`), turned into Python source with every
+    pointer offset folded in and compiled to a closure over the dense
+    list of a Cells tape. Closures run whole iterations and leave
+    through guards, handing the interpreter the exact pointer, pc and
+    instruction count, whenever the pointer could leave the list, the
+    budget could run out or a closed-form loop inside cannot finish.
+    Everything else stays interpreted.
+
+    Attributes:
+        threshold (int): Loop entries before a loop is compiled.
+        traces (dict): {pc of `[`: closure, or None if not traceable}.
+        iterations (Counter): {pc of `[`: instructions its closure ran}.
+        trace_time (float): Seconds spent in closures.
+        instructions (int): Instructions of the whole run, traces
+            included, set by _execute_interpreted().
+    """
+
+    def __init__(self, threshold=TRACE_THRESHOLD):
+        self.threshold = threshold
+        self.traces = {}
+        self.iterations = Counter()
+        self.trace_time = 0.0
+        self.instructions = 0
+        self._entries = Counter()
+
+    def enter(self, ir_program, pc):
+        """Count an entry of the loop at pc and return its closure or None."""
+        if pc in self.traces:
+            return self.traces[pc]
+        self._entries[pc] += 1
+        if self._entries[pc] < self.threshold:
+            return None
+        self.traces[pc] = self.compile(ir_program, pc)
+        return self.traces[pc]
+
+    def run(self, pc, trace, tape, pointer, budget, emit):
+        """Run trace, the closure of the loop at pc, and time it.
+
+        Returns:
+            (pointer, instructions, pc) to continue the interpreter with.
+        """
+        start = time.perf_counter()
+        result = trace(tape, pointer, budget, emit)
+        self.trace_time += time.perf_counter() - start
+        self.iterations[pc] += result[1]
+        return result
+
+    def speedup(self, total_time):
+        """Return how many times faster traces ran than the interpreter.
+
+        Args:
+            total_time: Seconds the whole run took.
+
+        Returns:
+            The ratio of instructions per second, or None if either
+            side ran too little to tell.
+        """
+        traced = sum(self.iterations.values())
+        interpreted = self.instructions - traced
+        interpreted_time = total_time - self.trace_time
+        if min(traced, interpreted, self.trace_time, interpreted_time) <= 0:
+            return None
+        return (traced / self.trace_time) / (interpreted / interpreted_time)
+
+    @staticmethod
+    def compile(ir_program, header):
+        """Compile the loop starting at header, the pc of its `[`.
+
+        Instructions are counted as _execute_interpreted() counts them:
+        1 for the `[` entering the body, nothing for a `]` jumping back
+        and 1 for the `]` leaving the loop.
+
+        Returns:
+            A function (tape, pointer, budget, emit) -> (pointer,
+            instructions, pc), or None if the body is not straight-line.
+        """
+        end = ir_program[header][1] - 1
+        lines = []
+        offset = low = high = 0
+        fixed = 2
+        pending = 1
+
+        def cell(k):
+            if not k:
+                return 't[p]'
+            return 't[p {} {}]'.format('+' if k > 0 else '-', abs(k))
+
+        def add(k, value):
+            c = cell(k)
+            lines.append('{} = ({} + {}) & 0xFF'.format(c, c, value))
+
+        skip = 0
+        for pc in range(header + 1, end):
+            if pc < skip:
+                # a loop kept after a closed-form one
+                continue
+            op = ir_program[pc]
+            tag = op[0]
+            if tag == 'add':
+                add(offset, op[1])
+                cost = 1
+            elif tag == 'move':
+                offset += op[1]
+                cost = 1
+            elif tag == 'add_move':
+                add(offset, op[1])
+                offset += op[2]
+                cost = 2
+            elif tag == 'move_add':
+                offset += op[1]
+                add(offset, op[2])
+                cost = 2
+            elif tag == 'output':
+                lines.append('emit({})'.format(cell(offset)))
+                cost = 1
+            elif tag == 'output_run':
+                for k in range(op[1]):
+                    if k:
+                        offset += op[2]
+                        low, high = min(low, offset), max(high, offset)
+                    lines.append('emit({})'.format(cell(offset)))
+                cost = 2 * op[1] - 1
+            elif tag == 'linear_loop':
+                if pending:
+                    lines.append('iters += {}'.format(pending))
+                    pending = 0
+                c = cell(offset)
+                lines += [
+                    'v = {}'.format(c),
+                    'if v:',
+                    '    trips = trip_count(v, {})'.format(op[1]),
+                    '    if trips < 0 or iters + trips * {} + FIXED > budget:'.format(
+                        op[2] + 2
+                    ),
+                    '        return p + {}, iters, {}'.format(offset, pc),
+                ]
+                terms = pc + 1
+                while ir_program[terms][0] == 'loop_term':
+                    terms += 1
+                skip = ir_program[terms][1]
+                for term in ir_program[pc + 1:terms]:
+                    t = cell(offset + term[1])
+                    lines.append(
+                        '    {} = ({} + trips * {}) & 0xFF'.format(t, t, term[2])
+                    )
+                    low = min(low, offset + term[1])
+                    high = max(high, offset + term[1])
+                lines += [
+                    '    {} = (v + trips * {}) & 0xFF'.format(c, op[1]),
+                    '    iters += trips * {}'.format(op[2] + 2),
+                    'else:',
+                    '    iters += 1',
+                ]
+                fixed += 1
+                continue
+            elif tag in ('loop_term', 'delta_block', 'block_delta', 'block_end'):
+                # a delta block is traced through the run it summarizes
+                continue
+            else:
+                return None
+            pending += cost
+            fixed += cost
+            low, high = min(low, offset), max(high, offset)
+
+        source = '\n'.join(
+            [
+                'def trace(t, p, budget, emit):',
+                '    iters = 0',
+                '    while True:',
+                '        if p + LOW < 0 or p + HIGH >= len(t) or (',
+                '            iters + FIXED > budget',
+                '        ):',
+                '            return p, iters, {}'.format(header),
+            ]
+            + ['        ' + line for line in lines]
+            + [
+                '        iters += {}'.format(pending),
+                '        p += {}'.format(offset),
+                '        if not t[p]:',
+                '            return p, iters + 1, {}'.format(end + 1),
+            ]
+        )
+        namespace = {
+            'LOW': low,
+            'HIGH': high,
+            'FIXED': fixed,
+            'trip_count': loop_trip_count,
+        }
+        exec(source, namespace)
+        return namespace['trace']
+
+
+class CommandHistory:
+    """Bounded history of the commands run by a BrainFuck session.
+
+    Commands are kept as typed, with references to the code of the
+    libraries they import, in a ring of the `size` most recent ones;
+    the import-resolved text printed by `&` is rebuilt on demand and
+    cached until the history changes. Library code is stored once per
+    version (by SHA-256) and dropped with the last command using it, so
+    memory stays flat however long the session runs. With a path,
+    commands leaving the ring are appended, resolved, to that file and
+    still printed by `&`.
+
+    Args:
+        size: Commands kept in memory (at least 1).
+        path: Optional file receiving the commands dropped from memory;
+            it is truncated when the history is created.
+
+    Examples:
+
+        >>> history = CommandHistory(size=2)
+        >>> for cmd in ('+', '{lib}.', '>'):
+        ...     history.append(cmd, {'lib': '--'})
+        >>> history.text()
+        '--.>'
+
+    """
+
+    def __init__(self, size=HISTORY_SIZE, path=None):
+        self.size = size
+        self.path = path
+        self._entries = deque()
+        self._libraries = {}
+        self._references = Counter()
+        self._text = ''
+        if path is not None:
+            open(path, 'w').close()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _resolve(self, entry):
+        cmd_line, libraries = entry
+        for lib, digest in libraries:
+            cmd_line = cmd_line.replace(
+                '{{{}}}'.format(lib), self._libraries[digest]
+            )
+        return cmd_line
+
+    def _release(self, entry):
+        for _, digest in entry[1]:
+            self._references[digest] -= 1
+            if not self._references[digest]:
+                del self._references[digest]
+                del self._libraries[digest]
+
+    def append(self, cmd_line, libraries):
+        """Record a command.
+
+        Args:
+            cmd_line: The command as typed, with its {LIB} imports.
+            libraries: {lib: code} of every library cmd_line imports.
+        """
+        references = []
+        for lib, code in libraries.items():
+            digest = hashlib.sha256(code.encode('utf-8')).hexdigest()
+            self._libraries.setdefault(digest, code)
+            self._references[digest] += 1
+            references.append((lib, digest))
+        self._entries.append((cmd_line, tuple(references)))
+        self._text = None
+
+        while len(self._entries) > self.size:
+            entry = self._entries.popleft()
+            if self.path is not None:
+                with open(self.path, 'a') as f:
+                    f.write(self._resolve(entry))
+            self._release(entry)
+
+    def pop(self):
+        """Forget the last command still in memory, if any."""
+        if self._entries:
+            self._release(self._entries.pop())
+            self._text = None
+
+    def last(self):
+        """Return the import-resolved text of the last command."""
+        return self._resolve(self._entries[-1])
+
+    def text(self):
+        """Return every command recorded so far, imports resolved."""
+        if self._text is None:
+            self._text = ''.join(self._resolve(e) for e in self._entries)
+        if self.path is None:
+            return self._text
+        with open(self.path) as f:
+            return f.read() + self._text
+
+
+class ResultCache:
+    """LRU cache of completed runs with an optional on-disk tier.
+
+    Entries are dicts with the rendered 'output', the final 'pointer',
+    the final cells as 'origin' and 'tape' (see Cells.to_array) and the
+    run's 'stats'. With a directory, every entry is also written there as
+    a binary container named after its key, so other processes and later
+    runs find it; the in-memory tier holds the `size` most recently used.
+
+    Args:
+        size: Entries kept in memory.
+        directory: Optional directory for the on-disk tier.
+    """
+
+    def __init__(self, size=RESULT_CACHE_SIZE, directory=None):
+        self.size = size
+        self.directory = directory
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.bfr')
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def get(self, key):
+        """Return the entry stored under key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+
+        if self.directory is None or not os.path.exists(self._path(key)):
+            return None
+        try:
+            version, meta, arrays = _read_container(self._path(key), RESULT_MAGIC)
+        except Exception:
+            return None
+        if version != RESULT_VERSION:
+            return None
+
+        entry = dict(meta, tape=np.array(arrays['tape']))
+        self._remember(key, entry)
+        return entry
+
+    def put(self, key, entry):
+        """Store entry under key in memory and, if enabled, on disk."""
+        self._remember(key, entry)
+        if self.directory is None:
+            return
 
-        return False
+        meta = {k: v for k, v in entry.items() if k != 'tape'}
+        tmp_path = '{}.{}.tmp'.format(self._path(key), os.getpid())
+        _write_container(
+            tmp_path, RESULT_MAGIC, RESULT_VERSION, meta, {'tape': entry['tape']}
+        )
+        os.replace(tmp_path, self._path(key))
 
-    def _execute_interpreted(self, ir_program, max_iterations, output_file=None):
-        """Fallback interpreted execution for when JIT is unavailable."""
-        backup_cells = self.cells.backup()
-        backup_pointer = self.pointer
+    def clear(self):
+        """Drop the in-memory entries (the on-disk tier is kept)."""
+        with self._lock:
+            self._entries.clear()
 
-        try:
-            pc = 0
-            exec_count = 0
 
-            while pc < len(ir_program) and exec_count < max_iterations:
-                op = ir_program[pc]
-                tag = op[0]
+class _Stage:
+    """A Pipeline stage: one BrainFuck run on its own JIT tape.
 
-                if tag == 'add':
-                    self.cells[self.pointer] = (
-                        self.cells[self.pointer] + op[1]
-                    ) & 0xFF
-                elif tag == 'move':
-                    self.pointer += op[1]
-                elif tag == 'output':
-                    self._print_value(output_file)
-                elif tag == 'input':
-                    self._read_value()
-                elif tag == 'jump_zero':
-                    if not self.cells[self.pointer]:
-                        pc = op[1]
-                        continue
-                elif tag == 'jump_nz':
-                    if self.cells[self.pointer]:
-                        pc = op[1]
-                        continue
-                elif tag == 'print_cells':
-                    self.print_cells()
-                elif tag == 'print_history':
-                    self.print_cmd_history()
+    The output buffer is the input of the next stage, which reads
+    output_buf[read:state[2]] in place; the stage only runs again once
+    all of it has been read. The pipeline input is a finished stage
+    without a program whose output buffer holds the input values.
+    """
 
-                pc += 1
-                exec_count += 1
+    def __init__(self, output_buf, name=None, bf=None, program=None):
+        self.output_buf = output_buf
+        self.name = name
+        self.bf = bf
+        self.program = program
+        self.state = np.array([0, 0, len(output_buf)], dtype=np.int64)
+        self.read = 0
+        self.status = STATUS_COMPLETE
+        self.waiting = False
+        self.remaining = self.iterations = self.piped = 0
+
+    def start(self, pc, max_iterations, pointer_range):
+        """Build the tape of a compiled stage and make it runnable."""
+        self.tape, self.tape_center, self.kernel = self.bf._build_tape(pointer_range)
+        self.state[:] = (self.tape_center + self.bf.pointer, pc, 0)
+        self.remaining = max_iterations
+        self.status = None
+
+    def next_value(self):
+        """Return the next unread output value, or -1 if there is none."""
+        if self.read == self.state[2]:
+            return -1
+        self.read += 1
+        return int(self.output_buf[self.read - 1])
 
-        except Exception:
-            print('MAX recursion reached!')
-            self.cells = backup_cells
-            self.pointer = backup_pointer
-            if self._cmd_parts:
-                self._cmd_parts.pop()
 
-    def execute(self, cmd_line, MAX_RECURSION=10**5, output_file=None):
-        if not self.is_balanced(cmd_line):
-            raise Exception("brackets not balanced!")
+class Pipeline:
+    """Programs chained like a shell pipeline, run in one process.
 
-        try:
-            expanded_cmd_line = self._resolve_imports(cmd_line)
-        except Exception as e:
-            print(e)
-            return
+    Every `.` of a stage feeds a `,` of the next one: the values stay in
+    the stage's int32 output buffer and the next stage reads them from
+    there, without rendering them to text in between. The first stage
+    reads the pipeline input and the last one prints to output_file;
+    a `,` past the end of its input reads -1 once the stage before it
+    has finished.
 
-        self._cmd_parts.append(expanded_cmd_line)
-        ir_program = self._compile_to_ir(expanded_cmd_line)
+    Stages run in slices of at most SLICE_ITERATIONS on the Numba kernels
+    (or their plain Python versions without Numba), scheduled so the
+    latest stage with something to do runs first: each stage runs until
+    its output buffer of PIPE_BUFFER_SIZE values is full or it needs
+    input, and then the stages after it consume what it wrote. Memory
+    per stage is therefore bounded however much data streams through.
+    `*` and `&` print to stderr so the stream stays clean.
 
-        if not ir_program:
-            return
+    Args:
+        programs: BrainFuck commands of every stage, optionally with
+            {LIB} imports.
+        names: Names of the stages for source maps and stats (default:
+            'stage 1', 'stage 2', ...).
+        **options: BrainFuck() arguments shared by all stages, such as
+            paged or passes. tracing and backend are ignored.
 
-        numeric_program = convert_ir_to_numeric(ir_program)
-        if len(numeric_program) == 0:
-            return
+    Attributes:
+        stages: The BrainFuck instance of every stage, holding its cells,
+            pointer and stats once run() returns.
+        statuses: Status of every stage after run(): STATUS_COMPLETE,
+            STATUS_MAX_ITERATIONS, STATUS_INFINITE_LOOP, or None if the
+            pipeline was stopped by its timeout or cancellation first.
+        stats: Slices run ('slices'), instructions executed by each
+            stage ('iterations') and values each stage passed on to the
+            next ('piped').
+    """
 
-        try:
-            TAPE_SIZE = 65536
-            tape_center = TAPE_SIZE // 2
-            tape = np.zeros(TAPE_SIZE, dtype=np.int32)
-
-            for pos, value in self.cells._sparse.items():
-                idx = tape_center + pos
-                if 0 <= idx < TAPE_SIZE:
-                    tape[idx] = value
-            for i, value in enumerate(self.cells._tape):
-                if i < len(self.cells._tape):
-                    idx = tape_center + i
-                    if 0 <= idx < TAPE_SIZE:
-                        tape[idx] = value
+    def __init__(self, programs, names=None, **options):
+        self.programs = list(programs)
+        if names is None:
+            names = [
+                'stage {}'.format(i + 1) for i in range(len(self.programs))
+            ]
+        self.names = list(names)
+        self.stages = [BrainFuck(**options) for _ in self.programs]
+        for bf, name in zip(self.stages, self.names):
+            bf.source_name = name
+        self.statuses = []
+        self.stats = {}
+
+    def _start(self, input_data, max_iterations):
+        """Compile every stage and return the chain of _Stage objects."""
+        chain = [_Stage(BrainFuck._input_values(input_data))]
+        for i, (bf, cmd_line) in enumerate(zip(self.stages, self.programs)):
+            bf.stats = {}
+            size = OUTPUT_BUF_SIZE if i == len(self.stages) - 1 else PIPE_BUFFER_SIZE
+            stage = _Stage(np.empty(size, dtype=np.int32), self.names[i], bf)
+            stage.state[2] = 0
+            prepared = bf._prepare(cmd_line)
+            if prepared is not None:
+                _, stage.program, info = prepared
+                pointer_range = info['pointer_range']
+                if pointer_range is not None:
+                    pointer_range = (
+                        bf.pointer + pointer_range[0],
+                        bf.pointer + pointer_range[1],
+                    )
+                stage.start(0, max_iterations, pointer_range)
+            chain.append(stage)
+        return chain
 
-            state = np.array(
-                [tape_center + self.pointer, np.int64(0), np.int64(0)],
-                dtype=np.int64,
-            )
-            output_buf = np.empty(OUTPUT_BUF_SIZE, dtype=np.int32)
+    @staticmethod
+    def _runnable(source, stage):
+        """Whether stage can run without waiting for source to output."""
+        if stage.status is not None:
+            return False
+        return (
+            not stage.waiting
+            or source.read < source.state[2]
+            or source.status is not None
+        )
 
-            self._execute_segmented_jit(
-                numeric_program,
-                tape,
-                tape_center,
-                state,
-                output_buf,
-                MAX_RECURSION,
-                output_file,
-            )
+    @staticmethod
+    def _step(source, stage):
+        """Run stage for up to one slice, feeding it from source.
 
-            self._sync_cells_from_tape(tape, tape_center)
-            self.pointer = int(state[0]) - tape_center
+        The stage keeps running across `,` while source has values, and
+        stops early when it has to wait for source or fills its output
+        buffer.
+        """
+        # whatever the next stage did not read is lost, as it has finished
+        stage.state[2] = stage.read = 0
+        budget = min(stage.remaining, SLICE_ITERATIONS)
+        while budget > 0 and stage.state[1] < len(stage.program):
+            if stage.waiting:
+                if source.read == source.state[2] and source.status is None:
+                    break
+                value = source.next_value()
+                stage.bf._store_input(
+                    stage.tape, stage.tape_center, stage.state, value
+                )
+                stage.state[1] += 1
+                stage.waiting = False
+
+            status, iterations = _execute_segment(
+                stage.program,
+                stage.tape,
+                stage.state,
+                stage.output_buf,
+                budget,
+                stage.kernel,
+            )
+            budget -= iterations
+            stage.remaining -= iterations
+            stage.iterations += iterations
 
-        except Exception:
-            self._execute_interpreted(ir_program, MAX_RECURSION, output_file)
+            if status == STATUS_NEED_INPUT:
+                stage.waiting = True
+            elif status == STATUS_PRINT_CELLS:
+                print(
+                    stage.bf._dump_cells(stage.tape, stage.tape_center, stage.state),
+                    file=sys.stderr,
+                )
+                stage.state[1] += 1
+            elif status == STATUS_PRINT_HISTORY:
+                cmd_history = stage.bf.history.text()
+                print(len(cmd_history), cmd_history, file=sys.stderr)
+                stage.state[1] += 1
+            elif status == STATUS_OUTPUT_OVERFLOW:
+                break
+            elif status == STATUS_INFINITE_LOOP:
+                stage.status = STATUS_INFINITE_LOOP
+                return
+        stage.piped += int(stage.state[2])
 
-    def save_tape(self, path='tape.json'):
-        import json
+        if stage.state[1] >= len(stage.program):
+            stage.status = STATUS_COMPLETE
+        elif stage.remaining <= 0:
+            stage.status = STATUS_MAX_ITERATIONS
 
-        data = {'pointer': self.pointer, 'cells': {}}
-        for i, val in enumerate(self.cells._tape):
-            if val != 0:
-                data['cells'][str(i)] = val
-        for key, val in self.cells._sparse.items():
-            if val != 0:
-                data['cells'][str(key)] = val
-        with open(path, 'w') as f:
-            json.dump(data, f, indent=2)
+    def run(
+        self,
+        input_data=None,
+        MAX_RECURSION=10**5,
+        output_file=None,
+        timeout=None,
+        cancel=None,
+    ):
+        """Run every stage to completion, streaming values between them.
 
-    def load_tape(self, path):
-        import json
+        Args:
+            input_data: Input of the first stage as str or bytes, or None
+                for no input.
+            MAX_RECURSION: Maximum number of operations of each stage.
+            output_file: File object for the output of the last stage
+                (default: stdout).
+            timeout: Wall-clock budget in seconds, or None for no limit.
+            cancel: Cancellation token such as threading.Event.
 
-        with open(path) as f:
-            data = json.load(f)
-        self.pointer = data.get('pointer', 0)
-        self.cells = Cells()
-        for key_str, value in data.get('cells', {}).items():
-            self.cells[int(key_str)] = value
+        Returns:
+            None if every stage ran to completion, STATUS_TIMEOUT or
+            STATUS_CANCELLED if the pipeline was stopped, otherwise the
+            status of the first stage that did not complete (see
+            statuses).
 
-    def interpreter(self, MAX_RECURSION=10**5):
+        Raises:
+            Exception: If the brackets of a program are not balanced.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        chain = self._start(input_data, MAX_RECURSION)
+        slices = 0
+        stopped = None
         while True:
-            cmd_line = input('>> ')
-            while not self.is_balanced(cmd_line):
-                tmp = input('.. ')
-                cmd_line = cmd_line + tmp if tmp else 'skip'
-            if cmd_line == 'help':
-                print(help_text)
-            elif cmd_line in ('quit', 'exit'):
+            runnable = [
+                i for i in range(1, len(chain))
+                if self._runnable(chain[i - 1], chain[i])
+            ]
+            if not runnable:
                 break
-            elif cmd_line.startswith('save'):
-                parts = cmd_line.split(maxsplit=1)
-                path = parts[1] if len(parts) > 1 else 'tape.json'
-                self.save_tape(path)
-                print(f'Tape saved to {path}')
-            elif not cmd_line:
+            if cancel is not None and cancel.is_set():
+                stopped = STATUS_CANCELLED
                 break
-            else:
-                self.execute(cmd_line, MAX_RECURSION)
+            if deadline is not None and time.monotonic() >= deadline:
+                stopped = STATUS_TIMEOUT
+                break
+            i = runnable[-1]
+            self._step(chain[i - 1], chain[i])
+            slices += 1
+            if i == len(chain) - 1:
+                last = chain[i]
+                BrainFuck._flush_outputs(last.output_buf, last.state[2], output_file)
+                last.state[2] = 0
+
+        for stage in chain[1:]:
+            if stage.program is None:
+                continue
+            stage.bf._sync_state(stage.tape, stage.tape_center, stage.state)
+            if stage.status != STATUS_COMPLETE:
+                stage.bf.stats['stopped_at'] = stage.bf.source_map.describe(
+                    int(stage.state[1])
+                )
+        self.statuses = [stage.status for stage in chain[1:]]
+        self.stats = {
+            'slices': slices,
+            'iterations': {stage.name: stage.iterations for stage in chain[1:]},
+            'piped': {stage.name: stage.piped for stage in chain[1:-1]},
+        }
+        if stopped is not None:
+            return stopped
+        for status in self.statuses:
+            if status != STATUS_COMPLETE:
+                return status
+        return None
+
+
+def _stop_message(status, stats):
+    """Return the message reporting why a run stopped, or None."""
+    if status == STATUS_TIMEOUT:
+        return 'Execution timed out!'
+    if status == STATUS_INFINITE_LOOP:
+        return 'Infinite loop detected at {}!'.format(stats['stopped_at'])
+    if status == STATUS_BREAKPOINT:
+        return 'Breakpoint at {}'.format(stats['stopped_at'])
+    if status == STATUS_WATCHPOINT:
+        return 'Cell {} changed from {} to {} at {}'.format(
+            *stats['watchpoint'], stats['stopped_at']
+        )
+    return None
+
+
+def print_stats(stats, file=None):
+    """Print BrainFuck.stats as `name: value` lines (default: stderr)."""
+    if file is None:
+        file = sys.stderr
+    for name, value in stats.items():
+        if name == 'pointer_range':
+            value = 'unbounded' if value is None else '{} .. {}'.format(*value)
+        elif isinstance(value, dict):
+            value = ', '.join(
+                '{} {}'.format(key, count) for key, count in value.items()
+            )
+        print('{}: {}'.format(name.replace('_', ' '), value), file=file)
 
 
-class Cells:
-    """Optimized cell storage using list for positive indices, dict for negative."""
+def compile_main(args=None):
+    """Command line options for `brainfuck compile`."""
+    arg_parser = argparse.ArgumentParser(prog='brainfuck compile')
+    arg_parser.add_argument(
+        'file',
+        type=str,
+        help='brainfuck source file',
+    )
+    arg_parser.add_argument(
+        '-o', '--output',
+        type=str,
+        metavar='FILE',
+        help='bytecode file to write (default: FILE with a .bfc suffix)',
+    )
+    arg_parser.add_argument(
+        '--no-peephole',
+        action='store_true',
+        help='disable the peephole superinstruction passes',
+    )
+    arguments = arg_parser.parse_args(args)
 
-    def __init__(self):
-        self._tape = [0] * 30000
-        self._sparse = defaultdict(int)
+    output = arguments.output
+    if output is None:
+        output = os.path.splitext(arguments.file)[0] + '.bfc'
 
-    def __getitem__(self, key):
-        """Return cell value at key, 0 if undefined."""
-        if 0 <= key < len(self._tape):
-            return self._tape[key]
-        return self._sparse[key]
+    with open(arguments.file) as f:
+        cmd = f.read()
+    bf = BrainFuck(passes=set() if arguments.no_peephole else None)
+    bf.source_name = arguments.file
+    try:
+        bf.save_bytecode(cmd, output)
+    except Exception as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 0
 
-    def __setitem__(self, key, value):
-        """Set cell value at key."""
-        if 0 <= key < len(self._tape):
-            self._tape[key] = value
-        else:
-            if value == 0:
-                if key in self._sparse:
-                    del self._sparse[key]
-            else:
-                self._sparse[key] = value
 
-    def backup(self):
-        """Return a copy of the cells."""
-        new_cells = Cells()
-        new_cells._tape = self._tape[:]
-        new_cells._sparse = defaultdict(int)
-        for key, value in self._sparse.items():
-            new_cells._sparse[key] = value
-        return new_cells
+def pipe_main(args=None):
+    """Command line options for `brainfuck pipe`."""
+    arg_parser = argparse.ArgumentParser(prog='brainfuck pipe')
+    arg_parser.add_argument(
+        'files',
+        nargs='+',
+        metavar='FILE',
+        help='brainfuck source or bytecode files, one per stage',
+    )
+    arg_parser.add_argument(
+        '-r', '--recursion',
+        default=10**5,
+        type=int,
+        metavar='MAX_RECURSION',
+        help='set MAX_RECURSION value of every stage',
+    )
+    arg_parser.add_argument(
+        '--input',
+        type=str,
+        metavar='TEXT',
+        help='feed TEXT to the first stage (default: stdin unless a terminal)',
+    )
+    arg_parser.add_argument(
+        '--output',
+        type=str,
+        metavar='FILE',
+        help='redirect output of the last stage to file instead of stdout',
+    )
+    arg_parser.add_argument(
+        '--timeout',
+        type=float,
+        metavar='SECONDS',
+        help='stop the pipeline after SECONDS of wall-clock time',
+    )
+    arg_parser.add_argument(
+        '--paged',
+        action='store_true',
+        help='use sparse paged tapes for programs that roam far',
+    )
+    arg_parser.add_argument(
+        '--no-peephole',
+        action='store_true',
+        help='disable the peephole superinstruction passes',
+    )
+    arg_parser.add_argument(
+        '--stats',
+        action='store_true',
+        help='print pipeline statistics to stderr',
+    )
+    arguments = arg_parser.parse_args(args)
+    passes = set() if arguments.no_peephole else None
 
-    def print_pos(self, pos):
-        """Print all the cells and the pointer."""
-        non_zero_indices = set()
+    programs = []
+    for path in arguments.files:
+        if _is_container(path, BYTECODE_MAGIC):
+            # loading puts the compiled program in the program cache
+            programs.append(BrainFuck(passes=passes).load_bytecode(path))
+        else:
+            with open(path) as f:
+                programs.append(f.read())
+
+    input_data = arguments.input
+    if input_data is None and not sys.stdin.isatty():
+        input_data = sys.stdin.read()
 
-        for i, val in enumerate(self._tape):
-            if val != 0:
-                non_zero_indices.add(i)
+    pipeline = Pipeline(
+        programs, arguments.files, paged=arguments.paged, passes=passes
+    )
+    output_fh = None
+    if arguments.output:
+        output_fh = open(arguments.output, 'w')
+    try:
+        status = pipeline.run(
+            input_data,
+            arguments.recursion,
+            output_file=output_fh,
+            timeout=arguments.timeout,
+        )
+    except Exception as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        if output_fh:
+            output_fh.close()
 
-        for key, val in self._sparse.items():
-            if val != 0:
-                non_zero_indices.add(key)
+    if status == STATUS_TIMEOUT:
+        print('Execution timed out!', file=sys.stderr)
+    for bf, stage_status in zip(pipeline.stages, pipeline.statuses):
+        if stage_status == STATUS_INFINITE_LOOP:
+            print(
+                'Infinite loop detected at {}!'.format(bf.stats['stopped_at']),
+                file=sys.stderr,
+            )
+    if arguments.stats:
+        print_stats(pipeline.stats)
+    return 0 if status is None else 1
 
-        non_zero_indices.add(pos)
 
-        if non_zero_indices:
-            m, M = min(non_zero_indices), max(non_zero_indices)
-        else:
-            m = M = pos
+def main(args=None):
+    """Config parser and run command line options.
 
-        print_list = []
-        for i in range(m, M + 1):
-            val = self[i]
-            if i == pos:
-                print_list.append('|{}|'.format(val))
-            else:
-                print_list.append(str(val))
+    `brainfuck serve ...` starts the execution server (see
+    brainfuck.server), `--remote ADDRESS` sends the program to one
+    (see brainfuck.client), `brainfuck compile ...` writes bytecode
+    (see compile_main) and `brainfuck pipe ...` chains programs (see
+    pipe_main). `-f` also accepts `.bfc` bytecode files.
+    """
+    if args is None:
+        args = sys.argv[1:]
+    if args and args[0] == 'serve':
+        from brainfuck.server import main as serve_main
 
-        return ' '.join(print_list)
+        return serve_main(args[1:])
+    if args and args[0] == 'compile':
+        return compile_main(args[1:])
+    if args and args[0] == 'pipe':
+        return pipe_main(args[1:])
+    if any(a == '--remote' or a.startswith('--remote=') for a in args):
+        from brainfuck.client import main as remote_main
 
+        return remote_main(args)
 
-def main(args=None):
-    """Config parser and run command line options."""
     arg_parser = argparse.ArgumentParser()
     arg_parser.add_argument(
         'cmd',
@@ -755,7 +5464,7 @@ def main(args=None):
         '--load',
         type=str,
         metavar='FILE',
-        help='load tape state from JSON file before execution',
+        help='load tape state from a JSON file or binary snapshot',
     )
     arg_parser.add_argument(
         '--output',
@@ -767,34 +5476,199 @@ def main(args=None):
         '--dump',
         type=str,
         metavar='FILE',
-        help='save tape state to JSON file after execution',
+        help='save tape state after execution (JSON if FILE ends in .json, '
+        'binary snapshot otherwise)',
+    )
+    arg_parser.add_argument(
+        '--timeout',
+        type=float,
+        metavar='SECONDS',
+        help='stop execution after SECONDS of wall-clock time',
+    )
+    arg_parser.add_argument(
+        '--input',
+        type=str,
+        metavar='TEXT',
+        help='feed TEXT to `,` instead of prompting',
+    )
+    arg_parser.add_argument(
+        '--paged',
+        action='store_true',
+        help='use a sparse paged tape for programs that roam far',
+    )
+    arg_parser.add_argument(
+        '--tape',
+        type=str,
+        metavar='FILE',
+        help='run on a persistent memory-mapped tape (created if missing)',
+    )
+    arg_parser.add_argument(
+        '--tape-size',
+        default=MAPPED_TAPE_SIZE,
+        type=int,
+        metavar='CELLS',
+        help='number of cells of a new --tape file (default: %(default)s)',
+    )
+    arg_parser.add_argument(
+        '--cache-dir',
+        type=str,
+        metavar='DIR',
+        help='memoize completed --input runs in DIR and reuse them',
+    )
+    arg_parser.add_argument(
+        '--no-peephole',
+        action='store_true',
+        help='disable the peephole superinstruction passes',
+    )
+    arg_parser.add_argument(
+        '--no-warm-up',
+        action='store_true',
+        help='do not compile the JIT kernels in the background while the '
+        'program is loaded and the shell starts',
+    )
+    arg_parser.add_argument(
+        '--backend',
+        choices=('numba', 'llvm'),
+        default='numba',
+        help='JIT backend: the Numba kernels or the experimental llvmlite '
+        'code generator (default: %(default)s)',
+    )
+    arg_parser.add_argument(
+        '--trace',
+        action='store_true',
+        help='interpret instead of using the JIT, compiling hot loops to '
+        'Python traces, and report the compiled loops',
+    )
+    arg_parser.add_argument(
+        '--break',
+        action='append',
+        default=[],
+        dest='breakpoints',
+        metavar='LOCATION',
+        help='stop before the instruction at LINE:COLUMN or FILE:LINE:COLUMN '
+        '(continue with `step` or `continue` in the shell)',
+    )
+    arg_parser.add_argument(
+        '--watch',
+        action='append',
+        default=[],
+        type=int,
+        metavar='CELL',
+        help='stop after the value of CELL changes',
+    )
+    arg_parser.add_argument(
+        '--heatmap',
+        choices=('text', 'json', 'csv'),
+        help='profile the run without peephole passes and print how often '
+        'every cell was read and written',
+    )
+    arg_parser.add_argument(
+        '--heatmap-file',
+        type=str,
+        metavar='FILE',
+        help='write the --heatmap to FILE instead of stderr',
+    )
+    arg_parser.add_argument(
+        '--history-size',
+        default=HISTORY_SIZE,
+        type=int,
+        metavar='N',
+        help='commands kept in memory for `&` (default: %(default)s)',
+    )
+    arg_parser.add_argument(
+        '--history-file',
+        type=str,
+        metavar='FILE',
+        help='append commands dropped from the `&` history to FILE',
+    )
+    arg_parser.add_argument(
+        '--stats',
+        action='store_true',
+        help='print execution statistics to stderr',
+    )
+    arg_parser.add_argument(
+        '--remote',
+        type=str,
+        metavar='ADDRESS',
+        help='run on a `brainfuck serve` instance (Unix socket or HOST:PORT)',
     )
     arguments = arg_parser.parse_args(args)
+    warm_up = not (arguments.no_warm_up or arguments.trace)
+    if warm_up:
+        start_warm_up()
+
+    result_cache = None
+    if arguments.cache_dir:
+        result_cache = ResultCache(directory=arguments.cache_dir)
+
+    bf = BrainFuck(
+        paged=arguments.paged,
+        result_cache=result_cache,
+        passes=set() if arguments.no_peephole else None,
+        history=CommandHistory(arguments.history_size, arguments.history_file),
+        tracing=arguments.trace,
+        backend=arguments.backend,
+        profile=bool(arguments.heatmap),
+    )
+    bf.breakpoints.update(arguments.breakpoints)
+    bf.watchpoints.update(arguments.watch)
+    if arguments.tape:
+        bf.open_tape(arguments.tape, arguments.tape_size)
+    if arguments.load:
+        bf.load_tape(arguments.load)
 
     cmd = arguments.cmd
-    if arguments.file:
+    if arguments.file and _is_container(arguments.file, BYTECODE_MAGIC):
+        cmd = bf.load_bytecode(arguments.file)
+    elif arguments.file:
         with open(arguments.file) as f:
             cmd = f.read()
-
-    bf = BrainFuck()
-    if arguments.load:
-        bf.load_tape(arguments.load)
+        bf.source_name = arguments.file
 
     output_fh = None
     if arguments.output:
         output_fh = open(arguments.output, 'w')
 
     try:
-        bf.execute(cmd, arguments.recursion, output_file=output_fh)
+        status = bf.execute(
+            cmd,
+            arguments.recursion,
+            output_file=output_fh,
+            timeout=arguments.timeout,
+            input_data=arguments.input,
+        )
     finally:
         if output_fh:
             output_fh.close()
 
+    message = _stop_message(status, bf.stats)
+    if message:
+        print(message, file=sys.stderr)
+
+    if arguments.stats:
+        print_stats(bf.stats)
+    elif arguments.trace:
+        print_stats({
+            name: bf.stats[name]
+            for name in ('compiled_loops', 'trace_speedup')
+            if name in bf.stats
+        })
+
+    if arguments.heatmap and bf.heatmap is not None:
+        heatmap = bf.heatmap.render(arguments.heatmap)
+        if arguments.heatmap_file:
+            with open(arguments.heatmap_file, 'w') as f:
+                f.write(heatmap)
+        else:
+            sys.stderr.write(heatmap)
+
     if arguments.dump:
         bf.save_tape(arguments.dump)
 
     if not arguments.command_line:
-        bf.interpreter(arguments.recursion)
+        bf.interpreter(arguments.recursion, arguments.timeout, warm_up)
+
+    bf.close_tape()
 
 
 if __name__ == "__main__":
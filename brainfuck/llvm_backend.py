@@ -0,0 +1,470 @@
+"""Experimental llvmlite code generation backend.
+
+Instead of running a numeric program through the dispatch loop of
+execute_jit, compile_kernel() lowers it to LLVM IR: one basic block per
+instruction, jumps as direct branches, operands and offsets as
+constants and the trip counts of closed-form loops as 256-entry lookup
+tables. The module is optimized for the host CPU, JIT-compiled with
+llvmlite's MCJIT and called through ctypes on the buffers of the tape,
+state and output arrays. Kernels follow the execute_jit protocol
+(status codes, [pointer, pc, output_count] state, iteration budget), so
+_execute_segmented_jit drives them like the Numba kernels and they
+resume at any pc after an I/O checkpoint.
+
+Only int32 NumPy tapes are supported; BrainFuck(backend='llvm') keeps
+the Numba kernels for paged and memory-mapped tapes.
+
+    Examples:
+
+        >>> import numpy as np
+        >>> from brainfuck.core import convert_ir_to_numeric
+        >>> program = convert_ir_to_numeric([('add', 65), ('output',)])
+        >>> kernel = compile_kernel(program)
+        >>> tape = np.zeros(4, dtype=np.int32)
+        >>> state = np.zeros(3, dtype=np.int64)
+        >>> output_buf = np.zeros(8, dtype=np.int32)
+        >>> kernel(program, tape, state, output_buf, 100)
+        (0, 2)
+        >>> output_buf[:state[2]].tolist()
+        [65]
+
+"""
+
+import ctypes
+import hashlib
+import itertools
+import threading
+import weakref
+from collections import OrderedDict
+
+import llvmlite.binding as llvm
+from llvmlite import ir
+
+from brainfuck.core import (
+    OP_ADD,
+    OP_ADD_MOVE,
+    OP_BLOCK_DELTA,
+    OP_DELTA_BLOCK,
+    OP_INPUT,
+    OP_JUMP_NZ,
+    OP_JUMP_ZERO,
+    OP_LINEAR_LOOP,
+    OP_LOOP_TERM,
+    OP_MOVE,
+    OP_MOVE_ADD,
+    OP_OUTPUT,
+    OP_OUTPUT_RUN,
+    OP_PRINT_CELLS,
+    OP_PRINT_HISTORY,
+    PROGRAM_CACHE_SIZE,
+    STATUS_COMPLETE,
+    STATUS_INFINITE_LOOP,
+    STATUS_NEED_INPUT,
+    STATUS_OUTPUT_OVERFLOW,
+    STATUS_PRINT_CELLS,
+    STATUS_PRINT_HISTORY,
+    loop_trip_count,
+)
+
+_I32 = ir.IntType(32)
+_I64 = ir.IntType(64)
+
+# status = kernel(tape, tape_len, state, output_buf, output_len,
+#                 max_iterations, &iterations)
+_PROTOTYPE = ctypes.CFUNCTYPE(
+    ctypes.c_int32,
+    ctypes.c_void_p,
+    ctypes.c_int64,
+    ctypes.c_void_p,
+    ctypes.c_void_p,
+    ctypes.c_int64,
+    ctypes.c_int64,
+    ctypes.POINTER(ctypes.c_int64),
+)
+
+_engine = None
+_target_machine = None
+_kernels = OrderedDict()
+_names = itertools.count()
+_lock = threading.Lock()
+
+
+def _dead():
+    return None
+
+
+def _i64(value):
+    return ir.Constant(_I64, value)
+
+
+def _i32(value):
+    return ir.Constant(_I32, value)
+
+
+class _Lowering:
+    """Builds the LLVM function of one numeric program."""
+
+    def __init__(self, program, name):
+        self.program = program
+        self.module = ir.Module(name=name)
+        self.module.triple = llvm.get_process_triple()
+        function_type = ir.FunctionType(
+            _I32,
+            [
+                _I32.as_pointer(),
+                _I64,
+                _I64.as_pointer(),
+                _I32.as_pointer(),
+                _I64,
+                _I64,
+                _I64.as_pointer(),
+            ],
+        )
+        self.function = ir.Function(self.module, function_type, name=name)
+        (
+            self.tape,
+            self.tape_len,
+            self.state,
+            self.output_buf,
+            self.output_len,
+            self.max_iterations,
+            self.iterations_out,
+        ) = self.function.args
+        self.tables = {}
+
+        entry = self.function.append_basic_block("entry")
+        self.builder = ir.IRBuilder(entry)
+        self.pointer = self.builder.alloca(_I64, name="pointer")
+        self.out = self.builder.alloca(_I64, name="out")
+        self.iterations = self.builder.alloca(_I64, name="iterations")
+
+        self.blocks = [
+            self.function.append_basic_block("pc{}".format(pc))
+            for pc in range(len(program))
+        ]
+        self.done = self.function.append_basic_block("done")
+
+    def block(self, pc):
+        return self.blocks[pc] if pc < len(self.blocks) else self.done
+
+    def state_slot(self, index):
+        return self.builder.gep(self.state, [_i64(index)])
+
+    def bump(self, count):
+        b = self.builder
+        b.store(b.add(b.load(self.iterations), _i64(count)), self.iterations)
+
+    def exit(self, status, pc):
+        """Save the pointer, pc and output count and return status."""
+        b = self.builder
+        b.store(b.load(self.pointer), self.state_slot(0))
+        b.store(_i64(pc), self.state_slot(1))
+        b.store(b.load(self.out), self.state_slot(2))
+        b.store(b.load(self.iterations), self.iterations_out)
+        b.ret(_i32(status))
+
+    def cell(self, index=None):
+        b = self.builder
+        if index is None:
+            index = b.load(self.pointer)
+        return b.gep(self.tape, [index])
+
+    def add(self, delta, index=None):
+        """Add delta (i64 value) to a cell, wrapping to 0..255."""
+        b = self.builder
+        ptr = self.cell(index)
+        value = b.add(b.sext(b.load(ptr), _I64), delta)
+        b.store(b.trunc(b.and_(value, _i64(0xFF)), _I32), ptr)
+
+    def on_tape(self, index):
+        b = self.builder
+        return b.and_(
+            b.icmp_signed(">=", index, _i64(0)),
+            b.icmp_signed("<", index, self.tape_len),
+        )
+
+    def move(self, step):
+        b = self.builder
+        pointer = b.load(self.pointer)
+        new_pointer = b.add(pointer, _i64(step))
+        b.store(b.select(self.on_tape(new_pointer), new_pointer, pointer), self.pointer)
+
+    def trip_table(self, step):
+        """Return the global [256 x i32] of loop_trip_count(v, step)."""
+        step &= 0xFF
+        if step not in self.tables:
+            array_type = ir.ArrayType(_I32, 256)
+            table = ir.GlobalVariable(self.module, array_type, "trips{}".format(step))
+            table.global_constant = True
+            table.linkage = "internal"
+            table.initializer = ir.Constant(
+                array_type, [int(loop_trip_count(v, step)) for v in range(256)]
+            )
+            self.tables[step] = table
+        return self.tables[step]
+
+    def lower(self):
+        b = self.builder
+        b.store(b.load(self.state_slot(0)), self.pointer)
+        b.store(b.load(self.state_slot(2)), self.out)
+        b.store(_i64(0), self.iterations)
+        switch = b.switch(b.load(self.state_slot(1)), self.done)
+        for pc, block in enumerate(self.blocks):
+            switch.add_case(_i64(pc), block)
+
+        for pc in range(len(self.program)):
+            b.position_at_end(self.blocks[pc])
+            over = b.icmp_signed(">=", b.load(self.iterations), self.max_iterations)
+            with b.if_then(over, likely=False):
+                self.exit(STATUS_COMPLETE, pc)
+            self.lower_op(pc)
+
+        b.position_at_end(self.done)
+        self.exit(STATUS_COMPLETE, len(self.program))
+        return self.module
+
+    def lower_op(self, pc):
+        b = self.builder
+        op_code, arg, arg2 = (int(x) for x in self.program[pc])
+        following = self.block(pc + 1)
+
+        if op_code == OP_ADD:
+            self.add(_i64(arg))
+        elif op_code == OP_MOVE:
+            self.move(arg)
+        elif op_code == OP_ADD_MOVE:
+            self.afford(pc, 2)
+            self.add(_i64(arg))
+            self.move(arg2)
+            self.bump(1)
+        elif op_code == OP_MOVE_ADD:
+            self.afford(pc, 2)
+            self.move(arg)
+            self.add(_i64(arg2))
+            self.bump(1)
+        elif op_code == OP_LINEAR_LOOP:
+            self.lower_linear_loop(pc, arg, arg2)
+            return
+        elif op_code == OP_DELTA_BLOCK:
+            self.lower_delta_block(pc, arg, arg2)
+            return
+        elif op_code == OP_OUTPUT_RUN:
+            self.afford(pc, 2 * arg - 1)
+            out = b.load(self.out)
+            full = b.icmp_signed(">", b.add(out, _i64(arg)), self.output_len)
+            with b.if_then(full, likely=False):
+                self.exit(STATUS_OUTPUT_OVERFLOW, pc)
+            for k in range(arg):
+                if k:
+                    self.move(arg2)
+                out = b.load(self.out)
+                b.store(b.load(self.cell()), b.gep(self.output_buf, [out]))
+                b.store(b.add(out, _i64(1)), self.out)
+            self.bump(2 * arg - 2)
+            full = b.icmp_signed(">=", b.load(self.out), self.output_len)
+            with b.if_then(full, likely=False):
+                self.exit(STATUS_OUTPUT_OVERFLOW, pc + 1)
+        elif op_code == OP_OUTPUT:
+            out = b.load(self.out)
+            with b.if_then(b.icmp_signed("<", out, self.output_len)):
+                b.store(b.load(self.cell()), b.gep(self.output_buf, [out]))
+            out = b.add(out, _i64(1))
+            b.store(out, self.out)
+            with b.if_then(b.icmp_signed(">=", out, self.output_len), likely=False):
+                self.exit(STATUS_OUTPUT_OVERFLOW, pc + 1)
+        elif op_code == OP_INPUT:
+            self.exit(STATUS_NEED_INPUT, pc)
+            return
+        elif op_code in (OP_JUMP_ZERO, OP_JUMP_NZ):
+            self.bump(1)
+            value = b.load(self.cell())
+            compare = "==" if op_code == OP_JUMP_ZERO else "!="
+            taken = b.icmp_signed(compare, value, _i32(0))
+            b.cbranch(taken, self.block(arg), following)
+            return
+        elif op_code == OP_PRINT_CELLS:
+            self.exit(STATUS_PRINT_CELLS, pc)
+            return
+        elif op_code == OP_PRINT_HISTORY:
+            self.exit(STATUS_PRINT_HISTORY, pc)
+            return
+
+        self.bump(1)
+        b.branch(following)
+
+    def afford(self, pc, cost):
+        """Stop in front of instruction pc unless the budget covers cost."""
+        b = self.builder
+        short = b.icmp_signed(
+            ">", b.add(b.load(self.iterations), _i64(cost)), self.max_iterations
+        )
+        with b.if_then(short, likely=False):
+            b.store(self.max_iterations, self.iterations)
+            b.branch(self.blocks[pc])
+
+    def lower_linear_loop(self, pc, step, body_length):
+        """Lower a closed-form loop exactly as execute_jit runs it."""
+        b = self.builder
+        end = pc + 1
+        while self.program[end, 0] == OP_LOOP_TERM:
+            end += 1
+        following = self.block(int(self.program[end, 1]))
+        cost = body_length + 2
+
+        pointer = b.load(self.pointer)
+        if end > pc + 1:
+            fits = b.and_(
+                self.on_tape(b.add(pointer, _i64(int(self.program[pc + 1, 1])))),
+                self.on_tape(b.add(pointer, _i64(int(self.program[end - 1, 1])))),
+            )
+            with b.if_then(b.not_(fits), likely=False):
+                # a term leaves the tape: run the loop itself
+                b.branch(self.blocks[end])
+
+        value = b.load(self.cell())
+        index = b.and_(value, _i32(0xFF))
+        table = self.trip_table(step)
+        trips = b.sext(b.load(b.gep(table, [_i32(0), index])), _I64)
+
+        with b.if_then(b.icmp_signed("==", trips, _i64(0))):
+            self.bump(1)
+            b.branch(following)
+        with b.if_then(b.icmp_signed("<", trips, _i64(0)), likely=False):
+            self.exit(STATUS_INFINITE_LOOP, pc)
+
+        iterations = b.load(self.iterations)
+        affordable = b.sdiv(b.sub(self.max_iterations, iterations), _i64(cost))
+        with b.if_then(b.icmp_signed("==", affordable, _i64(0)), likely=False):
+            b.store(self.max_iterations, self.iterations)
+            b.branch(self.blocks[pc])
+        partial = b.icmp_signed("<", affordable, trips)
+        trips = b.select(partial, affordable, trips)
+
+        for term in range(pc + 1, end):
+            offset, delta = int(self.program[term, 1]), int(self.program[term, 2])
+            self.add(b.mul(trips, _i64(delta)), b.add(pointer, _i64(offset)))
+        self.add(b.mul(trips, _i64(step)))
+        b.store(b.add(iterations, b.mul(trips, _i64(cost))), self.iterations)
+        b.cbranch(partial, self.blocks[pc], following)
+
+    def lower_delta_block(self, pc, cost, net_move):
+        """Lower a delta block exactly as execute_jit runs it."""
+        b = self.builder
+        end = pc + 1
+        while self.program[end, 0] == OP_BLOCK_DELTA:
+            end += 1
+        rows = [(int(k), int(d)) for _, k, d in self.program[pc + 1 : end]]
+        originals = self.block(end + 1)
+
+        iterations = b.load(self.iterations)
+        pointer = b.load(self.pointer)
+        fits = b.and_(
+            b.icmp_signed("<=", b.add(iterations, _i64(cost)), self.max_iterations),
+            b.and_(
+                self.on_tape(b.add(pointer, _i64(rows[0][0]))),
+                self.on_tape(b.add(pointer, _i64(rows[-1][0]))),
+            ),
+        )
+        with b.if_then(b.not_(fits), likely=False):
+            b.branch(originals)
+        for offset, delta in rows:
+            if delta:
+                self.add(_i64(delta), b.add(pointer, _i64(offset)))
+        b.store(b.add(pointer, _i64(net_move)), self.pointer)
+        b.store(b.add(iterations, _i64(cost)), self.iterations)
+        b.branch(self.block(end + 1 + int(self.program[end, 1])))
+
+
+def _initialize():
+    """Create the MCJIT engine shared by every kernel."""
+    global _engine, _target_machine
+    if _engine is not None:
+        return
+    llvm.initialize_native_target()
+    llvm.initialize_native_asmprinter()
+    target = llvm.Target.from_triple(llvm.get_process_triple())
+    _target_machine = target.create_target_machine(
+        cpu=llvm.get_host_cpu_name(),
+        features=llvm.get_host_cpu_features().flatten(),
+        opt=3,
+    )
+    _engine = llvm.create_mcjit_compiler(llvm.parse_assembly(""), _target_machine)
+
+
+class LLVMKernel:
+    """A compiled program, callable like execute_jit.
+
+    Attributes:
+        name (str): Symbol of the compiled function.
+        llvm_ir (str): Optimized LLVM IR of the program.
+    """
+
+    def __init__(self, name, address, llvm_ir):
+        self.name = name
+        self.llvm_ir = llvm_ir
+        self._function = _PROTOTYPE(address)
+        self._buffers = (_dead, _dead, _dead, None)
+
+    def __call__(self, program, tape, state, output_buf, max_iterations):
+        """Run the compiled program; program is ignored.
+
+        Returns:
+            (status, iterations) as returned by execute_jit.
+        """
+        # a segmented run passes the same arrays at every checkpoint, so
+        # their addresses are looked up once rather than on every call
+        buffers = self._buffers
+        if (
+            buffers[0]() is not tape
+            or buffers[1]() is not state
+            or buffers[2]() is not output_buf
+        ):
+            addresses = (
+                tape.ctypes.data,
+                len(tape),
+                state.ctypes.data,
+                output_buf.ctypes.data,
+                len(output_buf),
+            )
+            buffers = self._buffers = (
+                weakref.ref(tape),
+                weakref.ref(state),
+                weakref.ref(output_buf),
+                addresses,
+            )
+        iterations = ctypes.c_int64(0)
+        status = self._function(*buffers[3], max_iterations, ctypes.byref(iterations))
+        return status, iterations.value
+
+
+def compile_kernel(numeric_program):
+    """Return the LLVMKernel of a numeric program, compiling it once.
+
+    Kernels are cached by program contents (PROGRAM_CACHE_SIZE of
+    them); evicted kernels stay loaded in the engine.
+    """
+    key = hashlib.sha256(numeric_program.tobytes()).hexdigest()
+    with _lock:
+        kernel = _kernels.get(key)
+        if kernel is not None:
+            _kernels.move_to_end(key)
+            return kernel
+
+        _initialize()
+        name = "bf_kernel_{}".format(next(_names))
+        module = _Lowering(numeric_program, name).lower()
+        parsed = llvm.parse_assembly(str(module))
+        parsed.verify()
+        tuning = llvm.create_pipeline_tuning_options(speed_level=3)
+        tuning.loop_vectorization = True
+        tuning.slp_vectorization = True
+        passes = llvm.create_pass_builder(_target_machine, tuning)
+        passes.getModulePassManager().run(parsed, passes)
+
+        _engine.add_module(parsed)
+        _engine.finalize_object()
+        kernel = LLVMKernel(name, _engine.get_function_address(name), str(parsed))
+        _kernels[key] = kernel
+        if len(_kernels) > PROGRAM_CACHE_SIZE:
+            _kernels.popitem(last=False)
+        return kernel
@@ -0,0 +1,288 @@
+"""Local execution server with a pool of warm workers.
+
+`brainfuck serve ADDRESS` listens on a Unix socket or a localhost TCP port
+(other interfaces need `--public`) and pre-forks worker processes that all
+accept on the shared socket. Each worker compiles the JIT kernels once at
+start-up and keeps the bflib and compiled-program caches of
+`brainfuck.core` warm across requests, so a request only pays for its own
+execution. Output is streamed back as it is flushed by the segmented JIT.
+See `brainfuck.client` for the protocol.
+
+"""
+
+import argparse
+import contextlib
+import io
+import ipaddress
+import json
+import math
+import multiprocessing
+import multiprocessing.connection
+import os
+import signal
+import socket
+import sys
+
+from brainfuck.client import DEFAULT_ADDRESS, parse_address
+from brainfuck.core import (
+    STATUS_CANCELLED,
+    STATUS_INFINITE_LOOP,
+    STATUS_MAX_ITERATIONS,
+    STATUS_TIMEOUT,
+    BrainFuck,
+    ResultCache,
+)
+
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_RECURSION = 10**8
+DEFAULT_MAX_TIMEOUT = 10.0
+
+STATUS_NAMES = {
+    None: "complete",
+    STATUS_TIMEOUT: "timeout",
+    STATUS_CANCELLED: "cancelled",
+    STATUS_MAX_ITERATIONS: "max_recursion",
+    STATUS_INFINITE_LOOP: "infinite_loop",
+}
+
+
+class _OutputStream:
+    """File-like object sending every write as an {"output": ...} line."""
+
+    def __init__(self, wfile):
+        self._wfile = wfile
+
+    def write(self, text):
+        if text:
+            self._wfile.write(json.dumps({"output": text}) + "\n")
+            self._wfile.flush()
+        return len(text)
+
+    def flush(self):
+        self._wfile.flush()
+
+
+def warm_up():
+    """Compile the JIT kernels and fill the library cache."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        BrainFuck().execute("{p10}[->+<],.*", input_data="A")
+
+
+def handle_request(request, wfile, max_recursion, max_timeout, result_cache=None):
+    """Run one request and stream its output and final status to wfile.
+
+    The request's `max_recursion` and `timeout` are capped by the server
+    limits; a timeout that is negative or not finite is an error.
+    Everything the run prints, including `*`, `&` and import messages,
+    is sent to the client. With a result_cache, repeated
+    requests are answered from it (see BrainFuck.execute).
+    """
+    try:
+        program = request.get("program", "")
+        budget = min(int(request.get("max_recursion", max_recursion)), max_recursion)
+        timeout = float(request.get("timeout", max_timeout))
+        if not math.isfinite(timeout) or timeout < 0:
+            raise ValueError("timeout must be a finite number of seconds >= 0")
+        timeout = min(timeout, max_timeout)
+
+        bf = BrainFuck(result_cache=result_cache)
+        stream = _OutputStream(wfile)
+        with contextlib.redirect_stdout(stream):
+            status = bf.execute(
+                program,
+                budget,
+                output_file=stream,
+                timeout=timeout,
+                input_data=request.get("input", ""),
+            )
+        reply = {"status": STATUS_NAMES[status], "pointer": bf.pointer}
+        if "stopped_at" in bf.stats:
+            reply["stopped_at"] = bf.stats["stopped_at"]
+    except Exception as e:
+        reply = {"error": str(e)}
+
+    wfile.write(json.dumps(reply) + "\n")
+    wfile.flush()
+
+
+def _worker(sock, max_recursion, max_timeout, cache_size, cache_dir):
+    """Accept connections on the shared socket and serve their requests.
+
+    A connection is closed once the client has sent nothing for
+    max_timeout seconds (at least one).
+    """
+    warm_up()
+    result_cache = None
+    if cache_size or cache_dir:
+        result_cache = ResultCache(cache_size, cache_dir)
+    while True:
+        conn, _ = sock.accept()
+        # a client idle for longer than a request may run is dropped, so
+        # quiet connections cannot hold on to every worker
+        conn.settimeout(max(max_timeout, 1.0))
+        with conn, conn.makefile("rw", encoding="utf-8") as f:
+            try:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        request = json.loads(line)
+                    except ValueError as e:
+                        request = None
+                        f.write(json.dumps({"error": str(e)}) + "\n")
+                        f.flush()
+                    if request is not None:
+                        handle_request(
+                            request, f, max_recursion, max_timeout, result_cache
+                        )
+            except OSError:
+                pass
+
+
+def _listen(address, public=False):
+    family, sock_addr = parse_address(address)
+    if family != socket.AF_UNIX and not public:
+        host = socket.gethostbyname(sock_addr[0])
+        if not ipaddress.ip_address(host).is_loopback:
+            message = "{} is not a loopback address; pass --public to serve on it"
+            raise ValueError(message.format(sock_addr[0]))
+    if family == socket.AF_UNIX and os.path.exists(sock_addr):
+        os.unlink(sock_addr)
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    if family != socket.AF_UNIX:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(sock_addr)
+    sock.listen(128)
+    return sock
+
+
+def serve(
+    address=DEFAULT_ADDRESS,
+    workers=DEFAULT_WORKERS,
+    max_recursion=DEFAULT_MAX_RECURSION,
+    max_timeout=DEFAULT_MAX_TIMEOUT,
+    ready=None,
+    cache_size=0,
+    cache_dir=None,
+    public=False,
+):
+    """Serve requests until interrupted, respawning workers that exit.
+
+    SIGINT and SIGTERM stop the workers and remove a Unix socket file.
+
+    Args:
+        address: Unix socket path, or HOST:PORT for TCP.
+        workers: Number of pre-forked worker processes.
+        max_recursion: Upper bound for a request's operation budget.
+        max_timeout: Upper bound for a request's wall-clock budget.
+        ready: Optional callable invoked once the socket is listening.
+        cache_size: Completed runs memoized in memory per worker; 0 and
+            no cache_dir disable result memoization.
+        cache_dir: Optional directory shared by the workers as the
+            on-disk tier of the result cache.
+        public: Allow TCP addresses other than loopback ones.
+
+    Raises:
+        ValueError: If address is a non-loopback TCP address and public
+            is false.
+    """
+    sock = _listen(address, public)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    ctx = multiprocessing.get_context("fork")
+
+    def spawn():
+        proc = ctx.Process(
+            target=_worker,
+            args=(sock, max_recursion, max_timeout, cache_size, cache_dir),
+            daemon=True,
+        )
+        proc.start()
+        return proc
+
+    procs = []
+    try:
+        procs = [spawn() for _ in range(workers)]
+        if ready is not None:
+            ready()
+
+        while True:
+            multiprocessing.connection.wait([p.sentinel for p in procs])
+            procs = [p if p.is_alive() else spawn() for p in procs]
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for proc in procs:
+            proc.terminate()
+        sock.close()
+        if sock.family == socket.AF_UNIX:
+            with contextlib.suppress(OSError):
+                os.unlink(address)
+
+
+def main(args=None):
+    """Command line options for `brainfuck serve`."""
+    arg_parser = argparse.ArgumentParser(prog="brainfuck serve")
+    arg_parser.add_argument(
+        "address",
+        nargs="?",
+        default=DEFAULT_ADDRESS,
+        help="Unix socket path or HOST:PORT (default: %(default)s)",
+    )
+    arg_parser.add_argument(
+        "-w",
+        "--workers",
+        default=DEFAULT_WORKERS,
+        type=int,
+        help="number of warm worker processes (default: %(default)s)",
+    )
+    arg_parser.add_argument(
+        "-r",
+        "--recursion",
+        default=DEFAULT_MAX_RECURSION,
+        type=int,
+        metavar="MAX_RECURSION",
+        help="maximum MAX_RECURSION per request (default: %(default)s)",
+    )
+    arg_parser.add_argument(
+        "--timeout",
+        default=DEFAULT_MAX_TIMEOUT,
+        type=float,
+        metavar="SECONDS",
+        help="maximum wall-clock seconds per request (default: %(default)s)",
+    )
+    arg_parser.add_argument(
+        "--cache-size",
+        default=0,
+        type=int,
+        metavar="N",
+        help="memoize up to N completed runs per worker (default: off)",
+    )
+    arg_parser.add_argument(
+        "--cache-dir",
+        type=str,
+        metavar="DIR",
+        help="share memoized runs between workers through DIR",
+    )
+    arg_parser.add_argument(
+        "--public",
+        action="store_true",
+        help="allow TCP addresses other than loopback ones",
+    )
+    arguments = arg_parser.parse_args(args)
+
+    try:
+        serve(
+            arguments.address,
+            arguments.workers,
+            arguments.recursion,
+            arguments.timeout,
+            ready=lambda: print(
+                "serving on {}".format(arguments.address), file=sys.stderr
+            ),
+            cache_size=arguments.cache_size,
+            cache_dir=arguments.cache_dir,
+            public=arguments.public,
+        )
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
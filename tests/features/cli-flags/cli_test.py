@@ -162,3 +162,98 @@ class TestCLICombinedFlags:
             os.unlink(loadpath)
             os.unlink(outpath)
             os.unlink(dumppath)
+
+
+class TestCLITimeoutFlag:
+    def test_timeout_stops_endless_program(self):
+        result = run_cli("-c", "-r", str(10**12), "--timeout", "0.2", "+[>[-]<]")
+        assert result.returncode == 0
+        assert "Execution timed out!" in result.stderr
+
+
+class TestCLIInputFlag:
+    def test_input_feeds_comma(self):
+        result = run_cli("-c", "--input", "Hi", ",.,.")
+        assert result.returncode == 0
+        assert result.stdout == "Hi"
+
+
+class TestCLIBinarySnapshot:
+    def test_dump_and_load_binary_snapshot(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "tape.bft")
+            result = run_cli("-c", "--dump", path, "+" * 65 + ">++")
+            assert result.returncode == 0
+            result = run_cli("-c", "--load", path, "<.")
+            assert result.returncode == 0
+            assert result.stdout == "A"
+
+
+class TestCLIMappedTape:
+    def test_tape_persists_across_runs(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "tape.bft")
+            args = ("-c", "--tape", path, "--tape-size", "4096")
+            result = run_cli(*args, "+" * 65 + ">")
+            assert result.returncode == 0
+            result = run_cli(*args, "<.")
+            assert result.returncode == 0
+            assert result.stdout == "A"
+
+
+class TestCLIPagedFlag:
+    def test_paged_tape_reaches_far_cells(self):
+        result = run_cli("-c", "--paged", ">" * 70000 + "+" * 65 + ".")
+        assert result.returncode == 0
+        assert result.stdout == "A"
+
+
+class TestCLIStatsFlag:
+    def test_stats_reports_pointer_range(self):
+        result = run_cli("-c", "--stats", "+[->>+<<]")
+        assert result.returncode == 0
+        assert "pointer range: 0 .. 2" in result.stderr
+        assert "kernel: unchecked" in result.stderr
+
+    def test_stats_reports_stop_location(self):
+        result = run_cli("-c", "--stats", "+\n++[>+<++]")
+        assert "Infinite loop detected at <input>:2:3!" in result.stderr
+        assert "stopped at: <input>:2:3" in result.stderr
+
+    def test_stats_reports_unbounded_range(self):
+        result = run_cli("-c", "--stats", "+[>+]", "-r", "100")
+        assert "pointer range: unbounded" in result.stderr
+
+
+class TestCLICompile:
+    def test_compile_and_run_bytecode(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            source = os.path.join(tmpdir, "prog.bf")
+            with open(source, "w") as f:
+                f.write("[comment, ignored.]{p65}.")
+            result = run_cli("compile", source)
+            assert result.returncode == 0
+            bytecode = os.path.join(tmpdir, "prog.bfc")
+            assert os.path.exists(bytecode)
+            result = run_cli("-c", "-f", bytecode)
+            assert result.returncode == 0
+            assert result.stdout == "A"
+
+    def test_compile_output_flag(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            source = os.path.join(tmpdir, "prog.bf")
+            with open(source, "w") as f:
+                f.write("+" * 66 + ".")
+            bytecode = os.path.join(tmpdir, "out.bfc")
+            result = run_cli("compile", source, "-o", bytecode)
+            assert result.returncode == 0
+            assert run_cli("-c", "-f", bytecode).stdout == "B"
+
+    def test_compile_reports_unbalanced_brackets(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            source = os.path.join(tmpdir, "prog.bf")
+            with open(source, "w") as f:
+                f.write("[")
+            result = run_cli("compile", source)
+            assert result.returncode == 1
+            assert "brackets not balanced" in result.stderr
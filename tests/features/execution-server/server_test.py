@@ -0,0 +1,201 @@
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import pytest
+
+from brainfuck.client import connect, run_remote
+
+
+@pytest.fixture(scope="module")
+def server_address():
+    tmpdir = tempfile.mkdtemp()
+    address = os.path.join(tmpdir, "bf.sock")
+    cmd = [sys.executable, "-m", "brainfuck", "serve", address, "-w", "2"]
+    cmd += ["-r", str(10**15), "--timeout", "1"]
+    proc = subprocess.Popen(cmd, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            connect(address).close()
+            break
+        except OSError:
+            if time.monotonic() > deadline:
+                proc.kill()
+                raise
+            time.sleep(0.1)
+    yield address
+    proc.terminate()
+    proc.wait(timeout=10)
+    assert not os.path.exists(address)
+
+
+def run_cli(*args):
+    cmd = [sys.executable, "-m", "brainfuck"] + list(args)
+    return subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+
+
+def test_server_runs_program(server_address) -> None:
+    """
+    Given a running `brainfuck serve` instance
+    When a client sends a program
+    Then its output is streamed back followed by a complete status
+    """
+    out = io.StringIO()
+    result = run_remote(server_address, "+" * 72 + ".+.", output_file=out)
+    assert out.getvalue() == "HI"
+    assert result == {"status": "complete", "pointer": 0}
+
+
+def test_server_feeds_input(server_address) -> None:
+    out = io.StringIO()
+    run_remote(server_address, ",+.,+.", input_data="ab", output_file=out)
+    assert out.getvalue() == "bc"
+
+
+def test_server_caps_timeout(server_address) -> None:
+    """
+    Given a server started with --timeout 1
+    When a client asks for a longer budget on an endless program
+    Then the request stops with a timeout status
+    """
+    started = time.monotonic()
+    result = run_remote(
+        server_address,
+        "+[>[-]<]",
+        max_recursion=10**15,
+        timeout=60,
+        output_file=io.StringIO(),
+    )
+    assert result["status"] == "timeout"
+    assert time.monotonic() - started < 10
+
+
+def test_server_reports_errors(server_address) -> None:
+    with pytest.raises(Exception, match="brackets not balanced"):
+        run_remote(server_address, "[", output_file=io.StringIO())
+
+
+def test_server_connection_accepts_several_requests(server_address) -> None:
+    request = '{"program": "%s.", "max_recursion": 100}\n' % ("+" * 33)
+    with connect(server_address) as sock, sock.makefile("rw") as f:
+        for _ in range(2):
+            f.write(request)
+            f.flush()
+            assert f.readline() == '{"output": "!"}\n'
+            assert f.readline() == '{"status": "complete", "pointer": 0}\n'
+
+
+def test_server_rejects_imports_outside_bflib(server_address) -> None:
+    """
+    Given a running `brainfuck serve` instance
+    When a client imports a file outside bflib through `..`
+    Then the import fails and the file is not read
+    """
+    out = io.StringIO()
+    result = run_remote(
+        server_address, "{../../../../../../etc/hostname}.", output_file=out
+    )
+    assert out.getvalue() == "Could not import: ../../../../../../etc/hostname\n"
+    assert result["status"] == "complete"
+
+
+def test_server_drops_idle_connections(server_address) -> None:
+    """
+    Given a server started with --timeout 1
+    When a client connects and sends nothing
+    Then the server closes the connection after about a second
+    """
+    with connect(server_address) as sock, sock.makefile("rw") as f:
+        started = time.monotonic()
+        assert f.readline() == ""
+        assert 0.5 < time.monotonic() - started < 10
+
+
+def test_remote_cli_flag(server_address) -> None:
+    """
+    Given a running `brainfuck serve` instance
+    When I run `brainfuck --remote ADDRESS PROGRAM`
+    Then the output is printed by the thin client
+    """
+    result = run_cli("--remote", server_address, "--input", "A", ",+.")
+    assert result.returncode == 0
+    assert result.stdout == "B"
+
+
+def test_remote_client_does_not_import_jit() -> None:
+    code = (
+        "import sys, brainfuck, brainfuck.client;"
+        "print('numba' in sys.modules or 'numpy' in sys.modules)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, timeout=30
+    )
+    assert result.stdout.strip() == "False"
+
+
+def test_remote_cli_reports_unreachable_server() -> None:
+    with socket.socket(socket.AF_INET) as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    result = run_cli("--remote", "127.0.0.1:{}".format(port), "+.")
+    assert result.returncode == 1
+    assert result.stderr
+
+
+def test_handle_request_uses_result_cache() -> None:
+    from brainfuck import ResultCache
+    from brainfuck.server import handle_request
+
+    cache = ResultCache()
+    request = {"program": ",+.", "input": "a"}
+    replies = []
+    for _ in range(2):
+        wfile = io.StringIO()
+        handle_request(request, wfile, 10**6, 1.0, cache)
+        replies.append(wfile.getvalue())
+    assert replies[0] == replies[1]
+    assert '"b"' in replies[0]
+
+
+def test_handle_request_reports_stop_location() -> None:
+    from brainfuck.server import handle_request
+
+    wfile = io.StringIO()
+    handle_request({"program": "++\n+[>+<++]"}, wfile, 10**6, 1.0)
+    reply = json.loads(wfile.getvalue().splitlines()[-1])
+    assert reply["status"] == "infinite_loop"
+    assert reply["stopped_at"] == "<input>:2:2"
+
+
+@pytest.mark.parametrize("timeout", [float("nan"), float("inf"), -1.0])
+def test_handle_request_rejects_bad_timeouts(timeout) -> None:
+    from brainfuck.server import handle_request
+
+    wfile = io.StringIO()
+    handle_request({"program": "+[[-]+]", "timeout": timeout}, wfile, 10**6, 1.0)
+    reply = json.loads(wfile.getvalue())
+    assert "timeout" in reply["error"]
+
+
+def test_server_rejects_nan_timeout(server_address) -> None:
+    """
+    Given a running `brainfuck serve` instance
+    When a client sends a NaN timeout, which JSON parsers accept
+    Then the request fails instead of running without a deadline
+    """
+    with connect(server_address) as sock, sock.makefile("rw") as f:
+        f.write('{"program": "+[[-]+]", "timeout": NaN}\n')
+        f.flush()
+        assert "error" in json.loads(f.readline())
+
+
+def test_serve_refuses_public_addresses() -> None:
+    result = run_cli("serve", "0.0.0.0:0")
+    assert result.returncode == 1
+    assert "--public" in result.stderr
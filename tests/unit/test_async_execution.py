@@ -0,0 +1,168 @@
+"""Unit tests for the asyncio execution API (execute_async)."""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from brainfuck import STATUS_TIMEOUT, BrainFuck
+
+
+class MemoryWriter:
+    """Minimal StreamWriter stand-in recording writes and drains."""
+
+    def __init__(self):
+        self.data = b""
+        self.drains = 0
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        self.drains += 1
+
+
+class GatedExecutor(ThreadPoolExecutor):
+    """Executor whose jobs wait for `gate` once they have `started`."""
+
+    def __init__(self):
+        super().__init__(max_workers=1)
+        self.started = threading.Event()
+        self.gate = threading.Event()
+
+    def submit(self, fn, *args):
+        def gated():
+            self.started.set()
+            self.gate.wait()
+            return fn(*args)
+
+        return super().submit(gated)
+
+
+async def chunks(*items):
+    for item in items:
+        yield item
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestExecuteAsync:
+    def test_output_goes_to_writer(self):
+        writer = MemoryWriter()
+        bf = BrainFuck()
+        assert run(bf.execute_async("+" * 72 + ".+.", writer=writer)) is None
+        assert writer.data == b"HI"
+        assert writer.drains >= 1
+
+    def test_input_from_stream_reader(self):
+        async def session():
+            reader = asyncio.StreamReader()
+            reader.feed_data(b"ab")
+            reader.feed_eof()
+            writer = MemoryWriter()
+            await BrainFuck().execute_async(",+.,+.,.", reader, writer)
+            return writer.data
+
+        assert run(session()) == b"bc-1"
+
+    def test_input_from_async_iterator(self):
+        writer = MemoryWriter()
+        reader = chunks("x", b"y", 122)
+        run(BrainFuck().execute_async(",.,.,.", reader, writer))
+        assert writer.data == b"xyz"
+
+    def test_print_cells_written_to_writer(self):
+        writer = MemoryWriter()
+        run(BrainFuck().execute_async("+++>++*", writer=writer))
+        assert writer.data == b"3 |2|\n"
+
+    def test_timeout_leaves_resumable_run(self):
+        bf = BrainFuck()
+        writer = MemoryWriter()
+        status = run(bf.execute_async("+++++.", writer=writer, timeout=0))
+        assert status == STATUS_TIMEOUT
+        assert run(bf.resume_async(writer=writer)) is None
+        assert writer.data == bytes([5])
+
+    def test_cancelled_task_leaves_resumable_run(self):
+        bf = BrainFuck()
+
+        async def session():
+            task = asyncio.create_task(
+                bf.execute_async(
+                    "+[>+[-]<]", MAX_RECURSION=10**12, slice_iterations=1000
+                )
+            )
+            await asyncio.sleep(0.01)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                return True
+            return False
+
+        assert run(session())
+        assert bf._suspended is not None
+        assert bf.cells[0] == 1
+
+    def test_many_concurrent_sessions(self):
+        async def session(n):
+            writer = MemoryWriter()
+            await BrainFuck().execute_async(",[>+>+<<-]>.", chunks(bytes([n])), writer)
+            return writer.data
+
+        async def all_sessions():
+            return await asyncio.gather(*(session(n) for n in range(1, 101)))
+
+        results = run(all_sessions())
+        assert results == [bytes([n]) for n in range(1, 101)]
+
+    def test_slices_in_executor(self):
+        writer = MemoryWriter()
+
+        async def session():
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                await BrainFuck().execute_async(
+                    "+" * 65 + ".", writer=writer, executor=executor
+                )
+
+        run(session())
+        assert writer.data == b"A"
+
+    def test_cancel_during_executor_slice(self):
+        # `>+.<` counts in cell 1 and prints every count: a run that
+        # lost or replayed part of a slice would skip or repeat values
+        bf = BrainFuck(passes=set())
+        writer = MemoryWriter()
+
+        async def session():
+            with GatedExecutor() as executor:
+                task = asyncio.create_task(
+                    bf.execute_async(
+                        "+[>+.<]",
+                        writer=writer,
+                        MAX_RECURSION=10**12,
+                        executor=executor,
+                        slice_iterations=1000,
+                    )
+                )
+                await asyncio.get_running_loop().run_in_executor(
+                    None, executor.started.wait
+                )
+                task.cancel()
+                await asyncio.sleep(0)
+                executor.gate.set()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+                printed = len(writer.data)
+                assert printed and bf.cells[1] in (printed, printed + 1)
+                await bf.resume_async(
+                    writer=writer, MAX_RECURSION=200, executor=executor
+                )
+                return printed
+
+        assert run(session()) < len(writer.data)
+        assert writer.data == bytes(range(1, len(writer.data) + 1))
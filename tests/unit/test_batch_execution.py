@@ -0,0 +1,60 @@
+"""Unit tests for lockstep batch execution (execute_batch)."""
+
+import numpy as np
+
+from brainfuck import BrainFuck
+
+
+class TestExecuteBatch:
+    """Contract tests for BrainFuck.execute_batch."""
+
+    def test_each_lane_reads_its_own_input(self):
+        bf = BrainFuck()
+        outputs = bf.execute_batch(",+.", inputs=["A", "B", "C"])
+        assert outputs == ["B", "C", "D"]
+
+    def test_divergent_loops_match_sequential_execution(self):
+        program = ",[>+++++<-]>."
+        inputs = [bytes([n]) for n in range(1, 12)]
+        outputs = BrainFuck().execute_batch(program, inputs=inputs)
+        expected = []
+        for n in range(1, 12):
+            lane = BrainFuck()
+            tapes = np.zeros((1, 16), dtype=np.int32)
+            tapes[0, 0] = n
+            expected.append(lane.execute_batch("[>+++++<-]>.", tapes=tapes)[0])
+        assert outputs == expected
+        assert outputs[0] == chr(5)
+        assert outputs[10] == chr(55)
+
+    def test_exhausted_input_reads_minus_one(self):
+        outputs = BrainFuck().execute_batch(",.,.", inputs=["A", ""])
+        assert outputs == ["A-1", "-1-1"]
+
+    def test_tapes_are_modified_in_place(self):
+        tapes = np.zeros((2, 8), dtype=np.int32)
+        tapes[1, 0] = 10
+        BrainFuck().execute_batch("[->+<]>+++", tapes=tapes)
+        assert tapes[0, :2].tolist() == [0, 3]
+        assert tapes[1, :2].tolist() == [0, 13]
+
+    def test_max_recursion_is_per_lane(self):
+        tapes = np.zeros((2, 4), dtype=np.int32)
+        tapes[0, 0] = 1
+        BrainFuck().execute_batch("[>+<]", tapes=tapes, MAX_RECURSION=31)
+        assert tapes[0, 1] == 6
+        assert tapes[1, 1] == 0
+
+    def test_output_larger_than_buffer_is_kept(self):
+        outputs = BrainFuck().execute_batch(
+            "+" * 65 + "[>" + "." * 100 + "<-]", inputs=["", ""]
+        )
+        assert outputs[0] == outputs[1] == "\n" * 6500
+
+    def test_instance_state_untouched(self):
+        bf = BrainFuck()
+        bf.execute("+++")
+        bf.execute_batch(">+++++.", inputs=[""])
+        assert bf.cells[0] == 3
+        assert bf.cells[1] == 0
+        assert bf.pointer == 0
@@ -0,0 +1,235 @@
+import io
+
+import numpy as np
+import pytest
+
+from brainfuck import BrainFuck, core
+from brainfuck.core import (
+    OP_BREAK,
+    STATUS_BREAKPOINT,
+    STATUS_MAX_ITERATIONS,
+    STATUS_WATCHPOINT,
+    convert_ir_to_numeric,
+    lex_ir,
+    optimize_ir,
+    set_breakpoints,
+)
+
+PROGRAMS = [
+    "+++[>+.<-]>>++",
+    "++++++[>++++++++<-]>+.>+>++>+++>++++<<<<[->>+<<]>>.",
+    "+>++>+++>++++>+++++" + "<" * 20 + "+",
+    ",[>+>++<<-]>.>.",
+]
+
+
+def run(bf, program, **kwargs):
+    out = io.StringIO()
+    status = bf.execute(program, output_file=out, input_data="\x05", **kwargs)
+    stops = []
+    while status is not None:
+        stops.append((status, bf.stats["stopped_at"], bf.cells.items()))
+        status = bf.resume(output_file=out)
+    return stops, out.getvalue(), bf.cells.items(), bf.pointer
+
+
+class TestSetBreakpoints:
+    def test_patches_a_copy(self):
+        program = convert_ir_to_numeric(lex_ir("+>+."))
+        patched = set_breakpoints(program, [1, 7])
+        assert patched[:, 0].tolist() == [0, OP_BREAK, 0, 2]
+        assert program[1, 0] == 1
+
+    def test_rows_move_to_their_instruction(self):
+        ir, _ = optimize_ir(lex_ir(">+>++>+++>++++<<<<[->+<]"))
+        program = convert_ir_to_numeric(ir)
+        ops = program[:, 0].tolist()
+        block, loop = ops.index(core.OP_DELTA_BLOCK), ops.index(core.OP_LINEAR_LOOP)
+        for pc in (block + 1, len(program) - 1 - loop, block + 6, loop + 1):
+            patched = set_breakpoints(program, [pc])
+            assert np.flatnonzero(patched[:, 0] == OP_BREAK).tolist() in (
+                [block],
+                [loop],
+            )
+
+
+class TestSourceMapFind:
+    def test_program_locations(self):
+        bf = BrainFuck()
+        bf._prepare("+++\n.>.")
+        assert bf.source_map.find("1:1") == [0]
+        assert bf.source_map.find("1:3") == [0]
+        assert bf.source_map.find("2:2") == [1]
+        assert bf.source_map.find("3:1") == []
+        assert bf.source_map.find("missing.bf:1:1") == []
+
+    @pytest.mark.parametrize("location", ["5", "1:", "x:1", "1:0", "a.bf:1:-1"])
+    def test_invalid_locations(self, location):
+        bf = BrainFuck()
+        bf._prepare("+++")
+        with pytest.raises(ValueError, match="invalid location"):
+            bf.source_map.find(location)
+
+    def test_library_locations_per_import(self):
+        bf = BrainFuck()
+        bf._prepare(".{p5}.{p5}")
+        pcs = bf.source_map.find("bflib/p5.bf:6:1")
+        assert len(pcs) == 2
+        assert all(
+            bf.source_map.describe(pc).startswith("bflib/p5.bf:6:1") for pc in pcs
+        )
+
+
+class TestBreakpoints:
+    def test_stops_before_instruction(self):
+        bf = BrainFuck()
+        bf.breakpoints.add("1:8")
+        out = io.StringIO()
+        assert bf.execute("+++[>+.<-]", output_file=out) == STATUS_BREAKPOINT
+        assert bf.stats["stopped_at"] == "<input>:1:8"
+        assert (bf.cells.items(), bf.pointer) == ([(0, 3), (1, 1)], 1)
+
+    def test_every_loop_trip_stops(self):
+        bf = BrainFuck()
+        bf.breakpoints.add("1:7")
+        stops, output, _, _ = run(bf, PROGRAMS[0])
+        assert [cells for _, _, cells in stops] == [
+            [(0, 3), (1, 1)],
+            [(0, 2), (1, 2)],
+            [(0, 1), (1, 3)],
+        ]
+        assert output == "\x01\x02\x03"
+
+    @pytest.mark.parametrize("program", PROGRAMS)
+    @pytest.mark.parametrize("options", [{}, {"paged": True}])
+    def test_runs_like_without_breakpoints(self, program, options):
+        bf = BrainFuck(**options)
+        bf.breakpoints.update(
+            "1:{}".format(column) for column in range(1, len(program) + 1)
+        )
+        stops, *result = run(bf, program)
+        assert stops
+        assert tuple(result) == run(BrainFuck(**options), program)[1:]
+
+    def test_step(self):
+        bf = BrainFuck()
+        bf.breakpoints.add("1:2")
+        assert bf.execute("+.+.+") == STATUS_BREAKPOINT
+        assert bf.resume(1) == STATUS_MAX_ITERATIONS
+        assert bf.stats["stopped_at"] == "<input>:1:3"
+
+    def test_step_over_input(self):
+        # `,` costs no iterations, so the step runs the next instruction too
+        bf = BrainFuck()
+        bf.breakpoints.add("1:1")
+        assert bf.execute(",>.<+", input_data="\x07") == STATUS_BREAKPOINT
+        assert bf.resume(1) == STATUS_MAX_ITERATIONS
+        assert (bf.cells.items(), bf.pointer) == ([(0, 7)], 1)
+
+    def test_step_over_closed_form_loop(self):
+        bf = BrainFuck()
+        bf.breakpoints.add("1:4")
+        assert bf.execute("+++[->++<]+") == STATUS_BREAKPOINT
+        assert bf.resume(1) == STATUS_MAX_ITERATIONS
+        assert bf.cells.items() == [(1, 6)]
+
+    def test_no_breakpoint_location(self):
+        bf = BrainFuck()
+        bf.breakpoints.add("5:1")
+        assert bf.execute("+") is None
+
+
+class TestWatchpoints:
+    def test_stops_after_change(self):
+        bf = BrainFuck()
+        bf.watchpoints.add(1)
+        stops, output, cells, _ = run(bf, PROGRAMS[0])
+        assert [status for status, _, _ in stops] == [STATUS_WATCHPOINT] * 3
+        assert [cells[1] for _, _, cells in stops] == [(1, 1), (1, 2), (1, 3)]
+        assert output == "\x01\x02\x03"
+
+    def test_reports_values(self):
+        bf = BrainFuck()
+        bf.watchpoints.add(-1)
+        assert bf.execute("<++>+") == STATUS_WATCHPOINT
+        assert bf.stats["watchpoint"] == (-1, 0, 2)
+        # `++>` is one add_move instruction
+        assert bf.stats["stopped_at"] == "<input>:1:5"
+
+    def test_input_change(self):
+        bf = BrainFuck()
+        bf.watchpoints.add(0)
+        assert bf.execute(",>+", input_data="A") == STATUS_WATCHPOINT
+        assert bf.stats["watchpoint"] == (0, 0, 65)
+
+    @pytest.mark.parametrize("program", PROGRAMS)
+    def test_runs_like_without_watchpoints(self, program):
+        bf = BrainFuck()
+        bf.watchpoints.update(range(-20, 5))
+        stops, *result = run(bf, program)
+        assert tuple(result) == run(BrainFuck(), program)[1:]
+
+
+class TestStepper:
+    def test_repl(self, monkeypatch, capsys):
+        inputs = iter(
+            [
+                "break 1:5",
+                "watch 2",
+                "+++[>+<-]>>+",
+                "step",
+                "continue",
+                "continue",
+                "step",
+                "break",
+                "quit",
+            ]
+        )
+        monkeypatch.setattr("builtins.input", lambda prompt: next(inputs))
+        BrainFuck().interpreter()
+        lines = capsys.readouterr().out.splitlines()
+        assert lines == [
+            "Breakpoint at <input>:1:4",
+            "|3|",
+            "Stopped at <input>:1:10",
+            "|0| 3",
+            "Cell 2 changed from 0 to 1 at end of <input>",
+            "3 |1|",
+            "No stopped command to step.",
+            "1:5",
+        ]
+
+    @pytest.mark.parametrize(
+        "command, usage",
+        [
+            ("break 5", "break [LOC]"),
+            ("break 1:x", "break [LOC]"),
+            ("break 1:0", "break [LOC]"),
+            ("watch one", "watch [CELL]"),
+            ("unwatch 1.5", "unwatch CELL"),
+            ("step x", "step [N]"),
+            ("step 0", "step [N]"),
+            ("continue -1", "continue"),
+        ],
+    )
+    def test_repl_bad_arguments(self, monkeypatch, capsys, command, usage):
+        inputs = iter(["break 1:3", "+.+.", command, "step", "quit"])
+        monkeypatch.setattr("builtins.input", lambda prompt: next(inputs))
+        bf = BrainFuck()
+        bf.interpreter()
+        lines = capsys.readouterr().out.splitlines()
+        assert lines == [
+            "\x01Breakpoint at <input>:1:3",
+            "|1|",
+            "Usage: " + usage,
+            "Stopped at <input>:1:4",
+            "|2|",
+        ]
+        assert bf.breakpoints == {"1:3"}
+        assert not bf.watchpoints
+
+    def test_cli(self, capsys):
+        core.main(["-c", "--break", "1:3", "+.+."])
+        captured = capsys.readouterr()
+        assert captured.out == "\x01"
+        assert "Breakpoint at <input>:1:3" in captured.err
@@ -0,0 +1,119 @@
+import io
+import struct
+
+import numpy as np
+import pytest
+
+from brainfuck import BrainFuck, core
+from brainfuck.core import BYTECODE_MAGIC, convert_ir_to_numeric, convert_numeric_to_ir
+
+PROGRAM = "[a comment, really.]{p65}.>,+[-.,+]"
+
+
+def run(program, bf=None, input_data="xy"):
+    out = io.StringIO()
+    bf = bf or BrainFuck()
+    status = bf.execute(program, output_file=out, input_data=input_data)
+    return out.getvalue(), bf.cells.items(), bf.pointer, status
+
+
+@pytest.fixture
+def bfc_path(tmp_path):
+    return str(tmp_path / "prog.bfc")
+
+
+@pytest.fixture(autouse=True)
+def clear_program_cache():
+    core._program_cache.clear()
+    yield
+    core._program_cache.clear()
+
+
+class TestBytecode:
+    """Tests for save_bytecode and load_bytecode."""
+
+    def test_round_trip_matches_source_run(self, bfc_path):
+        BrainFuck().save_bytecode(PROGRAM, bfc_path)
+        expected = run(PROGRAM)
+        core._program_cache.clear()
+
+        bf = BrainFuck()
+        cmd = bf.load_bytecode(bfc_path)
+        assert "{" not in cmd
+        assert run(cmd, bf) == expected
+
+    def test_load_skips_compilation(self, bfc_path, monkeypatch):
+        BrainFuck().save_bytecode(PROGRAM, bfc_path)
+        core._program_cache.clear()
+
+        def fail(*args):
+            raise AssertionError("recompiled")
+
+        monkeypatch.setattr(core, "lex_ir", fail)
+        bf = BrainFuck()
+        cmd = bf.load_bytecode(bfc_path)
+        assert run(cmd, bf)[0] == "Axy"
+        assert bf.stats["prefix_steps"] > 0
+
+    def test_program_is_memory_mapped(self, bfc_path):
+        BrainFuck().save_bytecode(PROGRAM, bfc_path)
+        bf = BrainFuck()
+        cmd = bf.load_bytecode(bfc_path)
+        _, numeric_program, info = core._program_cache[cmd, None, True]
+        assert isinstance(numeric_program, np.memmap)
+        assert info["peephole"]["dead_loop"] > 0
+
+    def test_source_map_is_stored(self, bfc_path):
+        bf = BrainFuck()
+        bf.source_name = "prog.bf"
+        bf.save_bytecode("\n{p5}[>+<++]", bfc_path)
+        core._program_cache.clear()
+
+        bf = BrainFuck()
+        bf.execute(bf.load_bytecode(bfc_path))
+        assert bf.stats["stopped_at"] == "prog.bf:2:5"
+        assert bf.stats["instructions"] == {"prog.bf": 7, "bflib/p5.bf": 1}
+
+    def test_other_version_is_recompiled(self, bfc_path, capsys):
+        BrainFuck().save_bytecode(PROGRAM, bfc_path)
+        with open(bfc_path, "r+b") as f:
+            f.seek(len(BYTECODE_MAGIC))
+            f.write(struct.pack("<I", 999))
+
+        assert BrainFuck().load_bytecode(bfc_path) == PROGRAM
+        assert "version 999" in capsys.readouterr().err
+
+    def test_changed_library_is_recompiled(self, bfc_path, tmp_path, monkeypatch):
+        lib_dir = tmp_path / "bflib"
+        lib_dir.mkdir()
+        (lib_dir / "inc.bf").write_text("Description: add one\n+")
+        monkeypatch.setattr(core, "_BFLIB_DIR", str(lib_dir))
+
+        BrainFuck().save_bytecode("{inc}.", bfc_path)
+        assert BrainFuck().load_bytecode(bfc_path) == "+."
+
+        (lib_dir / "inc.bf").write_text("Description: add two\n++")
+        assert BrainFuck().load_bytecode(bfc_path) == "{inc}."
+
+    def test_other_passes_are_recompiled(self, bfc_path):
+        BrainFuck().save_bytecode(PROGRAM, bfc_path)
+        assert BrainFuck(passes=set()).load_bytecode(bfc_path) == PROGRAM
+
+    def test_non_fresh_tape_compiles_expanded_source(self, bfc_path):
+        BrainFuck().save_bytecode("[.[-]]+.", bfc_path)
+        bf = BrainFuck()
+        run("+" * 66, bf)
+        assert run(bf.load_bytecode(bfc_path), bf)[0] == "B\x01"
+
+    def test_not_a_bytecode_file(self, tmp_path):
+        path = tmp_path / "prog.bf"
+        path.write_text("+.")
+        with pytest.raises(Exception, match="is not a"):
+            BrainFuck().load_bytecode(str(path))
+
+
+class TestConvertNumericToIr:
+    def test_round_trip(self):
+        ir = BrainFuck()._compile_to_ir("+>[-<+>]<.,*&")
+        ir, _ = core.optimize_ir(ir)
+        assert convert_numeric_to_ir(convert_ir_to_numeric(ir)) == ir
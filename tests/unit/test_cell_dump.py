@@ -0,0 +1,94 @@
+import io
+
+import numpy as np
+import pytest
+
+from brainfuck import BrainFuck, Cells
+from brainfuck.core import cell_dump_extent, format_cells
+
+
+def dump(program, bf=None, **kwargs):
+    bf = bf or BrainFuck(**kwargs)
+    out = io.StringIO()
+    bf.execute(program, output_file=out)
+    return bf
+
+
+class TestCellDumpExtent:
+    """Tests for the in-kernel `*` extent scan."""
+
+    def test_spans_non_zero_cells_and_pointer(self):
+        tape = np.array([0, 0, 3, 0, 4, 0, 0, 0], dtype=np.int32)
+        assert cell_dump_extent(tape, 6) == (2, 6)
+        assert cell_dump_extent(tape, 0) == (0, 4)
+
+    def test_empty_tape(self):
+        assert cell_dump_extent(np.zeros(5, dtype=np.int32), 3) == (3, 3)
+
+
+class TestFormatCells:
+    def test_matches_print_pos(self):
+        cells = Cells()
+        cells[-2] = 7
+        cells[3] = 1
+        assert cells.print_pos(5) == "7 0 0 0 0 1 0 |0|"
+        assert cells.print_pos(5) == format_cells(-2, [7, 0, 0, 0, 0, 1, 0, 0], 5)
+
+    def test_empty_cells(self):
+        assert Cells().print_pos(4) == "|0|"
+
+
+class TestJitDump:
+    """`*` inside a JIT run renders straight from the tape."""
+
+    @pytest.mark.parametrize(
+        "program",
+        ["++>+*<", "<<+++*>>>>-*", ">" * 40000 + "+*", "*", "+[>+<-]>>>*"],
+    )
+    def test_matches_interpreted(self, program, capsys):
+        dump(program)
+        jit_out = capsys.readouterr().out
+        bf = BrainFuck()
+        bf._execute_interpreted(bf._compile_to_ir(program), 10**6)
+        assert jit_out == capsys.readouterr().out
+
+    def test_cells_are_not_synced(self, monkeypatch):
+        def fail(*args):
+            raise AssertionError("synced for *")
+
+        bf = BrainFuck()
+        bf._prepare("+")
+        monkeypatch.setattr(bf, "_sync_cells_from_tape", fail)
+        tape = np.zeros(8, dtype=np.int32)
+        tape[5] = 2
+        state = np.array([3, 0, 0], dtype=np.int64)
+        assert bf._dump_cells(tape, 4, state) == "|0| 0 2"
+
+    def test_cells_outside_tape_window(self, capsys):
+        bf = BrainFuck()
+        bf.execute("+++>>>>>++")
+        bf.execute("<<<<<<<+*")
+        assert bf.stats["kernel"] == "unchecked"
+        assert capsys.readouterr().out == "|1| 0 3 0 0 0 0 2\n"
+
+    def test_paged_tape(self, capsys):
+        dump("+>>++*", paged=True)
+        assert capsys.readouterr().out == "1 0 |2|\n"
+
+
+class TestCmdHistory:
+    """`&` reuses the joined history until it changes."""
+
+    def test_history_is_joined_once(self, capsys):
+        bf = BrainFuck()
+        bf.execute("+")
+        bf.execute("+++[&-]")
+        out = capsys.readouterr().out
+        assert out == "8 ++++[&-]\n" * 4
+        assert bf.history._text is bf.history.text()
+
+    def test_new_command_invalidates(self, capsys):
+        bf = BrainFuck()
+        bf.execute("&")
+        bf.execute(">&")
+        assert capsys.readouterr().out == "1 &\n3 &>&\n"
@@ -0,0 +1,90 @@
+import pytest
+
+from brainfuck import BrainFuck, CommandHistory, core
+
+
+@pytest.fixture
+def libs(tmp_path, monkeypatch):
+    lib_dir = tmp_path / "bflib"
+    lib_dir.mkdir()
+    (lib_dir / "two.bf").write_text("Description: add two\n++")
+    monkeypatch.setattr(core, "_BFLIB_DIR", str(lib_dir))
+    core._program_cache.clear()
+    yield lib_dir
+    core._program_cache.clear()
+
+
+class TestCommandHistory:
+    """Tests for the bounded, reference-based command history."""
+
+    def test_ring_keeps_last_commands(self):
+        history = CommandHistory(size=3)
+        for cmd in "+-><.":
+            history.append(cmd, {})
+        assert len(history) == 3
+        assert history.text() == "><."
+
+    def test_library_code_is_stored_once(self):
+        history = CommandHistory()
+        for _ in range(100):
+            history.append("{sum}", {"sum": "[->+<]"})
+        assert len(history._libraries) == 1
+        assert history.text() == "[->+<]" * 100
+
+    def test_dropped_library_versions_are_released(self):
+        history = CommandHistory(size=2)
+        history.append("{a}", {"a": "+"})
+        history.append("{a}", {"a": "-"})
+        history.append(".", {})
+        history.append(".", {})
+        assert history._libraries == {}
+        assert not history._references
+
+    def test_pop(self):
+        history = CommandHistory()
+        history.append("+", {})
+        history.append("{a}", {"a": "-"})
+        history.pop()
+        assert history.text() == "+"
+        assert history._libraries == {}
+        history.pop()
+        history.pop()
+        assert history.text() == ""
+
+    def test_spill_to_disk(self, tmp_path):
+        path = tmp_path / "history.bf"
+        path.write_text("stale")
+        history = CommandHistory(size=2, path=str(path))
+        for cmd in ["+", "{a}", ">", "<"]:
+            history.append(cmd, {"a": "--"})
+        assert path.read_text() == "+--"
+        assert history.text() == "+--><"
+        assert len(history) == 2
+
+
+class TestSessionHistory:
+    """`&` prints the history kept by BrainFuck.history."""
+
+    def test_library_changes_keep_old_text(self, libs, capsys):
+        bf = BrainFuck()
+        bf.execute("{two}")
+        (libs / "two.bf").write_text("Description: add three\n+++")
+        bf.execute("{two}&")
+        assert capsys.readouterr().out.endswith("6 +++++&\n")
+
+    def test_bounded_session(self, capsys):
+        bf = BrainFuck(history=CommandHistory(size=2))
+        for _ in range(50):
+            bf.execute("+")
+        bf.execute("&")
+        assert capsys.readouterr().out == "2 +&\n"
+
+    def test_cli_history_size(self, capsys):
+        core.main(["-c", "--history-size", "1", "+&"])
+        assert capsys.readouterr().out == "2 +&\n"
+
+    def test_cli_history_file(self, tmp_path, capsys):
+        path = tmp_path / "history.bf"
+        core.main(["-c", "--history-file", str(path), "+&"])
+        assert capsys.readouterr().out == "2 +&\n"
+        assert path.read_text() == ""
@@ -0,0 +1,113 @@
+import io
+
+import pytest
+
+from brainfuck import BrainFuck
+from brainfuck.core import eliminate_dead_loops, optimize_ir
+
+
+def run(program, bf=None, **kwargs):
+    out = io.StringIO()
+    bf = bf or BrainFuck(**kwargs)
+    status = bf.execute(program, output_file=out, input_data="x")
+    return out.getvalue(), bf.cells.items(), bf.pointer, status
+
+
+class TestEliminateDeadLoops:
+    """Tests for the known-zero dataflow pass."""
+
+    def test_leading_comment_loop_on_zero_tape(self):
+        ir = BrainFuck()._compile_to_ir("[a comment, with. commands]+.")
+        assert eliminate_dead_loops(ir, entry_zero=True) == [("add", 1), ("output",)]
+
+    def test_leading_loop_kept_without_entry_zero(self):
+        ir = BrainFuck()._compile_to_ir("[.]+")
+        assert eliminate_dead_loops(ir) == ir
+
+    def test_loop_after_loop(self):
+        ir = BrainFuck()._compile_to_ir("+[-][,.[*]]>")
+        assert eliminate_dead_loops(ir) == ir[:4] + [("move", 1)]
+
+    def test_tracks_offsets_across_moves(self):
+        ir = BrainFuck()._compile_to_ir(",[-]>+<[.]>[.]")
+        assert eliminate_dead_loops(ir) == ir[:7] + ir[10:]
+
+    def test_add_makes_cell_nonzero(self):
+        ir = BrainFuck()._compile_to_ir("[-]+[-.]")
+        assert eliminate_dead_loops(ir) == ir
+
+    def test_add_wrapping_to_zero(self):
+        ir = BrainFuck()._compile_to_ir("[-]" + "+" * 256 + "[.]")
+        assert eliminate_dead_loops(ir) == ir[:4]
+
+    def test_input_makes_cell_unknown(self):
+        ir = BrainFuck()._compile_to_ir("[-],[.]")
+        assert eliminate_dead_loops(ir) == ir
+
+    def test_dead_loop_inside_live_loop(self):
+        ir = BrainFuck()._compile_to_ir(",[[-][.]>]")
+        optimized, removed = optimize_ir(ir, passes={"dead_loop"})
+        assert removed["dead_loop"] == 3
+        assert optimized == [
+            ("input",),
+            ("jump_zero", 7),
+            ("jump_zero", 5),
+            ("add", -1),
+            ("jump_nz", 2),
+            ("move", 1),
+            ("jump_nz", 1),
+        ]
+
+
+class TestDeadLoopExecution:
+    """Removing dead loops must not change what a program does."""
+
+    @pytest.mark.parametrize(
+        "program",
+        [
+            "[comment, with. commands*&]++++++++[>++++++++<-]>+.",
+            "+++[-][.]>,[-][,]<[>+<-]>.",
+            "+[>,.<-][*]",
+        ],
+    )
+    def test_matches_unoptimized(self, program):
+        assert run(program) == run(program, passes=set())
+
+    def test_leading_loop_runs_on_nonzero_tape(self):
+        bf = BrainFuck()
+        run("+" * 65, bf)
+        assert run("[.-]", bf)[0] == "".join(chr(c) for c in range(65, 0, -1))
+
+    def test_stats_report_removed_instructions(self):
+        bf = BrainFuck()
+        run("[..]+.", bf)
+        assert bf.stats["peephole"]["dead_loop"] == 4
+
+
+class TestLibraryHeaders:
+    """Header lines of bflib files are metadata, not instructions."""
+
+    def test_parse_library(self):
+        text = (
+            "Description: Subtract 10 from current cell.\n"
+            "Assumptions: A,B greater than 0\n"
+            "Begin: |A| B\n"
+            "End: |A-10| B\n"
+            "\n"
+            "----------\n"
+        )
+        header, code = BrainFuck.parse_library(text)
+        assert header == {
+            "Description": "Subtract 10 from current cell.",
+            "Assumptions": "A,B greater than 0",
+            "Begin": "|A| B",
+            "End": "|A-10| B",
+        }
+        assert code == "-" * 10
+
+    def test_library_without_header(self):
+        assert BrainFuck.parse_library("+>+\n<.") == ({}, "+>+<.")
+
+    def test_bundled_library_has_no_header_commands(self):
+        assert "," not in BrainFuck._resolve_imports("{mul}")
+        assert "." not in BrainFuck._resolve_imports("{m10}")
@@ -0,0 +1,73 @@
+"""Unit tests for wall-clock deadlines, cancellation and resume()."""
+
+import threading
+
+import pytest
+
+from brainfuck import (
+    STATUS_CANCELLED,
+    STATUS_MAX_ITERATIONS,
+    STATUS_TIMEOUT,
+    BrainFuck,
+)
+
+ENDLESS = "+[>+[-]<]"
+
+
+class TestTimeout:
+    def test_completed_run_returns_none(self, capsys):
+        bf = BrainFuck()
+        assert bf.execute("+++.", timeout=5) is None
+        assert capsys.readouterr().out == chr(3)
+
+    def test_endless_loop_times_out(self):
+        bf = BrainFuck()
+        status = bf.execute(ENDLESS, MAX_RECURSION=10**12, timeout=0.05)
+        assert status == STATUS_TIMEOUT
+        assert bf.cells[0] == 1
+
+    def test_zero_timeout_stops_before_running(self):
+        bf = BrainFuck()
+        assert bf.execute("+++", timeout=0) == STATUS_TIMEOUT
+        assert bf.cells[0] == 0
+
+
+class TestCancellation:
+    def test_preset_token_cancels(self):
+        cancel = threading.Event()
+        cancel.set()
+        bf = BrainFuck()
+        assert bf.execute("+++", cancel=cancel) == STATUS_CANCELLED
+
+    def test_cancel_from_another_thread(self):
+        cancel = threading.Event()
+        timer = threading.Timer(0.05, cancel.set)
+        timer.start()
+        try:
+            status = BrainFuck().execute(ENDLESS, MAX_RECURSION=10**12, cancel=cancel)
+        finally:
+            timer.cancel()
+        assert status == STATUS_CANCELLED
+
+
+class TestResume:
+    def test_resume_after_timeout_finishes_program(self, capsys):
+        bf = BrainFuck()
+        assert bf.execute("+++++.", timeout=0) == STATUS_TIMEOUT
+        assert bf.resume() is None
+        assert capsys.readouterr().out == chr(5)
+
+    def test_resume_after_max_recursion(self):
+        bf = BrainFuck()
+        program = "+" * 3 + ">" + "+" * 2
+        assert bf.execute(program, MAX_RECURSION=2) == STATUS_MAX_ITERATIONS
+        assert bf.cells[0] == 3
+        assert bf.resume() is None
+        assert bf.cells[1] == 2
+        assert bf.pointer == 1
+
+    def test_resume_without_suspended_run_raises(self):
+        bf = BrainFuck()
+        bf.execute("+")
+        with pytest.raises(Exception, match="no suspended run"):
+            bf.resume()
@@ -0,0 +1,139 @@
+import io
+
+import numpy as np
+import pytest
+
+from brainfuck import BrainFuck
+from brainfuck.core import (
+    PEEPHOLE_PASSES,
+    Cells,
+    block_window,
+    convert_ir_to_numeric,
+    execute_jit,
+    optimize_ir,
+    summarize_delta_blocks,
+)
+
+# `>+>++>+++>++++` followed by output keeps the loop from being folded
+PROGRAMS = [
+    ">+++>++++++>+>++<<<<-" * 3 + ">>.",
+    "+++[>+>++>+++>++++.<<<<-]>>>>.",
+    "++>>>-<<+>--<" + ">+>+>+>+.",
+    "+>++>+++>" + "<" * 40 + "+>>+.",
+]
+
+# every pass but delta_block, whose blocks must behave like these runs
+FUSED = {name for name, _ in PEEPHOLE_PASSES} - {"delta_block"}
+
+
+def numeric(program, passes=None):
+    ir, _ = optimize_ir(BrainFuck()._compile_to_ir(program), passes)
+    return convert_ir_to_numeric(ir)
+
+
+def run_kernel(program, budget, tape_size=64):
+    tape = np.zeros(tape_size, dtype=np.int32)
+    state = np.array([tape_size // 2, 0, 0], dtype=np.int64)
+    output_buf = np.zeros(16, dtype=np.int32)
+    status, iterations = execute_jit(program, tape, state, output_buf, budget)
+    return status, iterations, state[0], tape.tolist(), output_buf[: state[2]].tolist()
+
+
+def run(program, max_recursion=10**6, **kwargs):
+    out = io.StringIO()
+    bf = BrainFuck(**kwargs)
+    status = bf.execute(program, max_recursion, output_file=out)
+    return out.getvalue(), bf.cells.items(), bf.pointer, status
+
+
+class TestSummarizeDeltaBlocks:
+    def test_unrolled_init_collapses(self):
+        ir = BrainFuck()._compile_to_ir(">++++>+++++++>+++>" * 50 + ".")
+        ir, removed = optimize_ir(ir)
+        assert ir[0] == ("delta_block", 301, 200)
+        assert ir[1:4] == [
+            ("block_delta", 0, 0),
+            ("block_delta", 1, 4),
+            ("block_delta", 2, 7),
+        ]
+        assert removed["delta_block"] == 150
+
+    def test_short_runs_are_kept(self):
+        ir = [("add", 1), ("move", 1), ("output",), ("add", 2)]
+        assert summarize_delta_blocks(ir) == ir
+
+    def test_window_marks_pointer_path(self):
+        ir = summarize_delta_blocks(
+            [("move", -3), ("move", 5), ("add", 1), ("move", -1)]
+        )
+        assert ir[:4] == [
+            ("delta_block", 4, 1),
+            ("block_delta", -3, 0),
+            ("block_delta", 2, 1),
+            ("block_end", 4),
+        ]
+        end, low, deltas = block_window(ir, 0)
+        assert (end, low, deltas.tolist()) == (3, -3, [0, 0, 0, 0, 0, 1])
+
+    def test_origins_follow_the_run(self):
+        origins = []
+        summarize_delta_blocks(
+            [("output",), ("add", 1), ("move", 1), ("add", 1), ("move", 1)],
+            origins=origins,
+        )
+        assert origins == [0, 1, 1, 1, 1, 1, 1, 2, 3, 4]
+
+
+class TestDeltaBlockKernels:
+    """Blocks leave exactly the state of the instructions they summarize."""
+
+    @pytest.mark.parametrize("program", PROGRAMS)
+    @pytest.mark.parametrize("budget", [1, 3, 9, 30, 10**6])
+    def test_execute_jit_matches_unoptimized(self, program, budget):
+        assert (
+            run_kernel(numeric(program), budget)[1:]
+            == run_kernel(numeric(program, FUSED), budget)[1:]
+        )
+
+    def test_window_off_the_tape_runs_the_original_instructions(self):
+        program = "+>++>+++>++++<<<<<<<+"
+        assert (
+            run_kernel(numeric(program), 100, tape_size=4)[1:]
+            == run_kernel(numeric(program, FUSED), 100, tape_size=4)[1:]
+        )
+
+    @pytest.mark.parametrize(
+        "program",
+        [",><>-+<.", ",+>+<->+<.", "," + ("+" * 128 + ">+<") * 2 + "."],
+    )
+    @pytest.mark.parametrize("options", [{}, {"tracing": True}], ids=["jit", "traced"])
+    def test_eof_cells_wrap_only_when_added_to(self, program, options):
+        # `,` leaves -1 at EOF; only an add wraps it to 255
+        def eof_run(**kwargs):
+            out = io.StringIO()
+            bf = BrainFuck(**kwargs)
+            bf.execute(program, output_file=out, input_data="")
+            return out.getvalue(), bf.cells.items()
+
+        assert eof_run(**options) == eof_run(passes=FUSED, **options)
+
+    @pytest.mark.parametrize("program", PROGRAMS)
+    @pytest.mark.parametrize(
+        "options", [{"tracing": True}, {"paged": True}], ids=["traced", "paged"]
+    )
+    def test_other_kernels(self, program, options):
+        assert run(program, **options) == run(program)
+        assert run(program, 25, **options) == run(program, 25, passes=FUSED, **options)
+
+
+class TestCellsAddBlock:
+    def test_dense_window(self):
+        cells = Cells()
+        cells[1] = 255
+        cells.add_block(0, np.array([3, 2, 0, -1]))
+        assert cells.items() == [(0, 3), (1, 1), (3, 255)]
+
+    def test_window_past_dense_list(self):
+        cells = Cells()
+        cells.add_block(-2, np.array([1, 0, 2]))
+        assert cells.items() == [(-2, 1), (0, 2)]
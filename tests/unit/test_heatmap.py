@@ -0,0 +1,133 @@
+import io
+import json
+
+import numpy as np
+import pytest
+
+from brainfuck import BrainFuck, Heatmap, core
+from brainfuck.core import (
+    STATUS_BREAKPOINT,
+    STATUS_MAX_ITERATIONS,
+    convert_ir_to_numeric,
+    execute_jit,
+    execute_profile_jit,
+    lex_ir,
+    optimize_ir,
+)
+
+PROGRAMS = [
+    "++++++++[>++++[>++>+++>+++>+<<<<-]>+>+>->>+[<]<-]>>.>---.+++++++..+++.",
+    "<<<+>>>>>>-[<+>-]",
+    ",[>+>++<<-]>.>.",
+    "+" * 300 + ".",
+]
+
+
+def profile(program, budget=10**6, tape_size=64):
+    ir, _ = optimize_ir(lex_ir(program), ())
+    numeric = convert_ir_to_numeric(ir)
+    tape = np.zeros(tape_size, dtype=np.int32)
+    state = np.array([tape_size // 2, 0, 0], dtype=np.int64)
+    output_buf = np.zeros(16, dtype=np.int32)
+    reads = np.zeros(tape_size, dtype=np.int64)
+    writes = np.zeros(tape_size, dtype=np.int64)
+    extent = np.array([state[0], state[0], 0], dtype=np.int64)
+    result = execute_profile_jit(
+        numeric, tape, state, output_buf, budget, reads, writes, extent
+    )
+    return result, state, tape, reads, writes, extent
+
+
+def run(program, **kwargs):
+    out = io.StringIO()
+    bf = BrainFuck(**kwargs)
+    status = bf.execute(program, output_file=out, input_data="\x03")
+    return status, out.getvalue(), bf.cells.items(), bf.pointer, bf
+
+
+class TestExecuteProfileJit:
+    @pytest.mark.parametrize("program", PROGRAMS[:2] + PROGRAMS[3:])
+    @pytest.mark.parametrize("budget", [1, 7, 10**6])
+    def test_matches_execute_jit(self, program, budget):
+        ir, _ = optimize_ir(lex_ir(program), ())
+        numeric = convert_ir_to_numeric(ir)
+        tape = np.zeros(64, dtype=np.int32)
+        state = np.array([32, 0, 0], dtype=np.int64)
+        result = execute_jit(numeric, tape, state, np.zeros(16, np.int32), budget)
+        profiled = profile(program, budget)
+        assert profiled[0] == result
+        assert profiled[1].tolist() == state.tolist()
+        assert profiled[2].tolist() == tape.tolist()
+
+    def test_counts(self):
+        _, _, _, reads, writes, extent = profile("<<+>>>+[-]")
+        assert reads[30:34].tolist() == [1, 0, 0, 4]
+        assert writes[30:34].tolist() == [1, 0, 0, 2]
+        assert extent.tolist() == [30, 33, 1]
+
+    def test_input_is_a_write(self):
+        (status, _), _, _, reads, writes, _ = profile(">,")
+        assert status == core.STATUS_NEED_INPUT
+        assert (reads[33], writes[33]) == (0, 1)
+
+
+class TestHeatmap:
+    @pytest.mark.parametrize("program", PROGRAMS)
+    @pytest.mark.parametrize("options", [{}, {"paged": True}, {"tracing": True}])
+    def test_runs_like_without_profile(self, program, options):
+        assert run(program, profile=True, **options)[:4] == run(program)[:4]
+
+    def test_heatmap(self):
+        bf = run("<<<+>>>>>>-[<+>-]", profile=True)[4]
+        heatmap = bf.heatmap
+        assert bf.stats["kernel"] == "profile"
+        assert heatmap.rows() == [(-3, 1, 1), (2, 255, 255), (3, 766, 256)]
+        assert heatmap.pointer_range == (-3, 3)
+        assert heatmap.max_value == 255
+
+    def test_unprofiled_runs_have_no_heatmap(self):
+        assert run(PROGRAMS[0])[4].heatmap is None
+        assert run(PROGRAMS[0], profile=True, paged=True)[4].heatmap is None
+
+    def test_resume_and_breakpoints(self):
+        # resumed runs count their own accesses
+        bf = BrainFuck(profile=True)
+        out = io.StringIO()
+        assert bf.execute("+." * 5, 4, output_file=out) == STATUS_MAX_ITERATIONS
+        assert bf.heatmap.rows() == [(0, 4, 2)]
+        bf.resume(output_file=out)
+        assert bf.heatmap.rows() == [(0, 6, 3)]
+        bf.breakpoints.add("1:3")
+        assert bf.execute("+>+<", output_file=out) == STATUS_BREAKPOINT
+        assert bf.heatmap.rows() == [(0, 1, 1)]
+
+    def test_render(self):
+        heatmap = Heatmap(
+            np.array([-1, 4]), np.array([2, 0]), np.array([2, 1]), (-1, 4), 9
+        )
+        assert heatmap.render("csv") == "cell,reads,writes\n-1,2,2\n4,0,1\n"
+        assert json.loads(heatmap.render("json")) == {
+            "pointer_range": [-1, 4],
+            "max_value": 9,
+            "cells": [
+                {"cell": -1, "reads": 2, "writes": 2},
+                {"cell": 4, "reads": 0, "writes": 1},
+            ],
+        }
+        lines = heatmap.render("text", width=8).splitlines()
+        assert lines[0] == "pointer range -1..4, max value 9, 2 cells touched"
+        assert lines[1].endswith(" ########")
+        assert lines[2].endswith(" ##")
+        with pytest.raises(ValueError):
+            heatmap.render("xml")
+
+    def test_cli(self, tmp_path, capsys):
+        assert core.main(["-c", "--heatmap", "csv", "++>+."]) is None
+        captured = capsys.readouterr()
+        assert captured.out == "\x01"
+        assert captured.err == "cell,reads,writes\n0,1,1\n1,2,1\n"
+        path = tmp_path / "heatmap.json"
+        core.main(["-c", "--heatmap", "json", "--heatmap-file", str(path), "+"])
+        assert json.loads(path.read_text())["cells"] == [
+            {"cell": 0, "reads": 1, "writes": 1}
+        ]
@@ -0,0 +1,46 @@
+"""Unit tests for predefined input and the compile/library caches."""
+
+import os
+
+from brainfuck import BrainFuck, core
+
+
+class TestInputData:
+    def test_each_comma_consumes_one_value(self, capsys):
+        BrainFuck().execute(",.,.", input_data="ok")
+        assert capsys.readouterr().out == "ok"
+
+    def test_bytes_input(self):
+        bf = BrainFuck()
+        bf.execute(",>,", input_data=b"\x07\xff")
+        assert bf.cells[0] == 7
+        assert bf.cells[1] == 255
+
+    def test_exhausted_input_reads_minus_one(self):
+        bf = BrainFuck()
+        bf.execute(",>,", input_data="A")
+        assert bf.cells[1] == -1
+
+    def test_input_survives_resume(self, capsys):
+        bf = BrainFuck()
+        bf.execute(",.,.", input_data="xy", MAX_RECURSION=1)
+        bf.resume()
+        assert capsys.readouterr().out == "xy"
+
+
+class TestCaches:
+    def test_compiled_program_is_reused(self):
+        program = "+" * 11 + "[->+<]"
+        BrainFuck().execute(program)
+        cached = core._program_cache[program, None, True]
+        BrainFuck().execute(program)
+        assert core._program_cache[program, None, True] is cached
+
+    def test_library_reloaded_when_file_changes(self, tmp_path):
+        lib = tmp_path / "lib.bf"
+        lib.write_text("Description: x\n+++")
+        assert BrainFuck._read_library(str(lib)) == "+++"
+        lib.write_text("Description: x\n++")
+        stat = lib.stat()
+        os.utime(lib, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert BrainFuck._read_library(str(lib)) == "++"
@@ -0,0 +1,71 @@
+import numpy as np
+
+from brainfuck import BrainFuck
+from brainfuck.core import (
+    IR_DTYPE,
+    OP_LINEAR_LOOP,
+    convert_ir_to_numeric,
+    fuse_add_move,
+    ir_array,
+    ir_tuples,
+    lex_ir,
+    optimize_ir,
+)
+
+PROGRAMS = [
+    "++++++++[>++++[>++>+++>+++>+<<<<-]>+>+>->>+[<]<-]>>.>---.+++++++..+++.",
+    "a+ b+-\n>>[-]<<,.*&",
+    "+[>+<-]" + ">+>++>+++" * 10,
+    "",
+]
+
+
+class TestLexIR:
+    def test_matches_tuple_lexer(self):
+        for program in PROGRAMS:
+            positions = []
+            ir = BrainFuck()._compile_to_ir(program, positions)
+            lexed = lex_ir(program)
+            assert ir_tuples(lexed) == ir
+            assert lexed["pos"].tolist() == positions
+
+    def test_dtype(self):
+        assert lex_ir("+>").dtype == np.dtype(IR_DTYPE)
+
+    def test_non_ascii_is_ignored(self):
+        assert ir_tuples(lex_ir("+é+\U0001f600>")) == [("add", 2), ("move", 1)]
+
+
+class TestArrayPasses:
+    def test_array_in_array_out(self):
+        ir, removed = optimize_ir(lex_ir("+[>+<-]>."))
+        assert isinstance(ir, np.ndarray)
+        assert ir[1]["op"] == OP_LINEAR_LOOP
+        assert removed["linear_loop"] > 0
+
+    def test_tuple_api_is_kept(self):
+        ir = [("add", 1), ("move", 1), ("move", 1), ("add", 2)]
+        origins = []
+        assert fuse_add_move(ir, origins=origins) == [
+            ("add_move", 1, 1),
+            ("move", 1),
+            ("add", 2),
+        ]
+        assert origins == [0, 2, 3]
+
+    def test_positions_follow_passes(self):
+        ir = lex_ir("  +[-]  >>+")
+        optimized, _ = optimize_ir(ir)
+        assert optimized["pos"].tolist()[0] == ir["pos"][0]
+        assert set(optimized["pos"].tolist()) <= set(ir["pos"].tolist())
+
+    def test_numeric_conversion_agrees(self):
+        for program in PROGRAMS:
+            ir, _ = optimize_ir(lex_ir(program))
+            np.testing.assert_array_equal(
+                convert_ir_to_numeric(ir), convert_ir_to_numeric(ir_tuples(ir))
+            )
+
+    def test_ir_array_round_trip(self):
+        ir = [("add", 3), ("jump_zero", 2), ("jump_nz", 1), ("add_move", 1, -1)]
+        assert ir_tuples(ir_array(ir)) == ir
@@ -0,0 +1,143 @@
+import io
+
+import numpy as np
+import pytest
+
+from brainfuck import STATUS_INFINITE_LOOP, STATUS_MAX_ITERATIONS, BrainFuck
+from brainfuck.core import (
+    OP_LINEAR_LOOP,
+    convert_ir_to_numeric,
+    execute_jit,
+    fold_linear_loops,
+    loop_trip_count,
+    optimize_ir,
+)
+
+
+def brute_force_trips(value, step):
+    for n in range(256):
+        if (value + n * step) % 256 == 0:
+            return n
+    return -1
+
+
+def run(program, **kwargs):
+    out = io.StringIO()
+    bf = BrainFuck(**kwargs)
+    status = bf.execute(program, output_file=out, input_data="")
+    return out.getvalue(), bf.cells.items(), bf.pointer, status
+
+
+def run_kernel(program, passes=None, tape_size=4):
+    ir, _ = optimize_ir(BrainFuck()._compile_to_ir(program), passes)
+    tape = np.zeros(tape_size, dtype=np.int32)
+    state = np.array([tape_size // 2, 0, 0], dtype=np.int64)
+    output_buf = np.zeros(16, dtype=np.int32)
+    status, iterations = execute_jit(
+        convert_ir_to_numeric(ir), tape, state, output_buf, 1000
+    )
+    return status, iterations, state[0], tape.tolist()
+
+
+class TestLoopTripCount:
+    """Tests for the modular trip count solver."""
+
+    def test_matches_brute_force(self):
+        for step in range(-255, 256, 7):
+            for value in range(256):
+                assert loop_trip_count(value, step) == brute_force_trips(value, step)
+
+    @pytest.mark.parametrize(
+        "value, step, trips",
+        [(6, -2, 3), (5, -2, -1), (0, 3, 0), (255, 1, 1), (3, 0, -1), (-1, 1, 1)],
+    )
+    def test_examples(self, value, step, trips):
+        assert loop_trip_count(value, step) == trips
+
+
+class TestFoldLinearLoops:
+    """Tests for the fold_linear_loops pass."""
+
+    def compile(self, source):
+        return BrainFuck()._compile_to_ir(source)
+
+    def test_clear_loop(self):
+        assert fold_linear_loops(self.compile("[-]"))[:2] == [
+            ("linear_loop", -1, 1),
+            ("jump_zero", 3),
+        ]
+
+    def test_multiply_loop_with_step(self):
+        assert fold_linear_loops(self.compile("[---->+<<+++>]"))[:4] == [
+            ("linear_loop", -4, 6),
+            ("loop_term", -1, 3),
+            ("loop_term", 1, 1),
+            ("jump_zero", 8),
+        ]
+
+    def test_loop_is_kept_after_its_terms(self):
+        loop = self.compile("[->+<]")
+        assert fold_linear_loops(self.compile("[->+<]"))[2:] == loop
+
+    def test_unbalanced_and_io_loops_are_kept(self):
+        for source in ("[->]", "[-.]", "[-,]", "[[-]>]"):
+            ir = fold_linear_loops(self.compile(source))
+            assert ir[-1][0] == "jump_nz"
+
+    def test_inner_loop_only(self):
+        ir = fold_linear_loops(self.compile("+[>[-]<-]"))
+        assert ("linear_loop", -1, 1) in ir
+        assert ir[-1][0] == "jump_nz"
+
+
+class TestClosedFormExecution:
+    """Closed-form loops must behave like the naive loops."""
+
+    @pytest.mark.parametrize(
+        "program",
+        [
+            "+" * 12 + "[---->+++<]>.",
+            "++[>+++++[>+++<-]<-]>>.",
+            "+" * 200 + "[-->+<]" + "+" * 9 + "[--->++<]>.",
+            "-[>+<---]>.",
+            ">" + "+" * 65 + "[<+>-]<.",
+        ],
+    )
+    @pytest.mark.parametrize("kwargs", [{}, {"paged": True}])
+    def test_matches_naive_loop(self, program, kwargs):
+        assert run(program, **kwargs) == run(program, passes=set())
+
+    def test_interpreted_fallback(self):
+        program = "+" * 12 + "[---->+++<]>."
+        bf = BrainFuck()
+        ir_program, _, _ = bf._prepare(program)
+        out = io.StringIO()
+        bf._execute_interpreted(ir_program, 10**5, out)
+        assert (out.getvalue(), bf.cells.items(), bf.pointer) == run(
+            program, passes=set()
+        )[:3]
+
+    def test_non_terminating_loop_has_own_status(self):
+        bf = BrainFuck()
+        assert bf.execute("+++[--]", MAX_RECURSION=10**15) == STATUS_INFINITE_LOOP
+        assert bf.cells[0] == 3
+
+    def test_interpreted_non_terminating_loop(self):
+        bf = BrainFuck()
+        ir_program, _, _ = bf._prepare("+[>+<]")
+        status, pc = bf._execute_interpreted(ir_program, 10**5)
+        assert status == STATUS_INFINITE_LOOP
+        assert ir_program[pc]["op"] == OP_LINEAR_LOOP
+
+    def test_budget_stops_at_loop_and_resumes(self):
+        bf = BrainFuck()
+        status = bf.execute("+" * 10 + "[->+<]", MAX_RECURSION=20)
+        assert status == STATUS_MAX_ITERATIONS
+        assert 0 < bf.cells[1] < 10
+        assert bf.resume() is None
+        assert bf.cells.items() == [(1, 10)]
+
+    @pytest.mark.parametrize("program", ["+++[<<<+>>>--]", "++[->>+++<<]>+"])
+    def test_term_off_the_tape_runs_the_loop(self, program):
+        # the moves of the loop itself stop at the tape edge
+        assert run_kernel(program) == run_kernel(program, passes=set())
@@ -0,0 +1,130 @@
+import io
+
+import numpy as np
+import pytest
+
+from brainfuck import BrainFuck, core
+from brainfuck.core import (
+    STATUS_COMPLETE,
+    STATUS_INFINITE_LOOP,
+    STATUS_NEED_INPUT,
+    STATUS_PRINT_CELLS,
+    STATUS_PRINT_HISTORY,
+    convert_ir_to_numeric,
+    execute_jit,
+    optimize_ir,
+)
+
+pytest.importorskip("llvmlite")
+
+from brainfuck import llvm_backend  # noqa: E402
+from brainfuck.llvm_backend import compile_kernel  # noqa: E402
+
+PROGRAMS = [
+    "++++++++[>++++[>++>+++>+++>+<<<<-]>+>+>->>+[<]<-]>>.>---.+++++++..+++.",
+    "+" * 70 + "[>+>++<<-]>.>.",
+    "+++[>+++[>+++[>+<-]<-]<-]>>>.",
+    "+[>+]",
+    "<<<<+[<+]",
+    ">+>+>+<<<.>.>.>.",
+    "+++[>,.<-]",
+    "++[>+++[--]<-]",
+    "+*>++&",
+    ">+++>++++++>+>++<<<<-" * 3 + ">>.",
+    "+>++>+++>" + "<" * 40 + "+>>+.",
+    "+++[" + "<" * 40 + "+" + ">" * 40 + "--]",
+]
+
+
+def numeric(program, passes=None):
+    ir, _ = optimize_ir(BrainFuck()._compile_to_ir(program), passes)
+    return convert_ir_to_numeric(ir)
+
+
+def run_segments(kernel, program, budget, tape_size=64, output_size=16):
+    """Run program to the end, recording every checkpoint."""
+    tape = np.zeros(tape_size, dtype=np.int32)
+    state = np.array([tape_size // 2, 0, 0], dtype=np.int64)
+    output_buf = np.zeros(output_size, dtype=np.int32)
+    trace = []
+    for _ in range(10_000):
+        status, iterations = kernel(program, tape, state, output_buf, budget)
+        trace.append(
+            (status, iterations, state.tolist(), output_buf[: state[2]].tolist())
+        )
+        state[2] = 0
+        if status == STATUS_NEED_INPUT:
+            tape[state[0]] = 7
+            state[1] += 1
+        elif status in (STATUS_PRINT_CELLS, STATUS_PRINT_HISTORY):
+            state[1] += 1
+        elif status == STATUS_INFINITE_LOOP:
+            break
+        elif status == STATUS_COMPLETE and state[1] >= len(program):
+            break
+    return trace, tape.tolist()
+
+
+class TestLLVMKernel:
+    """The llvmlite kernels follow the execute_jit protocol exactly."""
+
+    @pytest.mark.parametrize("program", PROGRAMS)
+    @pytest.mark.parametrize("passes", [None, set()])
+    @pytest.mark.parametrize("budget", [1, 7, 100, 10**6])
+    def test_matches_execute_jit(self, program, passes, budget):
+        program = numeric(program, passes)
+        kernel = compile_kernel(program)
+        assert run_segments(kernel, program, budget) == run_segments(
+            execute_jit, program, budget
+        )
+
+    def test_kernels_are_cached(self):
+        program = numeric("+.")
+        assert compile_kernel(program) is compile_kernel(program.copy())
+
+    def test_closed_form_loop_uses_table(self):
+        kernel = compile_kernel(numeric("+[>+++<--]"))
+        assert "trips" in kernel.llvm_ir
+
+    def test_infinite_loop_status(self):
+        program = numeric("+[--]")
+        tape = np.zeros(4, dtype=np.int32)
+        state = np.array([0, 0, 0], dtype=np.int64)
+        status, _ = compile_kernel(program)(
+            program, tape, state, np.zeros(4, dtype=np.int32), 100
+        )
+        assert status == STATUS_INFINITE_LOOP
+        assert state[1] == 1
+
+
+class TestLLVMBackend:
+    def test_execute(self):
+        bf = BrainFuck(backend="llvm")
+        out = io.StringIO()
+        bf.execute(",[>+<-]>+.", output_file=out, input_data="@")
+        assert out.getvalue() == "A"
+        assert bf.cells.items() == [(1, 65)]
+        assert bf.stats["kernel"] == "llvm"
+
+    def test_compile_failure_falls_back_to_numba(self, monkeypatch, capsys):
+        def fail(program):
+            raise RuntimeError("no target")
+
+        monkeypatch.setattr(llvm_backend, "compile_kernel", fail)
+        bf = BrainFuck(backend="llvm")
+        out = io.StringIO()
+        bf.execute("+" * 66 + ".", output_file=out)
+        assert out.getvalue() == "B"
+        assert bf.stats["kernel"].endswith("(llvm failed)")
+        assert "llvm backend failed" in capsys.readouterr().err
+
+    def test_paged_tape_keeps_numba(self):
+        bf = BrainFuck(paged=True, backend="llvm")
+        bf.execute(">>+")
+        assert bf.stats["kernel"] == "paged"
+
+    def test_cli_backend(self, capsys):
+        core.main(["-c", "--backend", "llvm", "--stats", "+" * 66 + "."])
+        captured = capsys.readouterr()
+        assert captured.out == "B"
+        assert "kernel: llvm" in captured.err
@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+from brainfuck import BrainFuck, MappedCells
+
+
+@pytest.fixture
+def tape_path(tmp_path):
+    return str(tmp_path / "tape.bft")
+
+
+class TestOpenTape:
+    """Tests for memory-mapped tapes opened with open_tape."""
+
+    def test_new_tape_file_is_sparse(self, tape_path):
+        bf = BrainFuck()
+        bf.open_tape(tape_path, size=2**26)
+        assert os.path.getsize(tape_path) > 2**26
+        if hasattr(os.stat_result, "st_blocks"):
+            assert os.stat(tape_path).st_blocks * 512 < 2**20
+        bf.close_tape()
+
+    def test_jit_runs_on_mapping(self, tape_path):
+        bf = BrainFuck()
+        bf.open_tape(tape_path, size=1024)
+        bf.execute("+++>++[->+<]")
+        assert isinstance(bf.cells, MappedCells)
+        assert bf.cells[0] == 3
+        assert bf.cells[2] == 2
+        assert bf.pointer == 1
+
+    def test_reopen_restores_cells_and_pointer(self, tape_path):
+        bf = BrainFuck()
+        bf.open_tape(tape_path, size=1024)
+        bf.execute("++++<<+++")
+        bf.close_tape()
+        assert bf.cells[0] == 0
+
+        bf2 = BrainFuck()
+        bf2.open_tape(tape_path)
+        assert bf2.pointer == -2
+        assert bf2.cells[0] == 4
+        bf2.execute("+")
+        assert bf2.cells[-2] == 4
+
+    def test_cells_wrap_to_bytes(self, tape_path):
+        bf = BrainFuck()
+        bf.open_tape(tape_path, size=1024)
+        bf.execute("-", input_data="")
+        assert bf.cells[0] == 255
+        bf.cells[1] = -1
+        assert bf.cells[1] == 255
+
+    def test_write_outside_tape_raises(self, tape_path):
+        bf = BrainFuck()
+        bf.open_tape(tape_path, size=16)
+        assert bf.cells[100] == 0
+        with pytest.raises(IndexError):
+            bf.cells[100] = 1
+
+    def test_save_and_open_share_format(self, tape_path, tmp_path):
+        bf = BrainFuck()
+        bf.execute("+++>+")
+        snapshot = str(tmp_path / "snap.bft")
+        bf.save_tape(snapshot)
+
+        bf2 = BrainFuck()
+        bf2.open_tape(snapshot)
+        assert bf2.cells.items() == [(0, 3), (1, 1)]
+        assert bf2.pointer == 1
+
+    def test_print_pos_on_mapped_tape(self, tape_path):
+        bf = BrainFuck()
+        bf.open_tape(tape_path, size=64)
+        bf.execute("+>++")
+        assert bf.cells.print_pos(bf.pointer) == "1 |2|"
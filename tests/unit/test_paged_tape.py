@@ -0,0 +1,89 @@
+import pytest
+
+from brainfuck import BrainFuck, PagedCells
+from brainfuck.core import PAGE_SIZE
+
+
+class TestPagedCells:
+    """Tests for the PagedCells container."""
+
+    def test_unwritten_cells_read_zero_without_allocating(self):
+        cells = PagedCells()
+        assert cells[10**6] == 0
+        cells[-5] = 0
+        assert cells.page_count[0] == 0
+
+    def test_write_allocates_one_page(self):
+        cells = PagedCells()
+        cells[3] = 7
+        cells[4] = 8
+        assert cells.page_count[0] == 1
+        assert cells.items() == [(3, 7), (4, 8)]
+
+    def test_pool_grows(self):
+        cells = PagedCells(capacity=1)
+        for i in range(5):
+            cells[i * PAGE_SIZE] = i + 1
+        assert cells.page_count[0] == 5
+        assert len(cells.pages) >= 5
+        assert [v for _, v in cells.items()] == [1, 2, 3, 4, 5]
+
+    def test_out_of_range_write_raises(self):
+        cells = PagedCells()
+        with pytest.raises(IndexError):
+            cells[-cells.origin] = 1
+
+    def test_to_array_and_load_array(self):
+        cells = PagedCells()
+        cells.load_array(-2, [1, 0, 3])
+        assert cells.items() == [(-2, 1), (0, 3)]
+        origin, values = cells.to_array()
+        assert origin == -2
+        assert values.tolist() == [1, 0, 3]
+
+
+class TestPagedExecution:
+    """Tests for running programs on a paged tape."""
+
+    def test_matches_contiguous_tape(self, capsys):
+        program = "++++++++[>++++[>++>+++<<-]>+<<-]>>.>+.*"
+        BrainFuck().execute(program)
+        expected = capsys.readouterr().out
+        BrainFuck(paged=True).execute(program)
+        assert capsys.readouterr().out == expected
+
+    def test_far_moves_allocate_only_touched_pages(self):
+        bf = BrainFuck(paged=True)
+        hop = ">" * 100000
+        bf.execute("+" + (hop + "+") * 20)
+        assert bf.pointer == 2_000_000
+        assert bf.cells[2_000_000] == 1
+        assert len(bf.cells.items()) == 21
+        assert bf.cells.page_count[0] == 21
+
+    def test_page_fault_grows_pool_in_jit(self):
+        bf = BrainFuck(paged=True)
+        bf.cells = PagedCells(capacity=1)
+        bf.execute("+" + ("<" * PAGE_SIZE + "+") * 4)
+        assert bf.cells.page_count[0] == 5
+        assert bf.cells[-4 * PAGE_SIZE] == 1
+
+    def test_input_on_paged_tape(self):
+        bf = BrainFuck(paged=True)
+        bf.execute(">>,", input_data="A")
+        assert bf.cells[2] == 65
+
+    def test_binary_snapshot_keeps_pages(self, tmp_path):
+        bf = BrainFuck(paged=True)
+        bf.execute("+++" + ">" * 50000 + "++")
+        path = str(tmp_path / "paged.bft")
+        bf.save_tape(path)
+
+        restored = BrainFuck(paged=True)
+        restored.load_tape(path)
+        assert restored.cells.items() == [(0, 3), (50000, 2)]
+        assert restored.pointer == 50000
+
+        plain = BrainFuck()
+        plain.load_tape(path)
+        assert plain.cells[50000] == 2
@@ -0,0 +1,170 @@
+import asyncio
+import importlib.util
+import io
+
+import pytest
+
+from brainfuck import BrainFuck
+from brainfuck.core import (
+    OUTPUT_RUN_MAX,
+    fuse_add_move,
+    fuse_move_add,
+    fuse_output_runs,
+    optimize_ir,
+)
+
+FUSION_PASSES = {"output_run", "add_move", "move_add"}
+
+PROGRAMS = [
+    "+" * 65 + ">" + "+" * 66 + ">" + "+" * 67 + "<<.>.>.<.<.",
+    "++++++++[>++++[>++>+++>+++>+<<<<-]>+>+>->>+[<]<-]>>.>---.+++++++..+++.>>.<-.<.+++.------.--------.>>+.>++.",  # noqa: E501
+    ">+>+>+<<<" + ".>" * 100,
+    "+[>+<-]>[<+>-]<.",
+]
+
+
+KERNELS = [
+    {},
+    {"paged": True},
+    {"tracing": True},
+    pytest.param(
+        {"backend": "llvm"},
+        marks=pytest.mark.skipif(
+            importlib.util.find_spec("llvmlite") is None, reason="needs llvmlite"
+        ),
+    ),
+]
+
+
+def run(program, **kwargs):
+    out = io.StringIO()
+    bf = BrainFuck(**kwargs)
+    status = bf.execute(program, output_file=out, input_data="")
+    return out.getvalue(), bf.cells.items(), bf.pointer, status
+
+
+def stop_state(program, budget, **kwargs):
+    out = io.StringIO()
+    bf = BrainFuck(**kwargs)
+    bf.execute(program, MAX_RECURSION=budget, output_file=out)
+    return out.getvalue(), bf.cells.items(), bf.pointer
+
+
+class TestPasses:
+    """Tests for the individual peephole passes."""
+
+    def test_fuse_add_move(self):
+        ir = [("add", 3), ("move", 2), ("add", -1)]
+        assert fuse_add_move(ir) == [("add_move", 3, 2), ("add", -1)]
+
+    def test_fuse_move_add(self):
+        ir = [("move", -1), ("add", 5), ("output",)]
+        assert fuse_move_add(ir) == [("move_add", -1, 5), ("output",)]
+
+    def test_fuse_output_runs(self):
+        ir = [("output",), ("move", 1)] * 3 + [("output",), ("move", 2), ("output",)]
+        assert fuse_output_runs(ir) == [("output_run", 4, 1), ("move", 2), ("output",)]
+
+    def test_output_run_length_is_capped(self):
+        ir = [("output",), ("move", 1)] * (OUTPUT_RUN_MAX + 1) + [("output",)]
+        fused = fuse_output_runs(ir)
+        assert fused[0] == ("output_run", OUTPUT_RUN_MAX, 1)
+
+    def test_jumps_are_relinked(self):
+        ir = BrainFuck()._compile_to_ir("+>[-<+>]")
+        optimized, removed = optimize_ir(ir, passes=FUSION_PASSES)
+        assert optimized == [
+            ("add_move", 1, 1),
+            ("jump_zero", 5),
+            ("add_move", -1, -1),
+            ("add_move", 1, 1),
+            ("jump_nz", 1),
+        ]
+        assert removed == {"output_run": 0, "add_move": 3, "move_add": 0}
+
+    def test_disabled_passes_do_not_run(self):
+        ir = [("add", 1), ("move", 1), ("add", 1)]
+        optimized, removed = optimize_ir(ir, passes={"move_add"})
+        assert optimized == [("add", 1), ("move_add", 1, 1)]
+        assert removed == {"move_add": 1}
+
+    def test_unknown_pass_names_are_rejected(self):
+        with pytest.raises(ValueError, match="move_ad, output_runs") as error:
+            BrainFuck(passes={"output_runs", "move_ad", "add_move"})
+        assert "valid: dead_loop, linear_loop, output_run" in str(error.value)
+
+
+class TestFusedExecution:
+    """Fused programs must behave exactly like the unfused ones."""
+
+    @pytest.mark.parametrize("program", PROGRAMS)
+    def test_jit_matches_unfused(self, program):
+        assert run(program) == run(program, passes=set())
+
+    @pytest.mark.parametrize("program", PROGRAMS)
+    def test_paged_matches_unfused(self, program):
+        assert run(program, paged=True) == run(program, passes=set())
+
+    @pytest.mark.parametrize("program", PROGRAMS)
+    def test_interpreted_matches_unfused(self, program):
+        expected = run(program, passes=set())
+        bf = BrainFuck()
+        ir_program, _, _ = bf._prepare(program)
+        out = io.StringIO()
+        bf._execute_interpreted(ir_program, 10**5, out)
+        assert (out.getvalue(), bf.cells.items(), bf.pointer) == expected[:3]
+
+    def test_budget_counts_replaced_instructions(self):
+        program = "+>" * 10
+        fused = BrainFuck()
+        unfused = BrainFuck(passes=set())
+        fused.execute(program, MAX_RECURSION=6)
+        unfused.execute(program, MAX_RECURSION=6)
+        assert fused.stats["peephole"]["add_move"] == 10
+        assert fused.cells.items() == unfused.cells.items()
+        assert fused.pointer == unfused.pointer
+
+    @pytest.mark.parametrize("options", KERNELS, ids=["jit", "paged", "traced", "llvm"])
+    def test_budget_is_never_overrun(self, options):
+        program = ">>>[[[.]-----]>>.]-----[[.<.---]]>>++"
+        unfused = [
+            stop_state(program, budget, passes=set(), **options)
+            for budget in range(300)
+        ]
+        for budget in range(300):
+            stopped = stop_state(program, budget, passes=FUSION_PASSES, **options)
+            # in front of a superinstruction the budget does not cover;
+            # the longest one here is an output run of 2 (3 instructions)
+            assert stopped in unfused[max(0, budget - 2) : budget + 1]
+
+    @pytest.mark.parametrize("options", KERNELS, ids=["jit", "paged", "traced", "llvm"])
+    def test_resume_after_stopping_in_front(self, options):
+        program = "+++++[>+++>++<<-]>.>.<.>." + "+>" * 3 + "[-<+>]<."
+        expected = run(program, passes=set())[:3]
+        for budget in range(60):
+            out = io.StringIO()
+            bf = BrainFuck(passes=FUSION_PASSES, **options)
+            if bf.execute(program, MAX_RECURSION=budget, output_file=out):
+                bf.resume(output_file=out)
+            assert (out.getvalue(), bf.cells.items(), bf.pointer) == expected
+
+    def test_output_run_flushes_full_buffer(self):
+        program = ("+" * 65 + ".>" * 50) * 100
+        assert run(program)[0] == run(program, passes=set())[0]
+
+    async def _collect(self, program, **kwargs):
+        chunks = []
+
+        class Writer:
+            def write(self, data):
+                chunks.append(data)
+
+        await BrainFuck(**kwargs).execute_async(program, writer=Writer())
+        return b"".join(chunks)
+
+    def test_async_output_runs(self):
+        program = ("+" * 65 + ".>" * 60) * 100
+        fused = asyncio.run(self._collect(program))
+        unfused = asyncio.run(self._collect(program, passes=set()))
+        assert fused == unfused
+        assert len(fused) == 6000
@@ -2,6 +2,8 @@ import json
 import os
 import tempfile
 
+import pytest
+
 from brainfuck import BrainFuck
 
 
@@ -197,3 +199,72 @@ class TestCellWrapping:
         assert bf.cells[0] == 255
         bf.execute("+")
         assert bf.cells[0] == 0
+
+
+class TestBinarySnapshot:
+    """Tests for the binary tape snapshot format."""
+
+    def test_binary_roundtrip(self, tmp_path):
+        bf = BrainFuck()
+        bf.execute("+++++>+++>++<<<<-")
+        path = str(tmp_path / "tape.bft")
+        bf.save_tape(path)
+        bf2 = BrainFuck()
+        bf2.load_tape(path)
+        assert bf2.pointer == -2
+        assert bf2.cells[-2] == 255
+        assert bf2.cells[-1] == 0
+        assert bf2.cells[0] == 5
+        assert bf2.cells[1] == 3
+        assert bf2.cells[2] == 2
+
+    def test_snapshot_is_not_json(self, tmp_path):
+        bf = BrainFuck()
+        bf.execute("+++")
+        path = str(tmp_path / "tape.bft")
+        bf.save_tape(path)
+        with open(path, "rb") as f:
+            assert f.read(6) == b"BFTAPE"
+
+    def test_json_export_option(self, tmp_path):
+        bf = BrainFuck()
+        bf.execute("+++")
+        path = str(tmp_path / "tape.out")
+        bf.save_tape(path, format="json")
+        with open(path) as f:
+            assert json.load(f)["cells"] == {"0": 3}
+
+    def test_snapshot_stores_only_nonzero_extent(self, tmp_path):
+        bf = BrainFuck()
+        bf.cells[20000] = 1
+        bf.cells[20001] = 2
+        path = str(tmp_path / "tape.bft")
+        bf.save_tape(path)
+        assert os.path.getsize(path) < 1024
+
+    def test_empty_tape_roundtrip(self, tmp_path):
+        path = str(tmp_path / "tape.bft")
+        BrainFuck().save_tape(path)
+        bf = BrainFuck()
+        bf.load_tape(path)
+        assert bf.pointer == 0
+        assert bf.cells.items() == []
+
+    def test_sparse_cells_roundtrip(self, tmp_path):
+        bf = BrainFuck()
+        bf.cells[-40000] = 7
+        bf.cells[40000] = 9
+        path = str(tmp_path / "tape.bft")
+        bf.save_tape(path)
+        bf2 = BrainFuck()
+        bf2.load_tape(path)
+        assert bf2.cells.items() == [(-40000, 7), (40000, 9)]
+
+    def test_unsupported_version_rejected(self, tmp_path):
+        path = str(tmp_path / "tape.bft")
+        BrainFuck().save_tape(path)
+        with open(path, "r+b") as f:
+            f.seek(8)
+            f.write((99).to_bytes(4, "little"))
+        with pytest.raises(Exception, match="unsupported tape snapshot version"):
+            BrainFuck().load_tape(path)
@@ -0,0 +1,119 @@
+import io
+import threading
+
+import pytest
+
+from brainfuck import BrainFuck, Pipeline, core
+from brainfuck.core import (
+    STATUS_CANCELLED,
+    STATUS_COMPLETE,
+    STATUS_INFINITE_LOOP,
+    STATUS_MAX_ITERATIONS,
+    STATUS_TIMEOUT,
+)
+
+ECHO = ",+[-.,+]"
+# add one to every value
+SUCC = ",+[-+.,+]"
+# print every value twice
+DOUBLE = ",+[-..,+]"
+
+
+def run(programs, input_data, *args, **kwargs):
+    out = io.StringIO()
+    pipeline = Pipeline(programs)
+    status = pipeline.run(input_data, *args, output_file=out, **kwargs)
+    return status, out.getvalue(), pipeline
+
+
+def run_sequentially(programs, input_data):
+    for program in programs:
+        out = io.StringIO()
+        BrainFuck().execute(program, 10**8, output_file=out, input_data=input_data)
+        input_data = out.getvalue()
+    return input_data
+
+
+class TestPipeline:
+    def test_stages_feed_each_other(self):
+        status, output, pipeline = run([ECHO, SUCC], "HAL")
+        assert (status, output) == (None, "IBM")
+        assert pipeline.statuses == [STATUS_COMPLETE, STATUS_COMPLETE]
+        assert pipeline.stats["piped"] == {"stage 1": 3}
+
+    def test_matches_sequential_runs(self):
+        programs = [SUCC, DOUBLE, ECHO, SUCC]
+        data = "pipeline " * 50
+        assert run(programs, data, 10**8)[1] == run_sequentially(programs, data)
+
+    def test_streams_through_small_buffers(self, monkeypatch):
+        monkeypatch.setattr(core, "PIPE_BUFFER_SIZE", 16)
+        monkeypatch.setattr(core, "SLICE_ITERATIONS", 100)
+        data = "abcdefgh" * 100
+        status, output, pipeline = run([DOUBLE, ECHO, ECHO], data, 10**6)
+        assert (status, output) == (None, "".join(c * 2 for c in data))
+        assert pipeline.stats["slices"] > 100
+        assert pipeline.stats["piped"] == {"stage 1": 1600, "stage 2": 1600}
+
+    def test_later_stage_finishing_early(self):
+        status, output, pipeline = run([ECHO, ",.,."], "abcdef")
+        assert (status, output) == (None, "ab")
+        assert pipeline.statuses == [STATUS_COMPLETE, STATUS_COMPLETE]
+
+    def test_reads_end_of_input_after_stage_finishes(self):
+        digit_one = "+" * 49 + "."
+        assert run([digit_one, ",.,+."], None)[1] == "1\n"
+
+    def test_stage_cells_are_kept(self):
+        _, _, pipeline = run([ECHO, ",>,"], "xy")
+        assert pipeline.stages[1].cells.items() == [(0, ord("x")), (1, ord("y"))]
+        assert pipeline.stages[1].pointer == 1
+
+    def test_empty_stage_is_end_of_input(self):
+        assert run([ECHO, "", ",+."], "abc")[:2] == (None, "\n")
+
+    def test_budget_per_stage(self):
+        status, _, pipeline = run([ECHO, ECHO], "a" * 100, 50)
+        assert status == STATUS_MAX_ITERATIONS
+        assert pipeline.statuses[0] == STATUS_MAX_ITERATIONS
+        assert "stopped_at" in pipeline.stages[0].stats
+
+    def test_infinite_loop(self):
+        status, _, pipeline = run([ECHO, "+[]"], "a")
+        assert status == STATUS_INFINITE_LOOP
+        assert pipeline.statuses == [STATUS_COMPLETE, STATUS_INFINITE_LOOP]
+
+    def test_timeout_and_cancel(self):
+        assert run([ECHO], "a", timeout=0)[0] == STATUS_TIMEOUT
+        cancel = threading.Event()
+        cancel.set()
+        status, _, pipeline = run([ECHO], "a", cancel=cancel)
+        assert status == STATUS_CANCELLED
+        assert pipeline.statuses == [None]
+
+    def test_dumps_go_to_stderr(self, capsys):
+        assert run([",*.", ECHO], "a")[1] == "a"
+        assert "|97|" in capsys.readouterr().err
+
+    def test_unbalanced_program(self):
+        with pytest.raises(Exception, match="brackets not balanced"):
+            run([ECHO, "["], "a")
+
+
+class TestPipeCommand:
+    def test_pipe(self, tmp_path, capsys):
+        paths = []
+        for name, program in [("echo.bf", ECHO), ("succ.bf", SUCC)]:
+            (tmp_path / name).write_text(program)
+            paths.append(str(tmp_path / name))
+        assert core.main(["pipe", *paths, "--input", "HAL", "--stats"]) == 0
+        captured = capsys.readouterr()
+        assert captured.out == "IBM"
+        assert "piped: {} 3".format(paths[0]) in captured.err
+
+    def test_pipe_bytecode(self, tmp_path, capsys):
+        (tmp_path / "succ.bf").write_text(SUCC)
+        core.main(["compile", str(tmp_path / "succ.bf")])
+        bytecode = str(tmp_path / "succ.bfc")
+        assert core.main(["pipe", bytecode, bytecode, "--input", "A"]) == 0
+        assert capsys.readouterr().out == "C"
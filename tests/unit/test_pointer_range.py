@@ -0,0 +1,68 @@
+from brainfuck import BrainFuck, analyze_pointer_range
+from brainfuck.core import TAPE_SIZE
+
+
+class TestAnalyzePointerRange:
+    """Tests for the static pointer-range analysis."""
+
+    def compile(self, source):
+        return BrainFuck()._compile_to_ir(source)
+
+    def test_straight_line(self):
+        assert analyze_pointer_range(self.compile(">>><<<<<")) == (-2, 3)
+
+    def test_balanced_loop(self):
+        ir = self.compile("+[->>+<<]>")
+        assert analyze_pointer_range(ir) == (0, 2)
+
+    def test_nested_balanced_loops(self):
+        ir = self.compile("+[<[->+<]>-]")
+        assert analyze_pointer_range(ir) == (-1, 0)
+
+    def test_unbalanced_loop_is_unbounded(self):
+        assert analyze_pointer_range(self.compile("+[>+]")) is None
+        assert analyze_pointer_range(self.compile("+[[>]<+]")) is None
+
+    def test_empty_program(self):
+        assert analyze_pointer_range([]) == (0, 0)
+
+
+class TestUncheckedKernel:
+    """Tests for dispatching to the bounds-check-free kernel."""
+
+    def test_bounded_program_uses_exact_tape(self, capsys):
+        bf = BrainFuck()
+        bf.execute("+" * 65 + "[->>+<<]>>.")
+        assert capsys.readouterr().out == "A"
+        assert bf.stats["pointer_range"] == (0, 2)
+        assert bf.stats["kernel"] == "unchecked"
+        assert bf.stats["tape_size"] == 3
+        assert bf.cells[2] == 65
+
+    def test_unbounded_program_keeps_checks(self):
+        bf = BrainFuck()
+        bf.execute("+++[>+<-]>[>]")
+        assert bf.stats["pointer_range"] is None
+        assert bf.stats["kernel"] == "checked"
+        assert bf.stats["tape_size"] == TAPE_SIZE
+
+    def test_cells_outside_window_are_kept(self):
+        bf = BrainFuck()
+        bf.execute("+++>>>>>++")
+        bf.execute("<<<<<<<+")
+        assert bf.stats["kernel"] == "unchecked"
+        assert bf.cells[0] == 3
+        assert bf.cells[5] == 2
+        assert bf.cells[-2] == 1
+
+    def test_range_past_tape_window_keeps_clamping(self):
+        bf = BrainFuck()
+        bf.execute(">" * 30000 + "+" + ">" * 30000)
+        assert bf.stats["kernel"] == "checked"
+        assert bf.pointer == 30000
+
+    def test_print_cells_inside_unchecked_run(self, capsys):
+        bf = BrainFuck()
+        bf.execute("++>+*<")
+        assert capsys.readouterr().out == "2 |1|\n"
+        assert bf.pointer == 0
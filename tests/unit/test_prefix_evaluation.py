@@ -0,0 +1,112 @@
+import io
+import threading
+import time
+
+from brainfuck import BrainFuck
+from brainfuck.core import STATUS_CANCELLED, convert_ir_to_numeric, evaluate_prefix
+
+
+def compile_numeric(source):
+    return convert_ir_to_numeric(BrainFuck()._compile_to_ir(source))
+
+
+class TestEvaluatePrefix:
+    """Tests for evaluate_prefix."""
+
+    def test_stops_at_first_input(self):
+        prefix = evaluate_prefix(compile_numeric("+" * 65 + ".>++,."))
+        assert prefix["output"] == "A"
+        assert prefix["pointer"] == 1
+        assert prefix["origin"] == 0
+        assert prefix["tape"].tolist() == [65, 2]
+        assert prefix["pc"] == 4
+
+    def test_whole_program_without_input(self):
+        numeric = compile_numeric("++[>+++<-]>.")
+        prefix = evaluate_prefix(numeric)
+        assert prefix["pc"] == len(numeric)
+        assert prefix["output"] == "\x06"
+
+    def test_step_bound(self):
+        prefix = evaluate_prefix(compile_numeric("+[]"), max_steps=10)
+        assert prefix["steps"] == 10
+        assert prefix["pc"] in (1, 2)
+
+    def test_program_starting_with_input(self):
+        assert evaluate_prefix(compile_numeric(",+.")) is None
+
+    def test_gives_up_at_deadline_or_cancellation(self):
+        numeric = compile_numeric("+++.")
+        assert evaluate_prefix(numeric, deadline=time.monotonic()) is None
+        cancel = threading.Event()
+        cancel.set()
+        assert evaluate_prefix(numeric, cancel=cancel) is None
+        assert evaluate_prefix(numeric, deadline=time.monotonic() + 60)["steps"] == 2
+
+    def test_stops_before_print_cells(self):
+        prefix = evaluate_prefix(compile_numeric("++*+"))
+        assert prefix["pc"] == 1
+        assert prefix["tape"].tolist() == [2]
+
+
+class TestPrefixExecution:
+    """Tests for starting execute() from a precomputed prefix."""
+
+    def test_output_and_state_match(self):
+        out = io.StringIO()
+        bf = BrainFuck()
+        bf.execute("+" * 72 + ".+.>,.", output_file=out, input_data="z")
+        assert out.getvalue() == "HIz"
+        assert bf.stats["prefix_steps"] == 5
+        assert bf.cells[0] == 73
+        assert bf.cells[1] == ord("z")
+
+    def test_not_used_on_non_zero_tape(self):
+        bf = BrainFuck()
+        bf.execute("+++")
+        bf.execute("[->+<]")
+        assert "prefix_steps" not in bf.stats
+        assert bf.cells[1] == 3
+
+    def test_not_used_when_budget_is_smaller(self):
+        bf = BrainFuck()
+        status = bf.execute("+>+>+", MAX_RECURSION=2)
+        assert "prefix_steps" not in bf.stats
+        assert status is not None
+        assert bf.cells[2] == 0
+
+    def test_budget_includes_prefix_steps(self):
+        bf = BrainFuck()
+        bf.execute("+>+,>+>+", MAX_RECURSION=6, input_data="")
+        assert bf.stats["prefix_steps"] == 3
+        assert bf.cells[2] == 1
+        assert bf.cells[3] == 0
+
+    def test_prefix_is_cached_with_program(self, capsys):
+        program = "+" * 66 + ".,"
+        BrainFuck().execute(program, input_data="")
+        bf = BrainFuck()
+        bf.execute(program, input_data="")
+        assert capsys.readouterr().out == "BB"
+        assert bf.stats["prefix_steps"] == 2
+
+    def test_cancelled_evaluation_falls_back(self, capsys):
+        class CancelDuringPrefix:
+            """Cancel after the check execute() makes before the prefix."""
+
+            checks = 0
+
+            def is_set(self):
+                self.checks += 1
+                return self.checks > 1
+
+        program = "+" * 67 + ".,"
+        bf = BrainFuck()
+        status = bf.execute(program, input_data="", cancel=CancelDuringPrefix())
+        assert status == STATUS_CANCELLED
+        assert "prefix_steps" not in bf.stats
+        assert bf.cells.items() == []
+        bf = BrainFuck()
+        assert bf.execute(program, input_data="") is None
+        assert bf.stats["prefix_steps"] == 2
+        assert capsys.readouterr().out == "C"
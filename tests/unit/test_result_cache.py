@@ -0,0 +1,75 @@
+import io
+import os
+
+from brainfuck import BrainFuck, ResultCache
+
+ECHO_UPPER = ",+[-" + "-" * 32 + ".,+]"
+
+
+def run(cache, program, input_data, **kwargs):
+    out = io.StringIO()
+    bf = BrainFuck(result_cache=cache)
+    status = bf.execute(program, output_file=out, input_data=input_data, **kwargs)
+    return bf, status, out.getvalue()
+
+
+class TestResultCache:
+    """Tests for memoizing completed runs."""
+
+    def test_miss_then_hit(self):
+        cache = ResultCache()
+        bf, status, out = run(cache, ECHO_UPPER + "+", "abc")
+        assert status is None
+        assert out == "ABC"
+        assert bf.stats["result_cache"] == "miss"
+
+        bf, status, out = run(cache, ECHO_UPPER + "+", "abc")
+        assert out == "ABC"
+        assert bf.stats["result_cache"] == "hit"
+        assert bf.cells[0] == 1
+        assert bf.pointer == 0
+
+    def test_key_includes_input_and_tape(self):
+        cache = ResultCache()
+        run(cache, ECHO_UPPER, "abc")
+        bf, _, out = run(cache, ECHO_UPPER, "xyz")
+        assert out == "XYZ"
+        assert bf.stats["result_cache"] == "miss"
+
+        bf = BrainFuck(result_cache=cache)
+        bf.cells[3] = 7
+        bf.execute(ECHO_UPPER, output_file=io.StringIO(), input_data="abc")
+        assert bf.stats["result_cache"] == "miss"
+        assert bf.cells[3] == 7
+
+    def test_incomplete_runs_are_not_cached(self):
+        cache = ResultCache()
+        _, status, _ = run(cache, "+[]", "", MAX_RECURSION=100)
+        assert status is not None
+        bf, _, _ = run(cache, "+[]", "", MAX_RECURSION=100)
+        assert "result_cache" not in bf.stats
+
+    def test_interactive_and_dump_runs_bypass(self, capsys):
+        cache = ResultCache()
+        bf = BrainFuck(result_cache=cache)
+        bf.execute("+++.")
+        assert "result_cache" not in bf.stats
+        bf = BrainFuck(result_cache=cache)
+        bf.execute("+++*", input_data="")
+        assert "result_cache" not in bf.stats
+
+    def test_lru_eviction(self):
+        cache = ResultCache(size=1)
+        run(cache, "+.", "")
+        run(cache, "++.", "")
+        bf, _, _ = run(cache, "+.", "")
+        assert bf.stats["result_cache"] == "miss"
+
+    def test_disk_tier(self, tmp_path):
+        directory = str(tmp_path / "results")
+        run(ResultCache(directory=directory), ECHO_UPPER, "hi")
+        assert len(os.listdir(directory)) == 1
+
+        bf, _, out = run(ResultCache(directory=directory), ECHO_UPPER, "hi")
+        assert out == "HI"
+        assert bf.stats["result_cache"] == "hit"
@@ -0,0 +1,115 @@
+import io
+
+import numpy as np
+import pytest
+
+from brainfuck import BrainFuck, SourceMap, core
+from brainfuck.core import STATUS_INFINITE_LOOP, STATUS_MAX_ITERATIONS, optimize_ir
+
+
+@pytest.fixture
+def libs(tmp_path, monkeypatch):
+    lib_dir = tmp_path / "bflib"
+    lib_dir.mkdir()
+    (lib_dir / "inner.bf").write_text("Description: inner\n\n..\n,")
+    monkeypatch.setattr(core, "_BFLIB_DIR", str(lib_dir))
+    core._program_cache.clear()
+    yield
+    core._program_cache.clear()
+
+
+def prepare(program, bf=None):
+    bf = bf or BrainFuck()
+    bf._prepare(program)
+    return bf.source_map
+
+
+class TestSourceMap:
+    """Tests for the source maps built by _prepare."""
+
+    def test_program_positions(self):
+        source_map = prepare("+++\n  >>.", BrainFuck(passes=set()))
+        assert [source_map.locate(pc) for pc in range(3)] == [
+            ("<input>", 1, 1),
+            ("<input>", 2, 3),
+            ("<input>", 2, 5),
+        ]
+
+    def test_library_positions(self, libs):
+        source_map = prepare("+.{inner}")
+        assert source_map.files == ["<input>", "bflib/inner.bf"]
+        assert source_map.chain(2) == [("bflib/inner.bf", 3, 1), ("<input>", 1, 3)]
+        assert source_map.describe(4) == "bflib/inner.bf:4:1 via <input>:1:3"
+
+    def test_nested_chain(self):
+        source_map = SourceMap(
+            ["main.bf", "bflib/outer.bf", "bflib/inner.bf"],
+            ["\n{outer}", "{inner}", "+"],
+            np.array([[0, -1, 0], [1, 0, 1], [2, 1, 0]], dtype=np.int32),
+            np.array([2], dtype=np.int32),
+            np.array([0], dtype=np.int32),
+        )
+        assert source_map.describe(0) == (
+            "bflib/inner.bf:1:1 via bflib/outer.bf:1:1 via main.bf:2:1"
+        )
+
+    def test_repeated_import_gets_frame_per_site(self, libs):
+        source_map = prepare("{inner}\n{inner}")
+        assert source_map.describe(0) == "bflib/inner.bf:3:1 via <input>:1:1"
+        assert source_map.describe(3) == "bflib/inner.bf:3:1 via <input>:2:1"
+
+    def test_passes_keep_first_position(self):
+        source_map = prepare("++>\n.\n,[-]")
+        assert source_map.locate(0) == ("<input>", 1, 1)
+        assert source_map.locate(1) == ("<input>", 2, 1)
+        assert source_map.locate(3) == ("<input>", 3, 2)
+
+    def test_positions_follow_every_pass(self):
+        ir = BrainFuck()._compile_to_ir("[.]+>.>.,[->++<]")
+        positions = list(range(len(ir)))
+        optimized, _ = optimize_ir(ir, entry_zero=True, positions=positions)
+        assert len(positions) == len(optimized)
+        assert positions == [3, 5, 8, 9, 9, 9, 10, 12, 14]
+
+    def test_instructions_per_file(self, libs):
+        source_map = prepare("+{inner}")
+        assert source_map.instructions_per_file() == {
+            "<input>": 1,
+            "bflib/inner.bf": 3,
+        }
+
+    def test_source_name(self):
+        bf = BrainFuck()
+        bf.source_name = "prog.bf"
+        assert prepare("+", bf).describe(0) == "prog.bf:1:1"
+
+    def test_end_of_program(self):
+        assert prepare("+").describe(1) == "end of <input>"
+
+    def test_arrays(self, libs):
+        source_map = prepare("{inner}")
+        assert source_map.pc_frame.dtype == np.int32
+        assert source_map.frames.tolist() == [[0, -1, 0], [1, 0, 0]]
+
+
+class TestStoppedAt:
+    """Runs that stop early report the source location."""
+
+    def test_infinite_loop_location(self, libs):
+        bf = BrainFuck()
+        status = bf.execute(
+            "{inner}\n+[>+<++]", output_file=io.StringIO(), input_data="\x02"
+        )
+        assert status == STATUS_INFINITE_LOOP
+        assert bf.stats["stopped_at"] == "<input>:2:2"
+
+    def test_max_iterations_location_in_library(self, libs):
+        bf = BrainFuck()
+        status = bf.execute("+{inner}", MAX_RECURSION=2, output_file=io.StringIO())
+        assert status == STATUS_MAX_ITERATIONS
+        assert bf.stats["stopped_at"] == "bflib/inner.bf:3:2 via <input>:1:2"
+
+    def test_completed_run_has_no_location(self):
+        bf = BrainFuck()
+        bf.execute("+")
+        assert "stopped_at" not in bf.stats
@@ -0,0 +1,96 @@
+import io
+
+import pytest
+
+from brainfuck import BrainFuck, core
+from brainfuck.core import STATUS_INFINITE_LOOP, TraceCompiler
+
+HELLO = (
+    "++++++++[>++++[>++>+++>+++>+<<<<-]>+>+>->>+[<]<-]>>.>---.+++++++..+++."
+    ">>.<-.<.+++.------.--------.>>+.>++."
+)
+
+PROGRAMS = [
+    HELLO,
+    "+" * 100 + "[>" + "+" * 100 + "[>+>++<<-]<-]>>.",
+    "+++++[>+++++[>++[>+<-]<-]<-]>>>.",
+    "+" * 70 + "[>+>.<<-]",
+    "++++++++[>+++>.>.<<<-]",
+    "<<<+++++[<++>-]<.",
+    ",[>+<-]>[.[-]]",
+]
+
+
+def run(program, max_recursion=10**6, **kwargs):
+    out = io.StringIO()
+    bf = BrainFuck(**kwargs)
+    status = bf.execute(program, max_recursion, output_file=out, input_data="A")
+    pc = bf._suspended[2] if bf._suspended else None
+    return (out.getvalue(), bf.cells.items(), bf.pointer, status, pc), bf
+
+
+class TestTraceCompiler:
+    """Traces must leave exactly the state the interpreter would."""
+
+    @pytest.mark.parametrize("program", PROGRAMS)
+    @pytest.mark.parametrize("passes", [None, set()])
+    def test_matches_interpreter(self, program, passes):
+        expected, _ = run(program, passes=passes)
+        traced, bf = run(program, passes=passes, tracing=True)
+        assert traced == expected
+        assert bf.stats["kernel"] == "traced"
+
+    @pytest.mark.parametrize("budget", [1, 50, 999, 4321, 20000])
+    def test_budget_stops_at_same_instruction(self, budget, monkeypatch):
+        program = PROGRAMS[1]
+        plain = BrainFuck()
+        plain.tracing = True
+        monkeypatch.setattr(core.TraceCompiler, "enter", lambda *args: None)
+        expected = plain.execute(program, budget, output_file=io.StringIO())
+        expected = (expected, plain.cells.items(), plain.pointer, plain._suspended[2])
+        monkeypatch.undo()
+
+        bf = BrainFuck(tracing=True)
+        status = bf.execute(program, budget, output_file=io.StringIO())
+        assert (status, bf.cells.items(), bf.pointer, bf._suspended[2]) == expected
+
+    def test_hot_loops_are_compiled(self):
+        _, bf = run(PROGRAMS[1], tracing=True, passes=set())
+        assert list(bf.stats["compiled_loops"]) == ["<input>:1:203"]
+        assert bf.stats["trace_speedup"].endswith("x")
+
+    def test_nested_loop_is_not_traced(self):
+        ir = BrainFuck()._compile_to_ir("+[>+[-]<-]")
+        assert TraceCompiler.compile(ir, 1) is None
+        assert TraceCompiler.compile(ir, 4) is not None
+
+    def test_io_loop_is_not_traced(self):
+        ir = BrainFuck()._compile_to_ir("+[,-]")
+        assert TraceCompiler.compile(ir, 1) is None
+
+    def test_infinite_linear_loop_exits_the_trace(self):
+        program = "+" * 80 + "[>++[--]<-]"
+        expected, _ = run(program)
+        traced, bf = run(program, tracing=True)
+        assert traced == expected
+        assert traced[3] is None
+
+        program = "+" * 80 + "[>+[--]<-]"
+        traced, bf = run(program, tracing=True)
+        assert traced[3] == STATUS_INFINITE_LOOP
+
+    def test_paged_tape_is_interpreted(self):
+        _, bf = run(HELLO, tracing=True, paged=True)
+        assert bf.stats["kernel"] == "interpreted"
+
+    def test_on_without_numba(self, monkeypatch):
+        monkeypatch.setattr(core, "HAVE_NUMBA", False)
+        assert BrainFuck().tracing
+
+
+class TestCLITrace:
+    def test_reports_compiled_loops(self, capsys):
+        core.main(["-c", "--trace", "+" * 100 + "[>" + "+" * 100 + "[>+<-]<-]"])
+        err = capsys.readouterr().err
+        assert "compiled loops: <input>:1:101" in err
+        assert "trace speedup:" in err
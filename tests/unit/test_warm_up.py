@@ -0,0 +1,73 @@
+import io
+
+import pytest
+
+from brainfuck import BrainFuck, core
+from brainfuck.core import JitWarmUp, start_warm_up
+
+
+class NoWait:
+    def wait(self):
+        raise AssertionError("waited for the warm-up")
+
+
+@pytest.fixture
+def warm_up(monkeypatch):
+    warm_up = JitWarmUp().start()
+    monkeypatch.setattr(core, "_jit_warm_up", warm_up)
+    return warm_up
+
+
+def run(bf, program="++[>+<-]>."):
+    bf.execute(program, output_file=io.StringIO())
+    return bf.stats
+
+
+class TestJitWarmUp:
+    def test_wait(self):
+        warm_up = JitWarmUp().start()
+        stats = warm_up.wait()
+        assert set(stats) == {"warm_up", "warm_up_saved"}
+        assert warm_up.seconds is not None and warm_up.blocked is not None
+        assert warm_up.wait() is None
+
+    def test_first_run_reports_it(self, warm_up):
+        bf = BrainFuck()
+        assert "warm_up_saved" in run(bf)
+        assert "warm_up_saved" not in run(bf)
+        assert not warm_up.thread.is_alive()
+
+    def test_cached_program_waits_before_running(self, warm_up):
+        run(BrainFuck(), "+++.")
+        warm_up.blocked = None
+        assert "warm_up" in run(BrainFuck(), "+++.")
+
+    def test_traced_runs_do_not_wait(self, monkeypatch):
+        monkeypatch.setattr(core, "_jit_warm_up", NoWait())
+        assert "warm_up" not in run(BrainFuck(tracing=True))
+
+    def test_started_once(self, monkeypatch):
+        monkeypatch.setattr(core, "_jit_warm_up", None)
+        warm_up = start_warm_up()
+        assert start_warm_up() is warm_up
+        warm_up.wait()
+
+
+class TestCommandLine:
+    def test_cli_starts_it(self, monkeypatch, capsys):
+        monkeypatch.setattr(core, "_jit_warm_up", None)
+        core.main(["-c", "--stats", "+."])
+        assert "warm up saved: " in capsys.readouterr().err
+
+    def test_no_warm_up(self, monkeypatch):
+        monkeypatch.setattr(core, "_jit_warm_up", None)
+        core.main(["-c", "--no-warm-up", "+."])
+        assert core._jit_warm_up is None
+
+    def test_repl_starts_it(self, monkeypatch):
+        monkeypatch.setattr(core, "_jit_warm_up", None)
+        monkeypatch.setattr("builtins.input", lambda prompt: "quit")
+        BrainFuck().interpreter(warm_up=False)
+        assert core._jit_warm_up is None
+        BrainFuck().interpreter()
+        core._jit_warm_up.wait()